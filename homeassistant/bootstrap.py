@@ -546,8 +546,15 @@ async def _async_set_up_integrations(
 
     # Wrap up startup
     _LOGGER.debug("Waiting for startup to wrap up")
+    wrap_up_start = monotonic()
     try:
         async with hass.timeout.async_timeout(WRAP_UP_TIMEOUT, cool_down=COOLDOWN_TIME):
             await hass.async_block_till_done()
     except asyncio.TimeoutError:
         _LOGGER.warning("Setup timed out for bootstrap - moving forward")
+    else:
+        _LOGGER.debug(
+            "Startup wrapped up in %.2fs, last tasks to finish: %s",
+            monotonic() - wrap_up_start,
+            hass.async_last_finished_tasks(),
+        )
@@ -34,7 +34,6 @@ from homeassistant.const import (
 import homeassistant.core as ha
 from homeassistant.exceptions import ServiceNotFound, TemplateError, Unauthorized
 from homeassistant.helpers import template
-from homeassistant.helpers.json import JSONEncoder
 from homeassistant.helpers.network import NoURLAvailableError, get_url
 from homeassistant.helpers.service import async_get_all_descriptions
 from homeassistant.helpers.state import AsyncTrackStates
@@ -107,20 +106,22 @@ class APIEventStream(HomeAssistantView):
         if restrict:
             restrict = restrict.split(",") + [EVENT_HOMEASSISTANT_STOP]
 
-        async def forward_events(event):
-            """Forward events to the open request."""
+        @ha.callback
+        def event_filter(event):
+            """Filter out events the stream is not interested in."""
             if event.event_type == EVENT_TIME_CHANGED:
-                return
+                return False
 
-            if restrict and event.event_type not in restrict:
-                return
+            return not restrict or event.event_type in restrict
 
+        async def forward_events(event):
+            """Forward events to the open request."""
             _LOGGER.debug("STREAM %s FORWARDING %s", id(stop_obj), event)
 
             if event.event_type == EVENT_HOMEASSISTANT_STOP:
                 data = stop_obj
             else:
-                data = json.dumps(event, cls=JSONEncoder)
+                data = event.as_json()
 
             await to_write.put(data)
 
@@ -128,7 +129,9 @@ class APIEventStream(HomeAssistantView):
         response.content_type = "text/event-stream"
         await response.prepare(request)
 
-        unsub_stream = hass.bus.async_listen(MATCH_ALL, forward_events)
+        unsub_stream = hass.bus.async_listen(
+            MATCH_ALL, forward_events, event_filter=event_filter
+        )
 
         try:
             _LOGGER.debug("STREAM %s ATTACHED", id(stop_obj))
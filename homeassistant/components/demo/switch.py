@@ -1,4 +1,6 @@
 """Demo platform that has two fake switches."""
+import asyncio
+
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.const import DEVICE_DEFAULT_NAME
 
@@ -27,6 +29,15 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     await async_setup_platform(hass, {}, async_add_entities)
 
 
+async def async_batch_entity_service(hass, entities, method, data):
+    """Handle a service for many demo switches in one request.
+
+    A platform with a hub would send a single group command here, the
+    demo switches are switched at the same time.
+    """
+    await asyncio.gather(*(getattr(entity, method)(**data) for entity in entities))
+
+
 class DemoSwitch(SwitchEntity):
     """Representation of a demo switch."""
 
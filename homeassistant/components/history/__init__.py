@@ -1,30 +1,42 @@
 """Provide pre-made queries on top of the recorder component."""
+import asyncio
 from collections import defaultdict
+from contextlib import suppress
 from datetime import datetime as dt, timedelta
-from itertools import groupby
+from itertools import chain, groupby
 import json
 import logging
+import threading
 import time
 from typing import Iterable, Optional, cast
 
-from aiohttp import web
-from sqlalchemy import and_, bindparam, func, not_, or_
+from aiohttp import hdrs, web
+from sqlalchemy import bindparam, func, not_, or_
 from sqlalchemy.ext import baked
 import voluptuous as vol
 
 from homeassistant.components import recorder
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.components.recorder.models import (
+    StateAttributes,
     States,
+    Statistics,
     process_timestamp,
     process_timestamp_to_utc_isoformat,
 )
+from homeassistant.components.recorder.snapshots import last_state_ids
+from homeassistant.components.recorder.statistics import (
+    PERIOD_5MINUTE,
+    PERIOD_HOUR,
+    period_start,
+)
 from homeassistant.components.recorder.util import execute, session_scope
 from homeassistant.const import (
     CONF_DOMAINS,
     CONF_ENTITIES,
     CONF_EXCLUDE,
     CONF_INCLUDE,
+    CONTENT_TYPE_JSON,
     HTTP_BAD_REQUEST,
 )
 from homeassistant.core import Context, State, split_entity_id
@@ -32,9 +44,12 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import (
     CONF_ENTITY_GLOBS,
     INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA,
+    generate_filter,
 )
+from homeassistant.helpers.json import JSONEncoder
 from homeassistant.helpers.typing import HomeAssistantType
 import homeassistant.util.dt as dt_util
+from homeassistant.util.executor import POOL_DB
 
 # mypy: allow-untyped-defs, no-check-untyped-defs
 
@@ -79,17 +94,43 @@ QUERY_STATES = [
     States.domain,
     States.entity_id,
     States.state,
-    States.attributes,
+    # Rows written before the attributes were shared keep them in states
+    func.coalesce(StateAttributes.shared_attrs, States.attributes).label(
+        "attributes"
+    ),
     States.last_changed,
     States.last_updated,
 ]
 
 HISTORY_BAKERY = "history_bakery"
 
+# Rows fetched from the database at once when streaming
+STREAM_BATCH_SIZE = 1000
+# Bytes of JSON written to a streamed response at once
+STREAM_CHUNK_SIZE = 65536
+# Chunks waiting to be written to a streamed response
+STREAM_QUEUE_SIZE = 4
+
+FORMAT_COLUMNAR = "columnar"
+# Keys of the columns of an entity in the columnar format
+COLUMN_TIME = "t"
+COLUMN_STATE = "s"
+COLUMN_ATTRIBUTES = "a"
+
+RESOLUTION_AUTO = "auto"
+RESOLUTIONS = {"5minute": PERIOD_5MINUTE, "hour": PERIOD_HOUR}
+
+
+def _query_states(session):
+    """Query QUERY_STATES joined with the attributes of the states."""
+    return session.query(*QUERY_STATES).outerjoin(
+        StateAttributes, States.attributes_id == StateAttributes.attributes_id
+    )
+
 
 def get_significant_states(hass, *args, **kwargs):
     """Wrap _get_significant_states with a sql session."""
-    with session_scope(hass=hass) as session:
+    with session_scope(hass=hass, read_only=True) as session:
         return _get_significant_states(hass, session, *args, **kwargs)
 
 
@@ -103,6 +144,7 @@ def _get_significant_states(
     include_start_time_state=True,
     significant_changes_only=True,
     minimal_response=False,
+    exclude_entity_ids=None,
 ):
     """
     Return states changes during UTC period start_time - end_time.
@@ -113,10 +155,52 @@ def _get_significant_states(
     """
     timer_start = time.perf_counter()
 
-    baked_query = hass.data[HISTORY_BAKERY](
-        lambda session: session.query(*QUERY_STATES)
+    states = execute(
+        _significant_states_query(
+            hass,
+            session,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            significant_changes_only,
+            exclude_entity_ids,
+        )
+    )
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        elapsed = time.perf_counter() - timer_start
+        _LOGGER.debug("get_significant_states took %fs", elapsed)
+
+    return _sorted_states_to_json(
+        hass,
+        session,
+        states,
+        start_time,
+        entity_ids,
+        filters,
+        include_start_time_state,
+        minimal_response,
+        exclude_entity_ids,
     )
 
+
+def _significant_states_query(
+    hass,
+    session,
+    start_time,
+    end_time,
+    entity_ids,
+    filters,
+    significant_changes_only,
+    exclude_entity_ids=None,
+):
+    """Return the query of the states of _get_significant_states.
+
+    Without entity_ids, the states of exclude_entity_ids are left out.
+    """
+    baked_query = hass.data[HISTORY_BAKERY](_query_states)
+
     if significant_changes_only:
         baked_query += lambda q: q.filter(
             (
@@ -136,40 +220,218 @@ def _get_significant_states(
         baked_query += lambda q: q.filter(~States.domain.in_(IGNORE_DOMAINS))
         if filters:
             filters.bake(baked_query)
+        if exclude_entity_ids:
+            baked_query += lambda q: q.filter(
+                ~States.entity_id.in_(bindparam("exclude_entity_ids", expanding=True))
+            )
 
     if end_time is not None:
         baked_query += lambda q: q.filter(States.last_updated < bindparam("end_time"))
 
     baked_query += lambda q: q.order_by(States.entity_id, States.last_updated)
 
-    states = execute(
-        baked_query(session).params(
-            start_time=start_time, end_time=end_time, entity_ids=entity_ids
-        )
+    return baked_query(session).params(
+        start_time=start_time,
+        end_time=end_time,
+        entity_ids=entity_ids,
+        exclude_entity_ids=exclude_entity_ids,
     )
 
-    if _LOGGER.isEnabledFor(logging.DEBUG):
-        elapsed = time.perf_counter() - timer_start
-        _LOGGER.debug("get_significant_states took %fs", elapsed)
 
-    return _sorted_states_to_json(
+def _stream_significant_states(
+    hass,
+    session,
+    start_time,
+    end_time,
+    entity_ids,
+    filters,
+    include_start_time_state,
+    significant_changes_only,
+    minimal_response,
+    exclude_entity_ids=None,
+):
+    """Yield the states of _get_significant_states one entity at a time.
+
+    The states of each entity are yielded lazily while the rows are
+    fetched from the database in batches, so memory use does not grow
+    with the length of the period.
+    """
+    start_states = {}
+    if include_start_time_state:
+        for state in _get_start_time_states(
+            hass, session, start_time, entity_ids, filters, exclude_entity_ids
+        ):
+            start_states[state.entity_id] = state
+
+    query = _significant_states_query(
         hass,
         session,
-        states,
         start_time,
+        end_time,
         entity_ids,
         filters,
-        include_start_time_state,
-        minimal_response,
+        significant_changes_only,
+        exclude_entity_ids,
+    ).with_post_criteria(lambda q: q.yield_per(STREAM_BATCH_SIZE))
+
+    for ent_id, group in groupby(query, lambda state: state.entity_id):
+        yield ent_id, _entity_states(
+            ent_id, group, start_states.pop(ent_id, None), minimal_response
+        )
+
+    # Entities that did not change during the period
+    for ent_id, state in start_states.items():
+        yield ent_id, iter([state])
+
+
+def _get_statistics(hass, session, start_time, end_time, entity_ids, filters, period):
+    """Return states made from the statistics of numeric sensors.
+
+    Each state holds the mean of the values recorded in a period, which
+    is not weighted by how long each value was held, starting when the
+    period starts, with the minimum and maximum as attributes. Sensors
+    whose statistics start after the start of the range are left out,
+    so their history is made from their states.
+    """
+    seconds = int(period.total_seconds())
+    range_start = period_start(start_time, period)
+    covered = session.query(Statistics.entity_id).filter(
+        (Statistics.period == seconds) & (Statistics.start <= range_start)
+    )
+    query = session.query(Statistics).filter(
+        (Statistics.period == seconds)
+        & (Statistics.start >= range_start)
+        & (Statistics.start < end_time)
+        & Statistics.entity_id.in_(covered.subquery())
+    )
+    if entity_ids is not None:
+        query = query.filter(Statistics.entity_id.in_(entity_ids))
+    query = query.order_by(Statistics.entity_id, Statistics.start)
+
+    entity_filter = None
+    if entity_ids is None and filters:
+        entity_filter = filters.entity_id_filter()
+
+    result = defaultdict(list)
+    for entity_id, group in groupby(execute(query), lambda row: row.entity_id):
+        if entity_filter is not None and not entity_filter(entity_id):
+            continue
+        current_state = hass.states.get(entity_id)
+        attributes = dict(current_state.attributes) if current_state else {}
+        for row in group:
+            start = process_timestamp(row.start)
+            result[entity_id].append(
+                State(
+                    entity_id,
+                    str(row.mean),
+                    {**attributes, "min": row.min, "max": row.max},
+                    start,
+                    start,
+                )
+            )
+
+    return result
+
+
+def _get_columnar_states(
+    hass,
+    session,
+    start_time,
+    end_time,
+    entity_ids,
+    filters,
+    include_start_time_state,
+    significant_changes_only,
+    exclude_entity_ids=None,
+):
+    """Return the significant states of each entity as columns.
+
+    The columns are built straight from the database rows. Their times
+    are the epoch milliseconds of last_updated, and attributes are only
+    included where they change, paired with the index of their state.
+    """
+    start_rows = {}
+    if include_start_time_state:
+        run = recorder.run_information_from_instance(hass, start_time)
+        for row in _get_state_rows_with_session(
+            hass,
+            session,
+            start_time,
+            entity_ids,
+            run=run,
+            filters=filters,
+            exclude_entity_ids=exclude_entity_ids,
+        ):
+            start_rows[row.entity_id] = row
+
+    rows = execute(
+        _significant_states_query(
+            hass,
+            session,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            significant_changes_only,
+            exclude_entity_ids,
+        )
     )
 
+    start_ms = _epoch_ms(start_time)
+    result = {}
+    for ent_id, group in groupby(rows, lambda row: row.entity_id):
+        result[ent_id] = _rows_to_columns(group, start_rows.pop(ent_id, None), start_ms)
+
+    # Entities that did not change during the period
+    for ent_id, row in start_rows.items():
+        result[ent_id] = _rows_to_columns((), row, start_ms)
+
+    return result
+
+
+def _rows_to_columns(rows, start_row, start_ms):
+    """Convert the rows of an entity, sorted by last_updated, to columns."""
+    points = ((_epoch_ms(row.last_updated), row.state, row.attributes) for row in rows)
+    if start_row is not None:
+        points = chain([(start_ms, start_row.state, start_row.attributes)], points)
+
+    times = []
+    states = []
+    attributes = []
+    prev_attributes = None
+    for index, (time_ms, state, attrs) in enumerate(points):
+        times.append(time_ms)
+        states.append(state)
+        if attrs != prev_attributes:
+            attributes.append([index, json.loads(attrs) if attrs else {}])
+            prev_attributes = attrs
+
+    return {COLUMN_TIME: times, COLUMN_STATE: states, COLUMN_ATTRIBUTES: attributes}
+
+
+def _states_to_columns(states):
+    """Convert a list of states to columns."""
+    attributes = []
+    for index, state in enumerate(states):
+        if not index or state.attributes != states[index - 1].attributes:
+            attributes.append([index, dict(state.attributes)])
+
+    return {
+        COLUMN_TIME: [_epoch_ms(state.last_updated) for state in states],
+        COLUMN_STATE: [state.state for state in states],
+        COLUMN_ATTRIBUTES: attributes,
+    }
+
+
+def _epoch_ms(timestamp):
+    """Return a timestamp in milliseconds since the epoch."""
+    return int(process_timestamp(timestamp).timestamp() * 1000)
+
 
 def state_changes_during_period(hass, start_time, end_time=None, entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
-    with session_scope(hass=hass) as session:
-        baked_query = hass.data[HISTORY_BAKERY](
-            lambda session: session.query(*QUERY_STATES)
-        )
+    with session_scope(hass=hass, read_only=True) as session:
+        baked_query = hass.data[HISTORY_BAKERY](_query_states)
 
         baked_query += lambda q: q.filter(
             (States.last_changed == States.last_updated)
@@ -182,7 +444,9 @@ def state_changes_during_period(hass, start_time, end_time=None, entity_id=None)
             )
 
         if entity_id is not None:
-            baked_query += lambda q: q.filter_by(entity_id=bindparam("entity_id"))
+            baked_query += lambda q: q.filter(
+                States.entity_id == bindparam("entity_id")
+            )
             entity_id = entity_id.lower()
 
         baked_query += lambda q: q.order_by(States.entity_id, States.last_updated)
@@ -202,14 +466,14 @@ def get_last_state_changes(hass, number_of_states, entity_id):
     """Return the last number_of_states."""
     start_time = dt_util.utcnow()
 
-    with session_scope(hass=hass) as session:
-        baked_query = hass.data[HISTORY_BAKERY](
-            lambda session: session.query(*QUERY_STATES)
-        )
+    with session_scope(hass=hass, read_only=True) as session:
+        baked_query = hass.data[HISTORY_BAKERY](_query_states)
         baked_query += lambda q: q.filter(States.last_changed == States.last_updated)
 
         if entity_id is not None:
-            baked_query += lambda q: q.filter_by(entity_id=bindparam("entity_id"))
+            baked_query += lambda q: q.filter(
+                States.entity_id == bindparam("entity_id")
+            )
             entity_id = entity_id.lower()
 
         baked_query += lambda q: q.order_by(
@@ -245,18 +509,48 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None)
         if run is None:
             return []
 
-    with session_scope(hass=hass) as session:
+    with session_scope(hass=hass, read_only=True) as session:
         return _get_states_with_session(
             hass, session, utc_point_in_time, entity_ids, run, filters
         )
 
 
 def _get_states_with_session(
-    hass, session, utc_point_in_time, entity_ids=None, run=None, filters=None
+    hass,
+    session,
+    utc_point_in_time,
+    entity_ids=None,
+    run=None,
+    filters=None,
+    exclude_entity_ids=None,
 ):
     """Return the states at a specific point in time."""
+    return [
+        LazyState(row)
+        for row in _get_state_rows_with_session(
+            hass,
+            session,
+            utc_point_in_time,
+            entity_ids,
+            run,
+            filters,
+            exclude_entity_ids,
+        )
+    ]
+
+
+def _get_state_rows_with_session(
+    hass,
+    session,
+    utc_point_in_time,
+    entity_ids=None,
+    run=None,
+    filters=None,
+    exclude_entity_ids=None,
+):
+    """Return the database rows of the states at a specific point in time."""
     if entity_ids and len(entity_ids) == 1:
-        return _get_single_entity_states_with_session(
+        return _get_single_entity_state_rows_with_session(
             hass, session, utc_point_in_time, entity_ids[0]
         )
 
@@ -268,42 +562,20 @@ def _get_states_with_session(
             return []
 
     # We have more than one entity to look at (most commonly we want
-    # all entities,) so we need to do a search on all states since the
-    # last recorder run started.
-    query = session.query(*QUERY_STATES)
-
-    most_recent_states_by_date = session.query(
-        States.entity_id.label("max_entity_id"),
-        func.max(States.last_updated).label("max_last_updated"),
-    ).filter(
-        (States.last_updated >= run.start) & (States.last_updated < utc_point_in_time)
-    )
-
-    if entity_ids:
-        most_recent_states_by_date.filter(States.entity_id.in_(entity_ids))
-
-    most_recent_states_by_date = most_recent_states_by_date.group_by(States.entity_id)
-
-    most_recent_states_by_date = most_recent_states_by_date.subquery()
+    # all entities,) so we need to find the last state of each entity
+    # since the last recorder run started. The recorder keeps snapshots
+    # of the last states, so only the states since the latest snapshot
+    # have to be searched.
+    query = _query_states(session)
 
-    most_recent_state_ids = session.query(
-        func.max(States.state_id).label("max_state_id")
-    ).join(
-        most_recent_states_by_date,
-        and_(
-            States.entity_id == most_recent_states_by_date.c.max_entity_id,
-            States.last_updated == most_recent_states_by_date.c.max_last_updated,
-        ),
-    )
-
-    most_recent_state_ids = most_recent_state_ids.group_by(States.entity_id)
-
-    most_recent_state_ids = most_recent_state_ids.subquery()
+    most_recent_state_ids = last_state_ids(
+        session, utc_point_in_time, entity_ids or None, run.start
+    ).subquery()
 
     query = query.join(
         most_recent_state_ids,
         States.state_id == most_recent_state_ids.c.max_state_id,
-    )
+    ).filter(States.last_updated >= run.start)
 
     if entity_ids is not None:
         query = query.filter(States.entity_id.in_(entity_ids))
@@ -311,16 +583,18 @@ def _get_states_with_session(
         query = query.filter(~States.domain.in_(IGNORE_DOMAINS))
         if filters:
             query = filters.apply(query)
+        if exclude_entity_ids:
+            query = query.filter(~States.entity_id.in_(exclude_entity_ids))
 
-    return [LazyState(row) for row in execute(query)]
+    return execute(query)
 
 
-def _get_single_entity_states_with_session(hass, session, utc_point_in_time, entity_id):
+def _get_single_entity_state_rows_with_session(
+    hass, session, utc_point_in_time, entity_id
+):
     # Use an entirely different (and extremely fast) query if we only
     # have a single entity id
-    baked_query = hass.data[HISTORY_BAKERY](
-        lambda session: session.query(*QUERY_STATES)
-    )
+    baked_query = hass.data[HISTORY_BAKERY](_query_states)
     baked_query += lambda q: q.filter(
         States.last_updated < bindparam("utc_point_in_time"),
         States.entity_id == bindparam("entity_id"),
@@ -332,7 +606,7 @@ def _get_single_entity_states_with_session(hass, session, utc_point_in_time, ent
         utc_point_in_time=utc_point_in_time, entity_id=entity_id
     )
 
-    return [LazyState(row) for row in execute(query)]
+    return execute(query)
 
 
 def _sorted_states_to_json(
@@ -344,6 +618,7 @@ def _sorted_states_to_json(
     filters=None,
     include_start_time_state=True,
     minimal_response=False,
+    exclude_entity_ids=None,
 ):
     """Convert SQL results into JSON friendly data structure.
 
@@ -365,63 +640,95 @@ def _sorted_states_to_json(
     # Get the states at the start time
     timer_start = time.perf_counter()
     if include_start_time_state:
-        run = recorder.run_information_from_instance(hass, start_time)
-        for state in _get_states_with_session(
-            hass, session, start_time, entity_ids, run=run, filters=filters
+        for state in _get_start_time_states(
+            hass, session, start_time, entity_ids, filters, exclude_entity_ids
         ):
-            state.last_changed = start_time
-            state.last_updated = start_time
             result[state.entity_id].append(state)
 
     if _LOGGER.isEnabledFor(logging.DEBUG):
         elapsed = time.perf_counter() - timer_start
         _LOGGER.debug("getting %d first datapoints took %fs", len(result), elapsed)
 
-    # Called in a tight loop so cache the function
-    # here
-    _process_timestamp_to_utc_isoformat = process_timestamp_to_utc_isoformat
-
     # Append all changes to it
     for ent_id, group in groupby(states, lambda state: state.entity_id):
-        domain = split_entity_id(ent_id)[0]
         ent_results = result[ent_id]
-        if not minimal_response or domain in NEED_ATTRIBUTE_DOMAINS:
-            ent_results.extend(LazyState(db_state) for db_state in group)
+        result[ent_id] = list(
+            _entity_states(
+                ent_id,
+                group,
+                ent_results[0] if ent_results else None,
+                minimal_response,
+            )
+        )
+
+    # Filter out the empty lists if some states had 0 results.
+    return {key: val for key, val in result.items() if val}
 
-        # With minimal response we only provide a native
-        # State for the first and last response. All the states
-        # in-between only provide the "state" and the
-        # "last_changed".
-        if not ent_results:
-            ent_results.append(LazyState(next(group)))
 
-        prev_state = ent_results[-1]
-        initial_state_count = len(ent_results)
+def _get_start_time_states(
+    hass, session, start_time, entity_ids, filters, exclude_entity_ids=None
+):
+    """Return the states at the start time, dated at the start time."""
+    run = recorder.run_information_from_instance(hass, start_time)
+    states = _get_states_with_session(
+        hass,
+        session,
+        start_time,
+        entity_ids,
+        run=run,
+        filters=filters,
+        exclude_entity_ids=exclude_entity_ids,
+    )
+    for state in states:
+        state.last_changed = start_time
+        state.last_updated = start_time
+    return states
 
+
+def _entity_states(ent_id, group, start_state, minimal_response):
+    """Yield the states of an entity from its rows sorted by last_updated.
+
+    With minimal response we only provide a native State for the first
+    and last response. All the states in-between only provide the
+    "state" and the "last_changed".
+    """
+    if start_state is not None:
+        yield start_state
+
+    if not minimal_response or split_entity_id(ent_id)[0] in NEED_ATTRIBUTE_DOMAINS:
         for db_state in group:
-            # With minimal response we do not care about attribute
-            # changes so we can filter out duplicate states
-            if db_state.state == prev_state.state:
-                continue
-
-            ent_results.append(
-                {
-                    STATE_KEY: db_state.state,
-                    LAST_CHANGED_KEY: _process_timestamp_to_utc_isoformat(
-                        db_state.last_changed
-                    ),
-                }
-            )
-            prev_state = db_state
+            yield LazyState(db_state)
+        return
 
-        if prev_state and len(ent_results) != initial_state_count:
-            # There was at least one state change
-            # replace the last minimal state with
-            # a full state
-            ent_results[-1] = LazyState(prev_state)
+    if start_state is None:
+        prev_state = next(group)
+        yield LazyState(prev_state)
+    else:
+        prev_state = start_state
 
-    # Filter out the empty lists if some states had 0 results.
-    return {key: val for key, val in result.items() if val}
+    # Called in a tight loop so cache the function
+    # here
+    _process_timestamp_to_utc_isoformat = process_timestamp_to_utc_isoformat
+
+    # The last state is held back to be provided as a full state
+    last_state = None
+    for db_state in group:
+        # With minimal response we do not care about attribute
+        # changes so we can filter out duplicate states
+        if db_state.state == prev_state.state:
+            continue
+
+        if last_state is not None:
+            yield {
+                STATE_KEY: last_state.state,
+                LAST_CHANGED_KEY: _process_timestamp_to_utc_isoformat(
+                    last_state.last_changed
+                ),
+            }
+        last_state = prev_state = db_state
+
+    if last_state is not None:
+        yield LazyState(last_state)
 
 
 def get_state(hass, utc_point_in_time, entity_id, run=None):
@@ -448,6 +755,10 @@ async def async_setup(hass, config):
     return True
 
 
+class StreamClosed(Exception):
+    """Raised when a streamed response is closed before it is complete."""
+
+
 class HistoryPeriodView(HomeAssistantView):
     """Handle history period requests."""
 
@@ -502,6 +813,20 @@ class HistoryPeriodView(HomeAssistantView):
 
         minimal_response = "minimal_response" in request.query
 
+        resolution = request.query.get("resolution")
+        if resolution is None:
+            period = None
+        elif resolution == RESOLUTION_AUTO:
+            period = _period_for_range(start_time, end_time)
+        elif resolution in RESOLUTIONS:
+            period = RESOLUTIONS[resolution]
+        else:
+            return self.json_message("Invalid resolution", HTTP_BAD_REQUEST)
+
+        history_format = request.query.get("format")
+        if history_format not in (None, FORMAT_COLUMNAR):
+            return self.json_message("Invalid format", HTTP_BAD_REQUEST)
+
         hass = request.app["hass"]
 
         if (
@@ -509,11 +834,42 @@ class HistoryPeriodView(HomeAssistantView):
             and entity_ids
             and not _entities_may_have_state_changes_after(hass, entity_ids, start_time)
         ):
-            return self.json([])
+            return self.json({} if history_format else [])
+
+        if history_format == FORMAT_COLUMNAR:
+            return cast(
+                web.Response,
+                await hass.async_add_pool_executor_job(
+                    POOL_DB,
+                    self._columnar_states_json,
+                    hass,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    include_start_time_state,
+                    significant_changes_only,
+                    period,
+                ),
+            )
+
+        # The include order can only be applied to the full result
+        if "stream" in request.query and not (self.filters and self.use_include_order):
+            return await self._async_stream_significant_states_json(
+                request,
+                hass,
+                start_time,
+                end_time,
+                entity_ids,
+                include_start_time_state,
+                significant_changes_only,
+                minimal_response,
+                period,
+            )
 
         return cast(
             web.Response,
-            await hass.async_add_executor_job(
+            await hass.async_add_pool_executor_job(
+                POOL_DB,
                 self._sorted_significant_states_json,
                 hass,
                 start_time,
@@ -522,6 +878,7 @@ class HistoryPeriodView(HomeAssistantView):
                 include_start_time_state,
                 significant_changes_only,
                 minimal_response,
+                period,
             ),
         )
 
@@ -534,22 +891,58 @@ class HistoryPeriodView(HomeAssistantView):
         include_start_time_state,
         significant_changes_only,
         minimal_response,
+        period=None,
     ):
-        """Fetch significant stats from the database as json."""
+        """Fetch significant stats from the database as json.
+
+        With a period, numeric sensors with statistics are served from
+        the statistics of that period instead of their states.
+        """
         timer_start = time.perf_counter()
 
-        with session_scope(hass=hass) as session:
-            result = _get_significant_states(
-                hass,
-                session,
-                start_time,
-                end_time,
-                entity_ids,
-                self.filters,
-                include_start_time_state,
-                significant_changes_only,
-                minimal_response,
-            )
+        with session_scope(hass=hass, read_only=True) as session:
+            statistics = {}
+            if period is not None:
+                statistics = _get_statistics(
+                    hass,
+                    session,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    self.filters,
+                    period,
+                )
+
+            states_entity_ids = entity_ids
+            if entity_ids is not None:
+                states_entity_ids = [
+                    entity_id for entity_id in entity_ids if entity_id not in statistics
+                ]
+
+            result = {}
+            if states_entity_ids is None or states_entity_ids:
+                result = _get_significant_states(
+                    hass,
+                    session,
+                    start_time,
+                    end_time,
+                    states_entity_ids,
+                    self.filters,
+                    include_start_time_state,
+                    significant_changes_only,
+                    minimal_response,
+                    list(statistics),
+                )
+
+        if entity_ids is not None:
+            # Keep the order of the requested entities
+            result = {
+                entity_id: statistics.get(entity_id) or result[entity_id]
+                for entity_id in entity_ids
+                if entity_id in statistics or entity_id in result
+            }
+        else:
+            result.update(statistics)
 
         result = list(result.values())
         if _LOGGER.isEnabledFor(logging.DEBUG):
@@ -571,6 +964,204 @@ class HistoryPeriodView(HomeAssistantView):
 
         return self.json(result)
 
+    def _columnar_states_json(
+        self,
+        hass,
+        start_time,
+        end_time,
+        entity_ids,
+        include_start_time_state,
+        significant_changes_only,
+        period,
+    ):
+        """Fetch significant states from the database as columnar json."""
+        timer_start = time.perf_counter()
+
+        with session_scope(hass=hass, read_only=True) as session:
+            statistics = {}
+            if period is not None:
+                statistics = _get_statistics(
+                    hass,
+                    session,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    self.filters,
+                    period,
+                )
+
+            states_entity_ids = entity_ids
+            if entity_ids is not None:
+                states_entity_ids = [
+                    entity_id for entity_id in entity_ids if entity_id not in statistics
+                ]
+
+            result = {}
+            if states_entity_ids is None or states_entity_ids:
+                result = _get_columnar_states(
+                    hass,
+                    session,
+                    start_time,
+                    end_time,
+                    states_entity_ids,
+                    self.filters,
+                    include_start_time_state,
+                    significant_changes_only,
+                    list(statistics),
+                )
+
+        for entity_id, states in statistics.items():
+            result[entity_id] = _states_to_columns(states)
+
+        if entity_ids is not None:
+            # Keep the order of the requested entities
+            result = {
+                entity_id: result[entity_id]
+                for entity_id in entity_ids
+                if entity_id in result
+            }
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            elapsed = time.perf_counter() - timer_start
+            _LOGGER.debug(
+                "Extracted %d states in %fs",
+                sum(len(columns[COLUMN_TIME]) for columns in result.values()),
+                elapsed,
+            )
+
+        return self.json(result)
+
+    async def _async_stream_significant_states_json(self, request, hass, *args):
+        """Stream significant states from the database as chunked json."""
+        response = web.StreamResponse(headers={hdrs.CONTENT_TYPE: CONTENT_TYPE_JSON})
+        response.enable_compression()
+        await response.prepare(request)
+
+        chunks = asyncio.Queue(STREAM_QUEUE_SIZE)
+        closed = threading.Event()
+
+        def put_chunk(chunk):
+            """Pass a chunk to the event loop, waiting while it is behind."""
+            if closed.is_set():
+                raise StreamClosed
+            asyncio.run_coroutine_threadsafe(chunks.put(chunk), hass.loop).result()
+
+        future = hass.async_add_pool_executor_job(
+            POOL_DB, self._stream_significant_states_json, hass, put_chunk, *args
+        )
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                await response.write(chunk)
+        finally:
+            # Unblock the executor so it notices the response is closed
+            closed.set()
+            while not chunks.empty():
+                chunks.get_nowait()
+
+        await future
+        await response.write_eof()
+        return response
+
+    def _stream_significant_states_json(
+        self,
+        hass,
+        put_chunk,
+        start_time,
+        end_time,
+        entity_ids,
+        include_start_time_state,
+        significant_changes_only,
+        minimal_response,
+        period,
+    ):
+        """Fetch significant states from the database as json chunks."""
+        timer_start = time.perf_counter()
+        buffer = []
+        buffered = 0
+        state_count = 0
+
+        def write(text):
+            """Write json, passing on a chunk once enough is buffered."""
+            nonlocal buffered
+            buffer.append(text)
+            buffered += len(text)
+            if buffered >= STREAM_CHUNK_SIZE:
+                put_chunk("".join(buffer).encode("UTF-8"))
+                buffer.clear()
+                buffered = 0
+
+        try:
+            with session_scope(hass=hass, read_only=True) as session:
+                statistics = {}
+                if period is not None:
+                    statistics = _get_statistics(
+                        hass,
+                        session,
+                        start_time,
+                        end_time,
+                        entity_ids,
+                        self.filters,
+                        period,
+                    )
+
+                states_entity_ids = entity_ids
+                if entity_ids is not None:
+                    states_entity_ids = [
+                        entity_id
+                        for entity_id in entity_ids
+                        if entity_id not in statistics
+                    ]
+
+                entities = iter(())
+                if states_entity_ids is None or states_entity_ids:
+                    entities = _stream_significant_states(
+                        hass,
+                        session,
+                        start_time,
+                        end_time,
+                        states_entity_ids,
+                        self.filters,
+                        include_start_time_state,
+                        significant_changes_only,
+                        minimal_response,
+                        list(statistics),
+                    )
+                entities = chain(statistics.items(), entities)
+
+                write("[")
+                for index, (_, states) in enumerate(entities):
+                    write(",[" if index else "[")
+                    for state_index, state in enumerate(states):
+                        if state_index:
+                            write(",")
+                        write(json.dumps(state, cls=JSONEncoder, allow_nan=False))
+                        state_count += 1
+                    write("]")
+                write("]")
+
+            put_chunk("".join(buffer).encode("UTF-8"))
+        except StreamClosed:
+            return
+        finally:
+            with suppress(StreamClosed):
+                put_chunk(None)
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            elapsed = time.perf_counter() - timer_start
+            _LOGGER.debug("Streamed %d states in %fs", state_count, elapsed)
+
+
+def _period_for_range(start_time, end_time):
+    """Return the statistics period to serve a time range with."""
+    if end_time - start_time > timedelta(days=7):
+        return PERIOD_HOUR
+    if end_time - start_time > timedelta(days=1):
+        return PERIOD_5MINUTE
+    return None
+
 
 def sqlalchemy_filter_from_include_exclude_conf(conf):
     """Build a sql filter from config."""
@@ -624,6 +1215,17 @@ class Filters:
 
         return False
 
+    def entity_id_filter(self):
+        """Generate a filter of entity ids like the entity filter query."""
+        return generate_filter(
+            self.included_domains,
+            self.included_entities,
+            self.excluded_domains,
+            self.excluded_entities,
+            self.included_entity_globs,
+            self.excluded_entity_globs,
+        )
+
     def bake(self, baked_query):
         """Update a baked query.
 
@@ -57,8 +57,8 @@ async def async_attach_trigger(
     job = HassJob(action)
 
     @callback
-    def handle_event(event):
-        """Listen for events and calls the action when data matches."""
+    def filter_event(event):
+        """Filter events by the configured event data and context."""
         try:
             # Check that the event data and context match the configured
             # schema if one was provided
@@ -68,8 +68,12 @@ async def async_attach_trigger(
                 event_context_schema(event.context.as_dict())
         except vol.Invalid:
             # If event doesn't match, skip event
-            return
+            return False
+        return True
 
+    @callback
+    def handle_event(event):
+        """Listen for events and calls the action when data matches."""
         hass.async_run_hass_job(
             job,
             {
@@ -82,4 +86,4 @@ async def async_attach_trigger(
             event.context,
         )
 
-    return hass.bus.async_listen(event_type, handle_event)
+    return hass.bus.async_listen(event_type, handle_event, event_filter=filter_event)
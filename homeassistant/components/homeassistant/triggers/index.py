@@ -0,0 +1,488 @@
+"""Shared index for state based automation triggers.
+
+Instead of every state and numeric_state trigger installing its own
+state change listener, triggers register with a single index per
+entity. State triggers are bucketed by the to and from values they
+match, numeric_state triggers by their thresholds, so a state change
+only visits the triggers it can fire.
+"""
+from bisect import bisect_left, bisect_right
+import itertools
+import logging
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
+
+from homeassistant.const import MATCH_ALL, STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    process_state_match,
+)
+from homeassistant.helpers.singleton import singleton
+from homeassistant.helpers.template import Template
+
+DATA_TRIGGER_INDEX = "homeassistant_trigger_index"
+
+# Bucket for triggers that do not match a fixed set of values
+_ANY = object()
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _attribute_value(state: Optional[State], attribute: Optional[str]) -> Any:
+    """Return the value a trigger compares for a state."""
+    if state is None:
+        return None
+    if attribute is None:
+        return state.state
+    return state.attributes.get(attribute)
+
+
+def _numeric_value(state: Optional[State], attribute: Optional[str]) -> Optional[float]:
+    """Return the value as a number, None if it cannot be compared."""
+    if state is None:
+        return None
+    if attribute is None:
+        value: Any = state.state
+    elif attribute not in state.attributes:
+        return None
+    else:
+        value = state.attributes[attribute]
+
+    if value in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+        return None
+
+    try:
+        fvalue = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    return None if math.isnan(fvalue) else fvalue
+
+
+def _lower_list(entity_ids: Union[str, Iterable[str]]) -> List[str]:
+    """Return entity ids as a lowercase list."""
+    if isinstance(entity_ids, str):
+        return [entity_ids.lower()]
+    return [entity_id.lower() for entity_id in entity_ids]
+
+
+def _match_keys(parameter: Any) -> List[Any]:
+    """Return the bucket keys of a from or to parameter."""
+    if parameter is None or parameter == MATCH_ALL:
+        return [_ANY]
+
+    if isinstance(parameter, str) or not hasattr(parameter, "__iter__"):
+        values = [parameter]
+    else:
+        values = list(parameter)
+
+    try:
+        return list(dict.fromkeys(values))
+    except TypeError:
+        # Unhashable values are matched by the trigger itself
+        return [_ANY]
+
+
+class _StateTrigger:
+    """A registered state trigger."""
+
+    __slots__ = (
+        "seq",
+        "entity_ids",
+        "attribute",
+        "from_keys",
+        "to_keys",
+        "match_from",
+        "match_to",
+        "action",
+        "removed",
+    )
+
+    def __init__(
+        self,
+        seq: int,
+        entity_ids: List[str],
+        attribute: Optional[str],
+        from_state: Any,
+        to_state: Any,
+        action: Callable[[Event], Any],
+    ) -> None:
+        """Initialize a state trigger."""
+        self.seq = seq
+        self.entity_ids = entity_ids
+        self.attribute = attribute
+        self.from_keys = _match_keys(from_state)
+        self.to_keys = _match_keys(to_state)
+        self.match_from = process_state_match(from_state)
+        self.match_to = process_state_match(to_state)
+        self.action = action
+        self.removed = False
+
+    @callback
+    def async_dispatch(self, event: Event, node: "_EntityTriggers") -> None:
+        """Run the trigger for a matching state change."""
+        self.action(event)
+
+
+class _NumericStateTrigger:
+    """A registered numeric_state trigger."""
+
+    __slots__ = (
+        "seq",
+        "entity_ids",
+        "attribute",
+        "below",
+        "above",
+        "indexed",
+        "check",
+        "action",
+        "triggered",
+        "removed",
+    )
+
+    def __init__(
+        self,
+        seq: int,
+        entity_ids: List[str],
+        attribute: Optional[str],
+        below: Optional[float],
+        above: Optional[float],
+        value_template: Optional[Template],
+        check: Callable[[str, Optional[State], Optional[State]], bool],
+        action: Callable[[Event], bool],
+    ) -> None:
+        """Initialize a numeric_state trigger."""
+        self.seq = seq
+        self.entity_ids = entity_ids
+        self.attribute = attribute
+        self.below = below
+        self.above = above
+        # A value template can map any state to any number,
+        # so thresholds only tell us something without one.
+        self.indexed = value_template is None
+        self.check = check
+        self.action = action
+        self.triggered: Set[str] = set()
+        self.removed = False
+
+    @callback
+    def async_dispatch(self, event: Event, node: "_EntityTriggers") -> None:
+        """Run the trigger when the criteria start to be met."""
+        entity_id = event.data["entity_id"]
+        node.unsynced.discard(self)
+
+        if not self.check(
+            entity_id, event.data.get("old_state"), event.data.get("new_state")
+        ):
+            self.triggered.discard(entity_id)
+            return
+
+        if entity_id in self.triggered:
+            return
+
+        self.triggered.add(entity_id)
+        if not self.action(event):
+            # Not armed, check again on the next state change
+            self.triggered.discard(entity_id)
+            if self.indexed:
+                node.unsynced.add(self)
+
+
+class _Thresholds:
+    """Numeric triggers sorted by a threshold."""
+
+    def __init__(self) -> None:
+        """Initialize the thresholds."""
+        self._values: List[float] = []
+        self._triggers: List[_NumericStateTrigger] = []
+
+    def add(self, value: float, trigger: _NumericStateTrigger) -> None:
+        """Add a trigger for a threshold."""
+        pos = bisect_right(self._values, value)
+        self._values.insert(pos, value)
+        self._triggers.insert(pos, trigger)
+
+    def remove(self, value: float, trigger: _NumericStateTrigger) -> None:
+        """Remove a trigger for a threshold."""
+        pos = bisect_left(self._values, value)
+        while self._triggers[pos] is not trigger:
+            pos += 1
+        del self._values[pos]
+        del self._triggers[pos]
+
+    def crossed_above(self, low: float, high: float) -> List[_NumericStateTrigger]:
+        """Return triggers where `value > threshold` differs for low and high."""
+        return self._triggers[
+            bisect_left(self._values, low) : bisect_left(self._values, high)
+        ]
+
+    def crossed_below(self, low: float, high: float) -> List[_NumericStateTrigger]:
+        """Return triggers where `value < threshold` differs for low and high."""
+        return self._triggers[
+            bisect_right(self._values, low) : bisect_right(self._values, high)
+        ]
+
+
+class _EntityTriggers:
+    """Triggers watching one attribute of an entity."""
+
+    def __init__(self, attribute: Optional[str]) -> None:
+        """Initialize the triggers of an entity."""
+        self.attribute = attribute
+        self.count = 0
+        self.states: Dict[Any, Dict[Any, List[_StateTrigger]]] = {}
+        self.numeric: List[_NumericStateTrigger] = []
+        self.unindexed: List[_NumericStateTrigger] = []
+        # Indexed triggers that have not yet seen the current value
+        self.unsynced: Set[_NumericStateTrigger] = set()
+        self.above = _Thresholds()
+        self.below = _Thresholds()
+
+    @callback
+    def async_add_state(self, trigger: _StateTrigger) -> None:
+        """Add a state trigger."""
+        self.count += 1
+        for to_key in trigger.to_keys:
+            from_triggers = self.states.setdefault(to_key, {})
+            for from_key in trigger.from_keys:
+                from_triggers.setdefault(from_key, []).append(trigger)
+
+    @callback
+    def async_remove_state(self, trigger: _StateTrigger) -> None:
+        """Remove a state trigger."""
+        self.count -= 1
+        for to_key in trigger.to_keys:
+            from_triggers = self.states[to_key]
+            for from_key in trigger.from_keys:
+                from_triggers[from_key].remove(trigger)
+                if not from_triggers[from_key]:
+                    del from_triggers[from_key]
+            if not from_triggers:
+                del self.states[to_key]
+
+    @callback
+    def async_add_numeric(self, trigger: _NumericStateTrigger) -> None:
+        """Add a numeric_state trigger."""
+        self.count += 1
+        self.numeric.append(trigger)
+        if not trigger.indexed:
+            self.unindexed.append(trigger)
+            return
+        self.unsynced.add(trigger)
+        if trigger.above is not None:
+            self.above.add(trigger.above, trigger)
+        if trigger.below is not None:
+            self.below.add(trigger.below, trigger)
+
+    @callback
+    def async_remove_numeric(self, trigger: _NumericStateTrigger) -> None:
+        """Remove a numeric_state trigger."""
+        self.count -= 1
+        self.numeric.remove(trigger)
+        if not trigger.indexed:
+            self.unindexed.remove(trigger)
+            return
+        self.unsynced.discard(trigger)
+        if trigger.above is not None:
+            self.above.remove(trigger.above, trigger)
+        if trigger.below is not None:
+            self.below.remove(trigger.below, trigger)
+
+    @callback
+    def async_collect(self, event: Event, candidates: List[Any]) -> None:
+        """Add the triggers a state change may fire to candidates."""
+        from_s = event.data.get("old_state")
+        to_s = event.data.get("new_state")
+
+        if self.states:
+            old_value = _attribute_value(from_s, self.attribute)
+            new_value = _attribute_value(to_s, self.attribute)
+            for to_key in (new_value, _ANY):
+                try:
+                    from_triggers = self.states.get(to_key)
+                except TypeError:
+                    continue
+                if not from_triggers:
+                    continue
+                for from_key in (old_value, _ANY):
+                    try:
+                        triggers = from_triggers.get(from_key)
+                    except TypeError:
+                        continue
+                    if not triggers:
+                        continue
+                    candidates.extend(
+                        trigger
+                        for trigger in triggers
+                        if trigger.match_from(old_value) and trigger.match_to(new_value)
+                    )
+
+        if not self.numeric:
+            return
+
+        old_number = _numeric_value(from_s, self.attribute)
+        new_number = _numeric_value(to_s, self.attribute)
+        if old_number is None or new_number is None:
+            # Let every trigger see values it cannot compare
+            candidates.extend(self.numeric)
+            return
+
+        low, high = sorted((old_number, new_number))
+        numeric = set(self.unsynced)
+        numeric.update(self.above.crossed_above(low, high))
+        numeric.update(self.below.crossed_below(low, high))
+        candidates.extend(numeric)
+        candidates.extend(self.unindexed)
+
+
+class TriggerIndex:
+    """Dispatch state changes to the state based triggers they can fire."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the trigger index."""
+        self.hass = hass
+        self._seq = itertools.count()
+        self._entities: Dict[str, Dict[Optional[str], _EntityTriggers]] = {}
+        self._unsubs: Dict[str, CALLBACK_TYPE] = {}
+
+    @callback
+    def async_attach_state(
+        self,
+        entity_ids: Union[str, Iterable[str]],
+        attribute: Optional[str],
+        from_state: Any,
+        to_state: Any,
+        action: Callable[[Event], Any],
+    ) -> CALLBACK_TYPE:
+        """Attach a state trigger.
+
+        The action is called for state changes matching from_state and
+        to_state, which are MATCH_ALL, a value or a list of values.
+        """
+        trigger = _StateTrigger(
+            next(self._seq),
+            _lower_list(entity_ids),
+            attribute,
+            from_state,
+            to_state,
+            action,
+        )
+        for entity_id in trigger.entity_ids:
+            self._async_node(entity_id, attribute).async_add_state(trigger)
+
+        @callback
+        def async_remove() -> None:
+            """Detach the state trigger."""
+            trigger.removed = True
+            for entity_id in trigger.entity_ids:
+                self._entities[entity_id][attribute].async_remove_state(trigger)
+                self._async_prune(entity_id, attribute)
+
+        return async_remove
+
+    @callback
+    def async_attach_numeric_state(
+        self,
+        entity_ids: Union[str, Iterable[str]],
+        attribute: Optional[str],
+        below: Optional[float],
+        above: Optional[float],
+        value_template: Optional[Template],
+        check: Callable[[str, Optional[State], Optional[State]], bool],
+        action: Callable[[Event], bool],
+    ) -> CALLBACK_TYPE:
+        """Attach a numeric_state trigger.
+
+        The action is called when check starts to pass for an entity and
+        returns False if the trigger should not be considered fired.
+        Without a value template only changes crossing below or above
+        are checked.
+        """
+        trigger = _NumericStateTrigger(
+            next(self._seq),
+            _lower_list(entity_ids),
+            attribute,
+            below,
+            above,
+            value_template,
+            check,
+            action,
+        )
+        for entity_id in trigger.entity_ids:
+            self._async_node(entity_id, attribute).async_add_numeric(trigger)
+
+        @callback
+        def async_remove() -> None:
+            """Detach the numeric_state trigger."""
+            trigger.removed = True
+            for entity_id in trigger.entity_ids:
+                self._entities[entity_id][attribute].async_remove_numeric(trigger)
+                self._async_prune(entity_id, attribute)
+
+        return async_remove
+
+    @callback
+    def _async_node(
+        self, entity_id: str, attribute: Optional[str]
+    ) -> _EntityTriggers:
+        """Return the triggers of an entity attribute, listening if needed."""
+        if entity_id not in self._entities:
+            self._entities[entity_id] = {}
+            self._unsubs[entity_id] = async_track_state_change_event(
+                self.hass, entity_id, self._async_dispatch
+            )
+
+        nodes = self._entities[entity_id]
+        if attribute not in nodes:
+            nodes[attribute] = _EntityTriggers(attribute)
+        return nodes[attribute]
+
+    @callback
+    def _async_prune(self, entity_id: str, attribute: Optional[str]) -> None:
+        """Stop tracking an entity attribute without triggers."""
+        nodes = self._entities[entity_id]
+        if nodes[attribute].count:
+            return
+        del nodes[attribute]
+        if nodes:
+            return
+        del self._entities[entity_id]
+        self._unsubs.pop(entity_id)()
+
+    @callback
+    def _async_dispatch(self, event: Event) -> None:
+        """Run the triggers a state change can fire."""
+        entity_id = event.data["entity_id"]
+        nodes = self._entities.get(entity_id)
+        if not nodes:
+            return
+
+        candidates: List[Any] = []
+        by_trigger: Dict[Any, _EntityTriggers] = {}
+        for node in nodes.values():
+            start = len(candidates)
+            node.async_collect(event, candidates)
+            for trigger in candidates[start:]:
+                by_trigger[trigger] = node
+
+        if len(candidates) > 1:
+            # Keep the order in which the triggers were attached
+            candidates.sort(key=lambda trigger: trigger.seq)
+
+        for trigger in candidates:
+            if trigger.removed:
+                continue
+            try:
+                trigger.async_dispatch(event, by_trigger[trigger])
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Error while processing state changed for %s", entity_id
+                )
+
+
+@callback
+@singleton(DATA_TRIGGER_INDEX)
+def async_get_trigger_index(hass: HomeAssistant) -> TriggerIndex:
+    """Return the trigger index of a Home Assistant instance."""
+    return TriggerIndex(hass)
@@ -15,10 +15,9 @@ from homeassistant.const import (
 )
 from homeassistant.core import CALLBACK_TYPE, HassJob, callback
 from homeassistant.helpers import condition, config_validation as cv, template
-from homeassistant.helpers.event import (
-    async_track_same_state,
-    async_track_state_change_event,
-)
+from homeassistant.helpers.event import async_track_same_state
+
+from .index import async_get_trigger_index
 
 # mypy: allow-incomplete-defs, allow-untyped-calls, allow-untyped-defs
 # mypy: no-check-untyped-defs
@@ -70,7 +69,6 @@ async def async_attach_trigger(
     template.attach(hass, time_delta)
     value_template = config.get(CONF_VALUE_TEMPLATE)
     unsub_track_same = {}
-    entities_triggered = set()
     period: dict = {}
     attribute = config.get(CONF_ATTRIBUTE)
     job = HassJob(action)
@@ -99,7 +97,10 @@ async def async_attach_trigger(
 
     @callback
     def state_automation_listener(event):
-        """Listen for state changes and calls action."""
+        """Listen for the criteria to start being met and calls action.
+
+        Returns False if the trigger could not be armed.
+        """
         entity = event.data.get("entity_id")
         from_s = event.data.get("old_state")
         to_s = event.data.get("new_state")
@@ -124,47 +125,47 @@ async def async_attach_trigger(
                 to_s.context,
             )
 
-        matching = check_numeric_state(entity, from_s, to_s)
+        if not time_delta:
+            call_action()
+            return True
 
-        if not matching:
-            entities_triggered.discard(entity)
-        elif entity not in entities_triggered:
-            entities_triggered.add(entity)
+        variables = {
+            "trigger": {
+                "platform": "numeric_state",
+                "entity_id": entity,
+                "below": below,
+                "above": above,
+            }
+        }
 
-            if time_delta:
-                variables = {
-                    "trigger": {
-                        "platform": "numeric_state",
-                        "entity_id": entity,
-                        "below": below,
-                        "above": above,
-                    }
-                }
-
-                try:
-                    period[entity] = cv.positive_time_period(
-                        template.render_complex(time_delta, variables)
-                    )
-                except (exceptions.TemplateError, vol.Invalid) as ex:
-                    _LOGGER.error(
-                        "Error rendering '%s' for template: %s",
-                        automation_info["name"],
-                        ex,
-                    )
-                    entities_triggered.discard(entity)
-                    return
-
-                unsub_track_same[entity] = async_track_same_state(
-                    hass,
-                    period[entity],
-                    call_action,
-                    entity_ids=entity,
-                    async_check_same_func=check_numeric_state,
-                )
-            else:
-                call_action()
-
-    unsub = async_track_state_change_event(hass, entity_id, state_automation_listener)
+        try:
+            period[entity] = cv.positive_time_period(
+                template.render_complex(time_delta, variables)
+            )
+        except (exceptions.TemplateError, vol.Invalid) as ex:
+            _LOGGER.error(
+                "Error rendering '%s' for template: %s", automation_info["name"], ex
+            )
+            return False
+
+        unsub_track_same[entity] = async_track_same_state(
+            hass,
+            period[entity],
+            call_action,
+            entity_ids=entity,
+            async_check_same_func=check_numeric_state,
+        )
+        return True
+
+    unsub = async_get_trigger_index(hass).async_attach_numeric_state(
+        entity_id,
+        attribute,
+        below,
+        above,
+        value_template,
+        check_numeric_state,
+        state_automation_listener,
+    )
 
     @callback
     def async_remove():
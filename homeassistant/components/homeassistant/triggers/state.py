@@ -9,12 +9,9 @@ from homeassistant import exceptions
 from homeassistant.const import CONF_ATTRIBUTE, CONF_FOR, CONF_PLATFORM, MATCH_ALL
 from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, State, callback
 from homeassistant.helpers import config_validation as cv, template
-from homeassistant.helpers.event import (
-    Event,
-    async_track_same_state,
-    async_track_state_change_event,
-    process_state_match,
-)
+from homeassistant.helpers.event import Event, async_track_same_state
+
+from .index import async_get_trigger_index
 
 # mypy: allow-incomplete-defs, allow-untyped-calls, allow-untyped-defs
 # mypy: no-check-untyped-defs
@@ -80,14 +77,12 @@ async def async_attach_trigger(
     match_all = from_state == MATCH_ALL and to_state == MATCH_ALL
     unsub_track_same = {}
     period: Dict[str, timedelta] = {}
-    match_from_state = process_state_match(from_state)
-    match_to_state = process_state_match(to_state)
     attribute = config.get(CONF_ATTRIBUTE)
     job = HassJob(action)
 
     @callback
     def state_automation_listener(event: Event):
-        """Listen for state changes and calls action."""
+        """Listen for state changes matching from and to and calls action."""
         entity: str = event.data["entity_id"]
         from_s: Optional[State] = event.data.get("old_state")
         to_s: Optional[State] = event.data.get("new_state")
@@ -113,11 +108,7 @@ async def async_attach_trigger(
         if attribute is not None and old_value == new_value:
             return
 
-        if (
-            not match_from_state(old_value)
-            or not match_to_state(new_value)
-            or (not match_all and old_value == new_value)
-        ):
+        if not match_all and old_value == new_value:
             return
 
         @callback
@@ -184,7 +175,9 @@ async def async_attach_trigger(
             entity_ids=entity,
         )
 
-    unsub = async_track_state_change_event(hass, entity_id, state_automation_listener)
+    unsub = async_get_trigger_index(hass).async_attach_state(
+        entity_id, attribute, from_state, to_state, state_automation_listener
+    )
 
     @callback
     def async_remove():
@@ -1,4 +1,5 @@
 """Event parser and human readable log generator."""
+from collections import OrderedDict, deque
 from datetime import timedelta
 from itertools import groupby
 import json
@@ -9,11 +10,14 @@ from sqlalchemy.orm import aliased
 from sqlalchemy.sql.expression import literal
 import voluptuous as vol
 
+from homeassistant.components import websocket_api
 from homeassistant.components.automation import EVENT_AUTOMATION_TRIGGERED
 from homeassistant.components.history import sqlalchemy_filter_from_include_exclude_conf
 from homeassistant.components.http import HomeAssistantView
+from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.models import (
     Events,
+    StateAttributes,
     States,
     process_timestamp_to_utc_isoformat,
 )
@@ -26,12 +30,14 @@ from homeassistant.const import (
     ATTR_ICON,
     ATTR_NAME,
     ATTR_SERVICE,
+    ATTR_UNIT_OF_MEASUREMENT,
     EVENT_CALL_SERVICE,
     EVENT_HOMEASSISTANT_START,
     EVENT_HOMEASSISTANT_STOP,
     EVENT_LOGBOOK_ENTRY,
     EVENT_STATE_CHANGED,
     HTTP_BAD_REQUEST,
+    MATCH_ALL,
 )
 from homeassistant.core import DOMAIN as HA_DOMAIN, callback, split_entity_id
 from homeassistant.exceptions import InvalidEntityFormatError
@@ -46,6 +52,7 @@ from homeassistant.helpers.integration_platform import (
 )
 from homeassistant.loader import bind_hass
 import homeassistant.util.dt as dt_util
+from homeassistant.util.executor import POOL_DB
 
 ENTITY_ID_JSON_TEMPLATE = '"entity_id": "{}"'
 ENTITY_ID_JSON_EXTRACT = re.compile('"entity_id": "([^"]+)"')
@@ -60,11 +67,22 @@ CONTINUOUS_DOMAINS = ["proximity", "sensor"]
 
 DOMAIN = "logbook"
 
+DATA_BUFFER = "logbook_buffer"
+
+# Number of the most recent logbook events kept in memory
+BUFFER_SIZE = 10000
+CONTEXT_LOOKUP_SIZE = 10000
+
 GROUP_BY_MINUTES = 15
 
 EMPTY_JSON_OBJECT = "{}"
 UNIT_OF_MEASUREMENT_JSON = '"unit_of_measurement":'
 
+# Rows written before the attributes were shared keep them in states
+STATE_ATTRIBUTES = sqlalchemy.func.coalesce(
+    StateAttributes.shared_attrs, States.attributes
+)
+
 HA_DOMAIN_ENTITY_ID = f"{HA_DOMAIN}."
 
 CONFIG_SCHEMA = vol.Schema(
@@ -160,7 +178,13 @@ async def async_setup(hass, config):
         filters = None
         entities_filter = None
 
-    hass.http.register_view(LogbookView(conf, filters, entities_filter))
+    buffer = hass.data[DATA_BUFFER] = LogbookBuffer(hass, entities_filter)
+    hass.bus.async_listen(
+        MATCH_ALL, buffer.async_handle_event, event_filter=buffer.async_event_filter
+    )
+
+    hass.http.register_view(LogbookView(conf, filters, entities_filter, buffer))
+    hass.components.websocket_api.async_register_command(websocket_subscribe)
 
     hass.services.async_register(DOMAIN, "log", log_message, schema=LOG_MESSAGE_SCHEMA)
 
@@ -187,11 +211,12 @@ class LogbookView(HomeAssistantView):
     name = "api:logbook"
     extra_urls = ["/api/logbook/{datetime}"]
 
-    def __init__(self, config, filters, entities_filter):
+    def __init__(self, config, filters, entities_filter, buffer):
         """Initialize the logbook view."""
         self.config = config
         self.filters = filters
         self.entities_filter = entities_filter
+        self.buffer = buffer
 
     async def get(self, request, datetime=None):
         """Retrieve logbook entries."""
@@ -233,6 +258,26 @@ class LogbookView(HomeAssistantView):
 
         entity_matches_only = "entity_matches_only" in request.query
 
+        buffered_events = self.buffer.async_get_events(start_day, end_day)
+        if buffered_events is not None:
+            # The context lookup and the attribute cache are changed by the
+            # event loop, only the serialization is done in the executor
+            entries = list(
+                humanify(
+                    hass,
+                    _filter_buffered_events(
+                        hass,
+                        buffered_events,
+                        entity_ids,
+                        self.entities_filter,
+                        entity_matches_only,
+                    ),
+                    self.buffer.entity_attr_cache,
+                    self.buffer.context_lookup,
+                )
+            )
+            return await hass.async_add_executor_job(self.json, entries)
+
         def json_events():
             """Fetch events and generate JSON."""
             return self.json(
@@ -247,7 +292,44 @@ class LogbookView(HomeAssistantView):
                 )
             )
 
-        return await hass.async_add_executor_job(json_events)
+        return await hass.async_add_pool_executor_job(POOL_DB, json_events)
+
+
+@callback
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "logbook/subscribe",
+        vol.Optional("entity_ids"): cv.entity_ids,
+        vol.Optional("entity_matches_only", default=False): bool,
+    }
+)
+def websocket_subscribe(hass, connection, msg):
+    """Push the logbook entries of new events as they happen."""
+    buffer = hass.data[DATA_BUFFER]
+    entity_ids = msg.get("entity_ids")
+
+    @callback
+    def forward_event(event):
+        """Forward the logbook entries of an event to the websocket."""
+        entries = list(
+            humanify(
+                hass,
+                _filter_buffered_events(
+                    hass,
+                    [event],
+                    entity_ids,
+                    buffer.entities_filter,
+                    msg["entity_matches_only"],
+                ),
+                buffer.entity_attr_cache,
+                buffer.context_lookup,
+            )
+        )
+        if entries:
+            connection.send_message(websocket_api.event_message(msg["id"], entries))
+
+    connection.subscriptions[msg["id"]] = buffer.async_add_listener(forward_event)
+    connection.send_result(msg["id"])
 
 
 def humanify(hass, events, entity_attr_cache, context_lookup):
@@ -422,6 +504,7 @@ def _get_events(
 ):
     """Get events for a period of time."""
 
+    # Not shared with the buffer, this runs in the executor
     entity_attr_cache = EntityAttributeCache(hass)
     context_lookup = {None: None}
 
@@ -440,7 +523,7 @@ def _get_events(
     if entity_ids is not None:
         entities_filter = generate_filter([], entity_ids, [], [])
 
-    with session_scope(hass=hass) as session:
+    with session_scope(hass=hass, read_only=True) as session:
         old_state = aliased(States, name="old_state")
 
         if entity_ids is not None:
@@ -480,13 +563,32 @@ def _get_events(
         )
 
 
+def _filter_buffered_events(
+    hass, events, entity_ids, entities_filter, entity_matches_only
+):
+    """Yield the buffered events that _get_events would return."""
+    if entity_ids is not None:
+        entities_filter = generate_filter([], entity_ids, [], [])
+
+    for event in events:
+        if event.event_type == EVENT_STATE_CHANGED:
+            if entities_filter is None or entities_filter(event.entity_id):
+                yield event
+        elif _keep_event(hass, event, entities_filter) and (
+            not entity_matches_only
+            or entity_ids is None
+            or event.data_entity_id in entity_ids
+        ):
+            yield event
+
+
 def _generate_events_query(session):
     return session.query(
         *EVENT_COLUMNS,
         States.state,
         States.entity_id,
         States.domain,
-        States.attributes,
+        STATE_ATTRIBUTES.label("attributes"),
     )
 
 
@@ -504,6 +606,9 @@ def _generate_states_query(session, start_day, end_day, old_state, entity_ids):
     return (
         _generate_events_query(session)
         .outerjoin(Events, (States.event_id == Events.event_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
         .outerjoin(old_state, (States.old_state_id == old_state.state_id))
         .filter(_missing_state_matcher(old_state))
         .filter(_continuous_entity_matcher())
@@ -518,6 +623,9 @@ def _generate_states_query(session, start_day, end_day, old_state, entity_ids):
 def _apply_events_types_and_states_filter(hass, query, old_state):
     events_query = (
         query.outerjoin(States, (Events.event_id == States.event_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
         .outerjoin(old_state, (States.old_state_id == old_state.state_id))
         .filter(
             (Events.event_type != EVENT_STATE_CHANGED)
@@ -548,7 +656,7 @@ def _continuous_entity_matcher():
     #
     return sqlalchemy.or_(
         sqlalchemy.not_(States.domain.in_(CONTINUOUS_DOMAINS)),
-        sqlalchemy.not_(States.attributes.contains(UNIT_OF_MEASUREMENT_JSON)),
+        sqlalchemy.not_(STATE_ATTRIBUTES.contains(UNIT_OF_MEASUREMENT_JSON)),
     )
 
 
@@ -750,6 +858,184 @@ class LazyEventPartialState:
         return self._time_fired_isoformat
 
 
+class LiveEvent:
+    """A core Event with the interface of LazyEventPartialState."""
+
+    __slots__ = [
+        "event_type",
+        "entity_id",
+        "state",
+        "domain",
+        "attributes",
+        "data",
+        "context_id",
+        "context_user_id",
+        "time_fired",
+        "time_fired_minute",
+    ]
+
+    def __init__(self, event):
+        """Init the live event."""
+        self.event_type = event.event_type
+        if event.event_type == EVENT_STATE_CHANGED:
+            new_state = event.data["new_state"]
+            self.entity_id = new_state.entity_id
+            self.state = new_state.state
+            self.domain = new_state.domain
+            self.attributes = new_state.attributes
+            # The data of state changes is not stored
+            self.data = {}
+        else:
+            self.entity_id = None
+            self.state = None
+            self.domain = None
+            self.attributes = {}
+            self.data = event.data
+        self.context_id = event.context.id
+        self.context_user_id = event.context.user_id
+        self.time_fired = event.time_fired
+        self.time_fired_minute = event.time_fired.minute
+
+    @property
+    def attributes_icon(self):
+        """Extract the icon from the attributes."""
+        return self.attributes.get(ATTR_ICON)
+
+    @property
+    def data_entity_id(self):
+        """Extract the entity id from the data if it is a single one."""
+        entity_id = self.data.get(ATTR_ENTITY_ID)
+        return entity_id if isinstance(entity_id, str) else None
+
+    @property
+    def data_domain(self):
+        """Extract the domain from the data."""
+        domain = self.data.get(ATTR_DOMAIN)
+        return domain if isinstance(domain, str) else None
+
+    @property
+    def time_fired_isoformat(self):
+        """Time event was fired in utc isoformat."""
+        return process_timestamp_to_utc_isoformat(self.time_fired)
+
+
+class LogbookBuffer:
+    """Keep the most recent logbook events in memory.
+
+    Events are fed live from the event bus and filtered like the database
+    query of _get_events, so requests for a period that is fully buffered
+    are served without querying the database. The context lookup and the
+    entity attribute cache are shared by all requests.
+    """
+
+    def __init__(self, hass, entities_filter):
+        """Initialize the buffer."""
+        self._hass = hass
+        self.entities_filter = entities_filter
+        self.events = deque(maxlen=BUFFER_SIZE)
+        # Events after this time are all buffered
+        self.start = dt_util.utcnow()
+        self.context_lookup = OrderedDict()
+        self.entity_attr_cache = EntityAttributeCache(hass)
+        self._listeners = []
+
+    @callback
+    def async_handle_event(self, event):
+        """Add an event to the buffer if it belongs in the logbook."""
+        if event.event_type == EVENT_STATE_CHANGED:
+            # The name of the entity can change with its attributes
+            self.entity_attr_cache.async_remove(event.data.get(ATTR_ENTITY_ID))
+
+        if not self._async_keep_event(event):
+            return
+
+        live_event = LiveEvent(event)
+        if (
+            live_event.context_id is not None
+            and live_event.context_id not in self.context_lookup
+        ):
+            self.context_lookup[live_event.context_id] = live_event
+            if len(self.context_lookup) > CONTEXT_LOOKUP_SIZE:
+                # Events of earlier periods may miss their context now
+                _, context_event = self.context_lookup.popitem(last=False)
+                self.start = max(self.start, context_event.time_fired)
+
+        if event.event_type == EVENT_CALL_SERVICE:
+            # Only used to describe the context of other events
+            return
+
+        if len(self.events) == self.events.maxlen:
+            self.start = self.events[0].time_fired
+            while self.context_lookup:
+                context_event = next(iter(self.context_lookup.values()))
+                if context_event.time_fired > self.start:
+                    break
+                self.context_lookup.popitem(last=False)
+
+        self.events.append(live_event)
+        for listener in list(self._listeners):
+            listener(live_event)
+
+    @callback
+    def async_event_filter(self, event):
+        """Return if an event type can show up in the logbook."""
+        event_type = event.event_type
+        return (
+            event_type == EVENT_STATE_CHANGED
+            or event_type in ALL_EVENT_TYPES_EXCEPT_STATE_CHANGED
+            or event_type in self._hass.data[DOMAIN]
+        )
+
+    @callback
+    def _async_keep_event(self, event):
+        """Return if an event is recorded and can show up in the logbook."""
+        event_type = event.event_type
+        if event_type == EVENT_STATE_CHANGED:
+            old_state = event.data.get("old_state")
+            new_state = event.data.get("new_state")
+            # Like _missing_state_matcher and _continuous_entity_matcher
+            if (
+                old_state is None
+                or new_state is None
+                or new_state.state == old_state.state
+                or (
+                    new_state.domain in CONTINUOUS_DOMAINS
+                    and ATTR_UNIT_OF_MEASUREMENT in new_state.attributes
+                )
+            ):
+                return False
+
+        # Events the recorder excludes are not in the database either
+        instance = self._hass.data.get(DATA_INSTANCE)
+        if instance is None:
+            return True
+        if event_type in instance.exclude_t:
+            return False
+        entity_id = event.data.get(ATTR_ENTITY_ID)
+        return entity_id is None or instance.entity_filter(entity_id)
+
+    @callback
+    def async_get_events(self, start_day, end_day):
+        """Return the buffered events of a period, None if not all are buffered."""
+        if start_day < self.start:
+            return None
+        return [
+            event for event in self.events if start_day < event.time_fired < end_day
+        ]
+
+    @callback
+    def async_add_listener(self, listener):
+        """Call listener with each new buffered event."""
+        self._listeners.append(listener)
+
+        @callback
+        def remove_listener():
+            """Stop calling the listener."""
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+
 class EntityAttributeCache:
     """A cache to lookup static entity_id attribute.
 
@@ -764,20 +1050,23 @@ class EntityAttributeCache:
 
     def get(self, entity_id, attribute, event):
         """Lookup an attribute for an entity or get it from the cache."""
-        if entity_id in self._cache:
-            if attribute in self._cache[entity_id]:
-                return self._cache[entity_id][attribute]
-        else:
-            self._cache[entity_id] = {}
+        entity_cache = self._cache.setdefault(entity_id, {})
+        if attribute in entity_cache:
+            return entity_cache[attribute]
 
         current_state = self._hass.states.get(entity_id)
         if current_state:
             # Try the current state as its faster than decoding the
             # attributes
-            self._cache[entity_id][attribute] = current_state.attributes.get(attribute)
+            entity_cache[attribute] = current_state.attributes.get(attribute)
         else:
             # If the entity has been removed, decode the attributes
             # instead
-            self._cache[entity_id][attribute] = event.attributes.get(attribute)
+            entity_cache[attribute] = event.attributes.get(attribute)
 
-        return self._cache[entity_id][attribute]
+        return entity_cache[attribute]
+
+    @callback
+    def async_remove(self, entity_id):
+        """Forget the cached attributes of an entity."""
+        self._cache.pop(entity_id, None)
@@ -10,12 +10,14 @@ import objgraph
 from pyprof2calltree import convert
 import voluptuous as vol
 
+from homeassistant.components import websocket_api
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.service import async_register_admin_service
 from homeassistant.helpers.typing import ConfigType
+from homeassistant.util.job_profiler import DEFAULT_BLOCK_THRESHOLD, JobProfiler
 
 from .const import DOMAIN
 
@@ -24,6 +26,7 @@ SERVICE_MEMORY = "memory"
 SERVICE_START_LOG_OBJECTS = "start_log_objects"
 SERVICE_STOP_LOG_OBJECTS = "stop_log_objects"
 SERVICE_DUMP_LOG_OBJECTS = "dump_log_objects"
+SERVICE_JOBS = "jobs"
 
 SERVICES = (
     SERVICE_START,
@@ -31,21 +34,29 @@ SERVICES = (
     SERVICE_START_LOG_OBJECTS,
     SERVICE_STOP_LOG_OBJECTS,
     SERVICE_DUMP_LOG_OBJECTS,
+    SERVICE_JOBS,
 )
 
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
+DEFAULT_JOB_COUNT = 20
+DEFAULT_JOB_INTERVAL = timedelta(seconds=5)
 
 CONF_SECONDS = "seconds"
 CONF_SCAN_INTERVAL = "scan_interval"
 CONF_TYPE = "type"
+CONF_BLOCK_THRESHOLD = "block_threshold"
+CONF_COUNT = "count"
 
 LOG_INTERVAL_SUB = "log_interval_subscription"
+JOB_PROFILER_USERS = "job_profiler_users"
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the profiler component."""
+    websocket_api.async_register_command(hass, websocket_subscribe_jobs)
+    websocket_api.async_register_command(hass, websocket_executor_stats)
     return True
 
 
@@ -63,6 +74,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         async with lock:
             await _async_generate_memory_profile(hass, call)
 
+    async def _async_run_job_profile(call: ServiceCall):
+        await _async_generate_job_profile(hass, call)
+
     async def _async_start_log_objects(call: ServiceCall):
         if LOG_INTERVAL_SUB in domain_data:
             domain_data[LOG_INTERVAL_SUB]()
@@ -149,6 +163,22 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         schema=vol.Schema({vol.Required(CONF_TYPE): str}),
     )
 
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_JOBS,
+        _async_run_job_profile,
+        schema=vol.Schema(
+            {
+                vol.Optional(CONF_SECONDS, default=60.0): vol.Coerce(float),
+                vol.Optional(CONF_COUNT, default=DEFAULT_JOB_COUNT): cv.positive_int,
+                vol.Optional(
+                    CONF_BLOCK_THRESHOLD, default=DEFAULT_BLOCK_THRESHOLD
+                ): vol.Coerce(float),
+            }
+        ),
+    )
+
     return True
 
 
@@ -159,9 +189,88 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     if LOG_INTERVAL_SUB in hass.data[DOMAIN]:
         hass.data[DOMAIN][LOG_INTERVAL_SUB]()
     hass.data.pop(DOMAIN)
+    hass.async_set_job_profiler(None)
     return True
 
 
+@callback
+def _async_start_job_profiler(hass: HomeAssistant, block_threshold: float):
+    """Enable the job profiler, sharing it with other running profiles."""
+    domain_data = hass.data[DOMAIN]
+    domain_data[JOB_PROFILER_USERS] = domain_data.get(JOB_PROFILER_USERS, 0) + 1
+    if hass.job_profiler is None:
+        hass.async_set_job_profiler(JobProfiler(block_threshold))
+    else:
+        hass.job_profiler.block_threshold = block_threshold
+    return hass.job_profiler
+
+
+@callback
+def _async_stop_job_profiler(hass: HomeAssistant):
+    """Disable the job profiler once no profile is running anymore."""
+    domain_data = hass.data.get(DOMAIN)
+    if domain_data is None or JOB_PROFILER_USERS not in domain_data:
+        return
+
+    domain_data[JOB_PROFILER_USERS] -= 1
+    if not domain_data[JOB_PROFILER_USERS]:
+        domain_data.pop(JOB_PROFILER_USERS)
+        hass.async_set_job_profiler(None)
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "profiler/subscribe_jobs",
+        vol.Optional(CONF_COUNT, default=DEFAULT_JOB_COUNT): cv.positive_int,
+        vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_JOB_INTERVAL): vol.All(
+            cv.time_period, cv.positive_timedelta
+        ),
+        vol.Optional(CONF_BLOCK_THRESHOLD, default=DEFAULT_BLOCK_THRESHOLD): vol.Coerce(
+            float
+        ),
+    }
+)
+@callback
+def websocket_subscribe_jobs(hass, connection, msg):
+    """Stream the most expensive jobs while the subscription is active."""
+    if DOMAIN not in hass.data:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Profiler is not set up"
+        )
+        return
+
+    profiler = _async_start_job_profiler(hass, msg[CONF_BLOCK_THRESHOLD])
+
+    @callback
+    def _async_send_jobs(*_):
+        connection.send_message(
+            websocket_api.event_message(
+                msg["id"], {"jobs": profiler.top(msg[CONF_COUNT])}
+            )
+        )
+
+    unsub_interval = async_track_time_interval(
+        hass, _async_send_jobs, msg[CONF_SCAN_INTERVAL]
+    )
+
+    @callback
+    def _async_unsubscribe():
+        unsub_interval()
+        _async_stop_job_profiler(hass)
+
+    connection.subscriptions[msg["id"]] = _async_unsubscribe
+    connection.send_result(msg["id"])
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command({vol.Required("type"): "profiler/executor_stats"})
+@callback
+def websocket_executor_stats(hass, connection, msg):
+    """Return queue depth and latency of the executor pools."""
+    connection.send_result(msg["id"], hass.executors.async_stats())
+
+
 async def _async_generate_profile(hass: HomeAssistant, call: ServiceCall):
     start_time = int(time.time() * 1000000)
     hass.components.persistent_notification.async_create(
@@ -186,6 +295,33 @@ async def _async_generate_profile(hass: HomeAssistant, call: ServiceCall):
     )
 
 
+async def _async_generate_job_profile(hass: HomeAssistant, call: ServiceCall):
+    start_time = int(time.time() * 1000000)
+    hass.components.persistent_notification.async_create(
+        "The job profile has started. This notification will be updated when it is complete.",
+        title="Profile Started",
+        notification_id=f"job_profiler_{start_time}",
+    )
+    profiler = _async_start_job_profiler(hass, call.data[CONF_BLOCK_THRESHOLD])
+    try:
+        await asyncio.sleep(float(call.data[CONF_SECONDS]))
+        jobs = profiler.top(call.data[CONF_COUNT])
+    finally:
+        _async_stop_job_profiler(hass)
+
+    _LOGGER.critical("Most expensive jobs: %s", jobs)
+    lines = "\n".join(
+        f"- {job['name']}: {job['calls']} calls, {job['total_time']:.3f}s total, "
+        f"{job['max_time']:.3f}s max, blocked {job['blocked']} times"
+        for job in jobs
+    )
+    hass.components.persistent_notification.async_create(
+        f"Most expensive jobs:\n{lines}",
+        title="Profile Complete",
+        notification_id=f"job_profiler_{start_time}",
+    )
+
+
 async def _async_generate_memory_profile(hass: HomeAssistant, call: ServiceCall):
     start_time = int(time.time() * 1000000)
     hass.components.persistent_notification.async_create(
@@ -1,30 +1,31 @@
 """Support for recording details."""
 import asyncio
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 import concurrent.futures
 from datetime import datetime
 import logging
 import queue
 import threading
 import time
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, List, Optional, cast
 
 from sqlalchemy import create_engine, event as sqlalchemy_event, exc, select
 from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 import voluptuous as vol
 
 from homeassistant.components import persistent_notification
 from homeassistant.const import (
     ATTR_ENTITY_ID,
     CONF_EXCLUDE,
+    EVENT_CALL_SERVICE,
     EVENT_HOMEASSISTANT_START,
     EVENT_HOMEASSISTANT_STOP,
     EVENT_STATE_CHANGED,
     EVENT_TIME_CHANGED,
     MATCH_ALL,
 )
-from homeassistant.core import CoreState, HomeAssistant, callback
+from homeassistant.core import CoreState, HomeAssistant, TimeResolution, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import (
     INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA,
@@ -33,11 +34,19 @@ from homeassistant.helpers.entityfilter import (
 )
 from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
+from homeassistant.util.executor import DEFAULT_POOL_SIZES, POOL_DB
 
-from . import migration, purge
+from . import migration, purge, snapshots
+from .bulk import BulkWriter
 from .const import CONF_DB_INTEGRITY_CHECK, DATA_INSTANCE, DOMAIN, SQLITE_URL_PREFIX
-from .models import Base, Events, RecorderRuns, States
-from .util import session_scope, validate_or_move_away_sqlite_database
+from .journal import RecorderJournal
+from .models import Base, Events, RecorderRuns, StateAttributes, States
+from .statistics import StatisticsCompiler, period_start
+from .util import (
+    instrument_query_timing,
+    session_scope,
+    validate_or_move_away_sqlite_database,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -59,12 +68,33 @@ DEFAULT_DB_INTEGRITY_CHECK = True
 DEFAULT_DB_MAX_RETRIES = 10
 DEFAULT_DB_RETRY_WAIT = 3
 DEFAULT_COMMIT_INTERVAL = 1
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_QUEUE_SIZE = 40000
+DEFAULT_SAMPLE_INTERVAL = 10
+DEFAULT_JOURNAL_FILE = "home-assistant_v2.journal"
+# A connection for each thread of the database executor pool
+DEFAULT_READ_POOL_SIZE = DEFAULT_POOL_SIZES[POOL_DB]
 KEEPALIVE_TIME = 30
 
+OVERFLOW_DROP = "drop"
+OVERFLOW_JOURNAL = "journal"
+OVERFLOW_SAMPLE = "sample"
+
+# Once the queue is filled up to this fraction the drop and sample
+# overflow policies start to shed load
+QUEUE_HIGH_WATER_MARK = 0.8
+
+# How many journaled events are moved to the queue at once
+JOURNAL_REPLAY_SIZE = 1000
+
 # Controls how often we clean up
 # States and Events objects
 EXPIRE_AFTER_COMMITS = 120
 
+# How many state attributes ids are remembered to avoid
+# looking them up in the database
+STATE_ATTRIBUTES_ID_CACHE_SIZE = 2048
+
 CONF_AUTO_PURGE = "auto_purge"
 CONF_DB_URL = "db_url"
 CONF_DB_MAX_RETRIES = "db_max_retries"
@@ -73,6 +103,13 @@ CONF_PURGE_KEEP_DAYS = "purge_keep_days"
 CONF_PURGE_INTERVAL = "purge_interval"
 CONF_EVENT_TYPES = "event_types"
 CONF_COMMIT_INTERVAL = "commit_interval"
+CONF_BULK_INSERT = "bulk_insert"
+CONF_BATCH_SIZE = "batch_size"
+CONF_MAX_QUEUE_SIZE = "max_queue_size"
+CONF_OVERFLOW_POLICY = "overflow_policy"
+CONF_LOW_PRIORITY_EVENT_TYPES = "low_priority_event_types"
+CONF_SAMPLE_INTERVAL = "sample_interval"
+CONF_READ_POOL_SIZE = "read_pool_size"
 
 EXCLUDE_SCHEMA = INCLUDE_EXCLUDE_FILTER_SCHEMA_INNER.extend(
     {vol.Optional(CONF_EVENT_TYPES): vol.All(cv.ensure_list, [cv.string])}
@@ -97,6 +134,25 @@ CONFIG_SCHEMA = vol.Schema(
                     vol.Optional(
                         CONF_COMMIT_INTERVAL, default=DEFAULT_COMMIT_INTERVAL
                     ): cv.positive_int,
+                    vol.Optional(CONF_BULK_INSERT, default=False): cv.boolean,
+                    vol.Optional(
+                        CONF_BATCH_SIZE, default=DEFAULT_BATCH_SIZE
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_MAX_QUEUE_SIZE, default=DEFAULT_MAX_QUEUE_SIZE
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_OVERFLOW_POLICY, default=OVERFLOW_DROP
+                    ): vol.In([OVERFLOW_DROP, OVERFLOW_JOURNAL, OVERFLOW_SAMPLE]),
+                    vol.Optional(
+                        CONF_LOW_PRIORITY_EVENT_TYPES, default=[EVENT_CALL_SERVICE]
+                    ): vol.All(cv.ensure_list, [cv.string]),
+                    vol.Optional(
+                        CONF_SAMPLE_INTERVAL, default=DEFAULT_SAMPLE_INTERVAL
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_READ_POOL_SIZE, default=DEFAULT_READ_POOL_SIZE
+                    ): cv.positive_int,
                     vol.Optional(
                         CONF_DB_MAX_RETRIES, default=DEFAULT_DB_MAX_RETRIES
                     ): cv.positive_int,
@@ -123,7 +179,7 @@ def run_information(hass, point_in_time: Optional[datetime] = None):
     if run_info:
         return run_info
 
-    with session_scope(hass=hass) as session:
+    with session_scope(hass=hass, read_only=True) as session:
         return run_information_with_session(session, point_in_time)
 
 
@@ -170,12 +226,24 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         db_url = DEFAULT_URL.format(hass_config_path=hass.config.path(DEFAULT_DB_FILE))
     exclude = conf[CONF_EXCLUDE]
     exclude_t = exclude.get(CONF_EVENT_TYPES, [])
+    journal = None
+    if conf[CONF_OVERFLOW_POLICY] == OVERFLOW_JOURNAL:
+        journal = RecorderJournal(hass.config.path(DEFAULT_JOURNAL_FILE))
+        await hass.async_add_executor_job(journal.load)
     instance = hass.data[DATA_INSTANCE] = Recorder(
         hass=hass,
         auto_purge=auto_purge,
         keep_days=keep_days,
         commit_interval=commit_interval,
         uri=db_url,
+        bulk_insert=conf[CONF_BULK_INSERT],
+        batch_size=conf[CONF_BATCH_SIZE],
+        max_queue_size=conf[CONF_MAX_QUEUE_SIZE],
+        overflow_policy=conf[CONF_OVERFLOW_POLICY],
+        low_priority_event_types=conf[CONF_LOW_PRIORITY_EVENT_TYPES],
+        sample_interval=conf[CONF_SAMPLE_INTERVAL],
+        journal=journal,
+        read_pool_size=conf[CONF_READ_POOL_SIZE],
         db_max_retries=db_max_retries,
         db_retry_wait=db_retry_wait,
         entity_filter=entity_filter,
@@ -203,6 +271,10 @@ class WaitTask:
     """An object to insert into the recorder queue to tell it set the _queue_watch event."""
 
 
+class JournalTask:
+    """An object to insert into the recorder queue to replay the journal."""
+
+
 class Recorder(threading.Thread):
     """A threaded recorder class."""
 
@@ -218,6 +290,14 @@ class Recorder(threading.Thread):
         entity_filter: Callable[[str], bool],
         exclude_t: List[str],
         db_integrity_check: bool,
+        bulk_insert: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        overflow_policy: str = OVERFLOW_DROP,
+        low_priority_event_types: Optional[List[str]] = None,
+        sample_interval: int = DEFAULT_SAMPLE_INTERVAL,
+        journal: Optional[RecorderJournal] = None,
+        read_pool_size: int = DEFAULT_READ_POOL_SIZE,
     ) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name="Recorder")
@@ -226,7 +306,24 @@ class Recorder(threading.Thread):
         self.auto_purge = auto_purge
         self.keep_days = keep_days
         self.commit_interval = commit_interval
+        # Commit intervals under a minute need every tick of the core timer,
+        # otherwise a tick a minute is enough for commits and keepalives
+        self._time_resolution = (
+            TimeResolution.second
+            if 0 < commit_interval < TimeResolution.minute
+            else TimeResolution.minute
+        )
         self.queue: Any = queue.SimpleQueue()
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.low_priority_event_types = low_priority_event_types or []
+        self.sample_interval = sample_interval
+        self.dropped_events = 0
+        self._high_water_mark = int(max_queue_size * QUEUE_HIGH_WATER_MARK)
+        self._journal = journal
+        self._overflowing = False
+        self._last_sampled: Dict[str, datetime] = {}
+        self._last_time_fired: Optional[datetime] = None
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
         self.db_max_retries = db_max_retries
@@ -235,6 +332,8 @@ class Recorder(threading.Thread):
         self.async_db_ready = asyncio.Future()
         self._queue_watch = threading.Event()
         self.engine: Any = None
+        self.read_engine: Any = None
+        self.read_pool_size = read_pool_size
         self.run_info: Any = None
 
         self.entity_filter = entity_filter
@@ -245,14 +344,44 @@ class Recorder(threading.Thread):
         self._keepalive_count = 0
         self._old_states = {}
         self._pending_expunge = []
+        self._state_attributes_ids: "OrderedDict[str, int]" = OrderedDict()
+        self._pending_state_attributes: Dict[str, StateAttributes] = {}
+        self._statistics = StatisticsCompiler()
+        self._next_snapshot: Optional[datetime] = None
+        self.batch_size = batch_size
+        self._bulk_writer: Optional[BulkWriter] = None
+        if bulk_insert:
+            self._bulk_writer = BulkWriter(
+                self._state_attributes_ids, STATE_ATTRIBUTES_ID_CACHE_SIZE
+            )
         self.event_session = None
         self.get_session = None
+        self.get_read_session = None
         self._completed_database_setup = False
 
     @callback
     def async_initialize(self):
         """Initialize the recorder."""
-        self.hass.bus.async_listen(MATCH_ALL, self.event_listener)
+        self.hass.bus.async_listen(
+            MATCH_ALL, self.event_listener, event_filter=self._async_event_filter
+        )
+        # Time changed events drive commits, keepalives and snapshots,
+        # so the core timer has to keep ticking for them
+        self.hass.bus.async_listen_time_changed(
+            self.event_listener, self._time_resolution
+        )
+
+    @callback
+    def _async_event_filter(self, event):
+        """Filter events before they are queued for the recorder thread."""
+        if event.event_type in self.exclude_t or event.event_type == EVENT_TIME_CHANGED:
+            return False
+
+        entity_id = event.data.get(ATTR_ENTITY_ID)
+        if entity_id is not None:
+            return self.entity_filter(entity_id)
+
+        return True
 
     def do_adhoc_purge(self, **kwargs):
         """Trigger an adhoc purge retaining keep_days worth of data."""
@@ -350,41 +479,74 @@ class Recorder(threading.Thread):
 
         self.event_session = self.get_session()
         self.event_session.expire_on_commit = False
+        if self._bulk_writer is not None:
+            self._bulk_writer.setup(self.event_session)
+        # Snapshots are built from the states of this run, which only
+        # cover the intervals that start after the run started
+        self._next_snapshot = (
+            period_start(self.recording_start, snapshots.SNAPSHOT_INTERVAL)
+            + snapshots.SNAPSHOT_INTERVAL
+        )
         # Use a session for the event read loop
         # with a commit every time the event time
         # has changed. This reduces the disk io.
         while True:
+            if self._journal is not None and self.queue.empty():
+                self._replay_journal()
             event = self.queue.get()
             if event is None:
                 self._close_run()
                 self._close_connection()
+                self._close_journal()
                 return
             if isinstance(event, PurgeTask):
+                # Commit pending states first so attributes they use
+                # are not purged as unused
+                self._commit_event_session_or_retry()
                 # Schedule a new purge task if this one didn't finish
                 if not purge.purge_old_data(self, event.keep_days, event.repack):
                     self.queue.put(PurgeTask(event.keep_days, event.repack))
+                else:
+                    # Unused attributes are only deleted by the last chunk
+                    self._state_attributes_ids.clear()
+                continue
+            if isinstance(event, JournalTask):
                 continue
             if isinstance(event, WaitTask):
+                if self._journal is not None and self._journal.pending:
+                    # Only done once the journaled events are recorded
+                    self._replay_journal()
+                    self.queue.put(event)
+                    continue
                 self._queue_watch.set()
                 continue
+            self._last_time_fired = event.time_fired
             if event.event_type == EVENT_TIME_CHANGED:
-                self._keepalive_count += 1
+                if event.time_fired >= self._next_snapshot:
+                    self._write_snapshot(event.time_fired)
+                # Each tick stands for a period of the time resolution
+                self._keepalive_count += self._time_resolution
                 if self._keepalive_count >= KEEPALIVE_TIME:
                     self._keepalive_count = 0
                     self._send_keep_alive()
                 if self.commit_interval:
-                    self._timechanges_seen += 1
+                    self._timechanges_seen += self._time_resolution
                     if self._timechanges_seen >= self.commit_interval:
                         self._timechanges_seen = 0
                         self._commit_event_session_or_retry()
                 continue
-            if event.event_type in self.exclude_t:
-                continue
 
-            entity_id = event.data.get(ATTR_ENTITY_ID)
-            if entity_id is not None:
-                if not self.entity_filter(entity_id):
-                    continue
+            if event.event_type == EVENT_STATE_CHANGED:
+                self._compile_statistics(event)
+
+            if self._bulk_writer is not None:
+                self._add_to_bulk_writer(event)
+                if (
+                    not self.commit_interval
+                    or len(self._bulk_writer) >= self.batch_size
+                ):
+                    self._commit_event_session_or_retry()
+                continue
 
             try:
                 if event.event_type == EVENT_STATE_CHANGED:
@@ -402,6 +564,9 @@ class Recorder(threading.Thread):
             if dbevent and event.event_type == EVENT_STATE_CHANGED:
                 try:
                     dbstate = States.from_event(event)
+                    self._set_state_attributes(
+                        dbstate, StateAttributes.shared_attrs_from_event(event)
+                    )
                     has_new_state = event.data.get("new_state")
                     if dbstate.entity_id in self._old_states:
                         old_state = self._old_states.pop(dbstate.entity_id)
@@ -431,6 +596,92 @@ class Recorder(threading.Thread):
             if not self.commit_interval:
                 self._commit_event_session_or_retry()
 
+    def _write_snapshot(self, now):
+        """Store the last states at the start of the current interval."""
+        start = period_start(now, snapshots.SNAPSHOT_INTERVAL)
+        # The snapshot is built from the states in the database
+        self._commit_event_session_or_retry()
+        try:
+            with session_scope(session=self.get_session()) as session:
+                snapshots.write_snapshot(session, start, self.recording_start)
+        except Exception as err:  # pylint: disable=broad-except
+            # Must catch the exception to prevent the loop from collapsing
+            _LOGGER.exception("Error storing state snapshot: %s", err)
+        self._next_snapshot = start + snapshots.SNAPSHOT_INTERVAL
+
+    def _compile_statistics(self, event):
+        """Add a state change to the statistics of numeric sensors."""
+        try:
+            self._statistics.add_state(self.event_session, event)
+        except Exception as err:  # pylint: disable=broad-except
+            # Must catch the exception to prevent the loop from collapsing
+            _LOGGER.exception("Error compiling statistics: %s", err)
+
+    def _add_to_bulk_writer(self, event):
+        """Queue the rows of an event for the next bulk insert."""
+        try:
+            event_id = self._bulk_writer.add_event(event)
+        except (TypeError, ValueError):
+            _LOGGER.warning("Event is not JSON serializable: %s", event)
+            return
+        except Exception as err:  # pylint: disable=broad-except
+            # Must catch the exception to prevent the loop from collapsing
+            _LOGGER.exception("Error adding event: %s", err)
+            return
+
+        if event.event_type != EVENT_STATE_CHANGED:
+            return
+
+        try:
+            self._bulk_writer.add_state(self.event_session, event, event_id)
+        except (TypeError, ValueError):
+            _LOGGER.warning(
+                "State is not JSON serializable: %s",
+                event.data.get("new_state"),
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            # Must catch the exception to prevent the loop from collapsing
+            _LOGGER.exception("Error adding state change: %s", err)
+
+    def _set_state_attributes(self, dbstate, shared_attrs):
+        """Link a state to the row of its attributes, adding it if needed."""
+        attributes_id = self._state_attributes_ids.get(shared_attrs)
+        if attributes_id is not None:
+            self._state_attributes_ids.move_to_end(shared_attrs)
+            dbstate.attributes_id = attributes_id
+            return
+
+        pending = self._pending_state_attributes.get(shared_attrs)
+        if pending is not None:
+            dbstate.state_attributes = pending
+            return
+
+        attr_hash = StateAttributes.hash_shared_attrs(shared_attrs)
+        with self.event_session.no_autoflush:
+            row = (
+                self.event_session.query(StateAttributes.attributes_id)
+                .filter(
+                    (StateAttributes.hash == attr_hash)
+                    & (StateAttributes.shared_attrs == shared_attrs)
+                )
+                .first()
+            )
+
+        if row is not None:
+            self._cache_state_attributes_id(shared_attrs, row[0])
+            dbstate.attributes_id = row[0]
+            return
+
+        pending = StateAttributes(hash=attr_hash, shared_attrs=shared_attrs)
+        self._pending_state_attributes[shared_attrs] = pending
+        dbstate.state_attributes = pending
+
+    def _cache_state_attributes_id(self, shared_attrs, attributes_id):
+        """Remember the id of state attributes, forgetting the least used."""
+        self._state_attributes_ids[shared_attrs] = attributes_id
+        if len(self._state_attributes_ids) > STATE_ATTRIBUTES_ID_CACHE_SIZE:
+            self._state_attributes_ids.popitem(last=False)
+
     def _send_keep_alive(self):
         try:
             _LOGGER.debug("Sending keepalive")
@@ -473,6 +724,9 @@ class Recorder(threading.Thread):
             except Exception as err:  # pylint: disable=broad-except
                 # Must catch the exception to prevent the loop from collapsing
                 _LOGGER.exception("Error saving events: %s", err)
+                if self._bulk_writer is not None:
+                    # Drop the queued rows, they would fail every later commit
+                    self._reopen_event_session()
                 return
 
         _LOGGER.error(
@@ -482,6 +736,8 @@ class Recorder(threading.Thread):
         self._reopen_event_session()
 
     def _reopen_event_session(self):
+        self._pending_state_attributes = {}
+        self._statistics.reset()
         try:
             self.event_session.rollback()
         except Exception as err:  # pylint: disable=broad-except
@@ -497,6 +753,8 @@ class Recorder(threading.Thread):
         try:
             self.event_session = self.get_session()
             self.event_session.expire_on_commit = False
+            if self._bulk_writer is not None:
+                self._bulk_writer.reset(self.event_session)
         except Exception as err:  # pylint: disable=broad-except
             # Must catch the exception to prevent the loop from collapsing
             _LOGGER.exception("Error while creating new event session: %s", err)
@@ -505,6 +763,8 @@ class Recorder(threading.Thread):
         self._commits_without_expire += 1
 
         try:
+            if self._bulk_writer is not None:
+                self._bulk_writer.write(self.event_session)
             if self._pending_expunge:
                 self.event_session.flush()
                 for dbstate in self._pending_expunge:
@@ -517,8 +777,21 @@ class Recorder(threading.Thread):
         except Exception as err:
             _LOGGER.error("Error executing query: %s", err)
             self.event_session.rollback()
+            # The attributes were rolled back with the states using them
+            self._pending_state_attributes = {}
+            self._statistics.reset()
             raise
 
+        for shared_attrs, db_attributes in self._pending_state_attributes.items():
+            # Attributes of states that failed to be added are not stored
+            if db_attributes.attributes_id is not None:
+                self._cache_state_attributes_id(
+                    shared_attrs, db_attributes.attributes_id
+                )
+        self._pending_state_attributes = {}
+        if self._bulk_writer is not None:
+            self._bulk_writer.committed()
+
         # Expire is an expensive operation (frequently more expensive
         # than the flush and commit itself) so we only
         # do it after EXPIRE_AFTER_COMMITS commits
@@ -526,11 +799,138 @@ class Recorder(threading.Thread):
             self._commits_without_expire = 0
             self.event_session.expire_all()
 
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of events waiting to be recorded."""
+        depth = self.queue.qsize()
+        if self._journal is not None:
+            depth += self._journal.pending
+        return cast(int, depth)
+
+    @property
+    def journaled_events(self) -> int:
+        """Return the number of events waiting in the journal."""
+        if self._journal is None:
+            return 0
+        return self._journal.pending
+
+    @property
+    def lag(self) -> float:
+        """Return how many seconds recording is behind the events."""
+        if self._last_time_fired is None or not self.queue_depth:
+            return 0
+        return (dt_util.utcnow() - self._last_time_fired).total_seconds()
+
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
+        size = self.queue.qsize()
+        time_changed = event.event_type == EVENT_TIME_CHANGED
+        if self._journal is not None:
+            try:
+                # Time changed events are only journaled behind pending
+                # events so they are not recorded ahead of them
+                if self._journal.append(
+                    event, not time_changed and size >= self.max_queue_size
+                ):
+                    self._async_journaled(event, size)
+                    return
+            except (TypeError, ValueError):
+                _LOGGER.warning("Event is not JSON serializable: %s", event)
+                self._async_drop(size)
+                return
+
+        if time_changed:
+            # Always queued to keep commits going
+            self.queue.put(event)
+            return
+
+        if self._journal is None:
+            if size >= self.max_queue_size:
+                self._async_drop(size)
+                return
+            if size >= self._high_water_mark and not self._async_keep(event):
+                self._async_drop(size)
+                return
+
+        self._overflowing = False
         self.queue.put(event)
 
+    @callback
+    def _async_journaled(self, event, size):
+        """Write journaled events to disk and wake up the recorder."""
+        if self._journal.async_flush_needed():
+            self.hass.async_add_executor_job(self._journal.flush)
+
+        if event.event_type == EVENT_TIME_CHANGED:
+            # Replays the journal once the queue is empty
+            self.queue.put(JournalTask())
+            return
+
+        self._async_overflowing(size)
+
+    @callback
+    def _async_keep(self, event):
+        """Return if an event is recorded while the queue is filling up."""
+        if event.event_type in self.low_priority_event_types:
+            return False
+
+        if (
+            self.overflow_policy != OVERFLOW_SAMPLE
+            or event.event_type != EVENT_STATE_CHANGED
+        ):
+            return True
+
+        entity_id = event.data["entity_id"]
+        last_sampled = self._last_sampled.get(entity_id)
+        if (
+            last_sampled is not None
+            and (event.time_fired - last_sampled).total_seconds()
+            < self.sample_interval
+        ):
+            return False
+
+        self._last_sampled[entity_id] = event.time_fired
+        return True
+
+    @callback
+    def _async_drop(self, size):
+        """Drop an event that does not fit in the queue."""
+        self.dropped_events += 1
+        self._async_overflowing(size)
+
+    @callback
+    def _async_overflowing(self, size):
+        """Warn once when events no longer fit in the queue."""
+        if self._overflowing:
+            return
+        self._overflowing = True
+        _LOGGER.warning(
+            "The recorder queue holds %s events and is not keeping up, "
+            "using the %s overflow policy",
+            size,
+            self.overflow_policy,
+        )
+
+    def _replay_journal(self):
+        """Move journaled events to the queue."""
+        try:
+            events = self._journal.replay(JOURNAL_REPLAY_SIZE)
+        except OSError as err:
+            _LOGGER.error("Error reading the recorder journal: %s", err)
+            return
+        for event in events:
+            self.queue.put(event)
+
+    def _close_journal(self):
+        """Close the journal, keeping the pending events for the next run."""
+        if self._journal is None:
+            return
+        try:
+            self._journal.close()
+        except OSError as err:
+            _LOGGER.error("Error closing the recorder journal: %s", err)
+
     def block_till_done(self):
         """Block till all events processed.
 
@@ -597,8 +997,7 @@ class Recorder(threading.Thread):
                     self.db_url, self.db_integrity_check
                 )
 
-        if self.engine is not None:
-            self.engine.dispose()
+        self._dispose_engines()
 
         self.engine = create_engine(self.db_url, **kwargs)
 
@@ -607,11 +1006,59 @@ class Recorder(threading.Thread):
         Base.metadata.create_all(self.engine)
         self.get_session = scoped_session(sessionmaker(bind=self.engine))
 
+        self.read_engine = self._create_read_engine()
+        self.get_read_session = scoped_session(sessionmaker(bind=self.read_engine))
+
+    def _create_read_engine(self):
+        """Create the engine of the connections used by queries.
+
+        Queries get their own pool of connections, so they do not wait for
+        each other or the recorder. SQLite connections of the pool are read
+        only, in WAL mode they can read while the recorder writes.
+        """
+        if self.db_url == SQLITE_URL_PREFIX or ":memory:" in self.db_url:
+            # An in memory database only exists on its single connection
+            return self.engine
+
+        kwargs = {
+            "poolclass": QueuePool,
+            "pool_size": self.read_pool_size,
+            # Queries also run in the default executor, which has more
+            # threads than the database pool. Connections beyond the pool
+            # size are closed once returned.
+            "max_overflow": -1,
+        }
+        if self.db_url.startswith(SQLITE_URL_PREFIX):
+            kwargs["connect_args"] = {"check_same_thread": False}
+        read_engine = create_engine(self.db_url, **kwargs)
+
+        def setup_read_connection(dbapi_connection, connection_record):
+            """Dbapi specific read connection settings."""
+            cursor = dbapi_connection.cursor()
+            if self.db_url.startswith(SQLITE_URL_PREFIX):
+                cursor.execute("PRAGMA query_only = ON")
+            elif self.db_url.startswith("mysql"):
+                cursor.execute("SET session wait_timeout=28800")
+            cursor.close()
+
+        sqlalchemy_event.listen(read_engine, "connect", setup_read_connection)
+        instrument_query_timing(read_engine)
+        return read_engine
+
+    def _dispose_engines(self):
+        """Close the connections of the engines."""
+        if self.read_engine is not None and self.read_engine is not self.engine:
+            self.read_engine.dispose()
+        self.read_engine = None
+        if self.engine is not None:
+            self.engine.dispose()
+
     def _close_connection(self):
         """Close the connection."""
-        self.engine.dispose()
+        self._dispose_engines()
         self.engine = None
         self.get_session = None
+        self.get_read_session = None
 
     def _setup_run(self):
         """Log the start of the current run."""
@@ -0,0 +1,222 @@
+"""Write events and states with bulk inserts."""
+from collections import OrderedDict
+import logging
+from typing import Any, Dict, List, cast
+
+from sqlalchemy import func, text
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, split_entity_id
+
+from .models import Events, StateAttributes, States
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BulkWriter:
+    """Collect rows between commits and insert them with executemany.
+
+    Primary keys are assigned here, so a state can reference its event,
+    its attributes and the previous state of its entity before any of them
+    are written and without keeping ORM objects around. This requires the
+    recorder to be the only writer of the events, states and
+    state_attributes tables. On PostgreSQL the id sequences are advanced
+    after each write, so inserts that let the database assign ids keep
+    working.
+    """
+
+    def __init__(
+        self, state_attributes_ids: "OrderedDict[str, int]", cache_size: int
+    ) -> None:
+        """Initialize the bulk writer."""
+        self._state_attributes_ids = state_attributes_ids
+        self._cache_size = cache_size
+        self._event_rows: List[Dict[str, Any]] = []
+        self._state_rows: List[Dict[str, Any]] = []
+        self._attributes_rows: List[Dict[str, Any]] = []
+        self._pending_attributes_ids: Dict[str, int] = {}
+        self._old_state_ids: Dict[str, int] = {}
+        self._next_event_id = 0
+        self._next_state_id = 0
+        self._next_attributes_id = 0
+        self._postgresql = False
+
+    def __len__(self) -> int:
+        """Return the number of rows waiting to be written."""
+        return len(self._event_rows) + len(self._state_rows)
+
+    def setup(self, session: Any) -> None:
+        """Continue numbering after the rows in the database."""
+        self._postgresql = session.bind.dialect.name == "postgresql"
+        self._next_event_id = _max_id(session, Events.event_id) + 1
+        self._next_state_id = _max_id(session, States.state_id) + 1
+        self._next_attributes_id = _max_id(session, StateAttributes.attributes_id) + 1
+
+    def add_event(self, event: Event) -> int:
+        """Queue an event row and return its event_id."""
+        if event.event_type == EVENT_STATE_CHANGED:
+            # The data is stored with the state
+            event_data = "{}"
+        else:
+            event_data = event.data_as_json()
+
+        event_id = self._next_event_id
+        self._next_event_id += 1
+        self._event_rows.append(
+            {
+                "event_id": event_id,
+                "event_type": event.event_type,
+                "event_data": event_data,
+                "origin": str(event.origin.value),
+                "time_fired": event.time_fired,
+                "created": event.time_fired,
+                "context_id": event.context.id,
+                "context_user_id": event.context.user_id,
+                "context_parent_id": event.context.parent_id,
+            }
+        )
+        return event_id
+
+    def add_state(self, session: Any, event: Event, event_id: int) -> None:
+        """Queue the state row of a state_changed event."""
+        entity_id = event.data["entity_id"]
+        state = event.data.get("new_state")
+        attributes_id = self._attributes_id(
+            session, StateAttributes.shared_attrs_from_event(event)
+        )
+
+        state_id = self._next_state_id
+        self._next_state_id += 1
+
+        if state is None:
+            # State got deleted
+            row = {
+                "domain": split_entity_id(entity_id)[0],
+                "state": None,
+                "last_changed": event.time_fired,
+                "last_updated": event.time_fired,
+            }
+            old_state_id = self._old_state_ids.pop(entity_id, None)
+        else:
+            row = {
+                "domain": state.domain,
+                "state": state.state,
+                "last_changed": state.last_changed,
+                "last_updated": state.last_updated,
+            }
+            old_state_id = self._old_state_ids.get(entity_id)
+            self._old_state_ids[entity_id] = state_id
+
+        row.update(
+            {
+                "state_id": state_id,
+                "entity_id": entity_id,
+                "attributes": None,
+                "attributes_id": attributes_id,
+                "event_id": event_id,
+                "created": event.time_fired,
+                "old_state_id": old_state_id,
+            }
+        )
+        self._state_rows.append(row)
+
+    def _attributes_id(self, session: Any, shared_attrs: str) -> int:
+        """Return the id of the attributes, queueing a row for new ones."""
+        attributes_id = self._state_attributes_ids.get(shared_attrs)
+        if attributes_id is not None:
+            self._state_attributes_ids.move_to_end(shared_attrs)
+            return attributes_id
+
+        attributes_id = self._pending_attributes_ids.get(shared_attrs)
+        if attributes_id is not None:
+            return attributes_id
+
+        attr_hash = StateAttributes.hash_shared_attrs(shared_attrs)
+        row = (
+            session.query(StateAttributes.attributes_id)
+            .filter(
+                (StateAttributes.hash == attr_hash)
+                & (StateAttributes.shared_attrs == shared_attrs)
+            )
+            .first()
+        )
+        if row is not None:
+            self._cache_attributes_id(shared_attrs, row[0])
+            return cast(int, row[0])
+
+        attributes_id = self._next_attributes_id
+        self._next_attributes_id += 1
+        self._pending_attributes_ids[shared_attrs] = attributes_id
+        self._attributes_rows.append(
+            {
+                "attributes_id": attributes_id,
+                "hash": attr_hash,
+                "shared_attrs": shared_attrs,
+            }
+        )
+        return attributes_id
+
+    def write(self, session: Any) -> None:
+        """Insert the queued rows in the transaction of the session."""
+        if self._attributes_rows:
+            session.execute(StateAttributes.__table__.insert(), self._attributes_rows)
+        if self._event_rows:
+            session.execute(Events.__table__.insert(), self._event_rows)
+        if self._state_rows:
+            session.execute(States.__table__.insert(), self._state_rows)
+        if self._postgresql:
+            self._advance_sequences(session)
+
+    def _advance_sequences(self, session: Any) -> None:
+        """Advance the PostgreSQL id sequences past the assigned ids."""
+        for rows, column, next_id in (
+            (
+                self._attributes_rows,
+                StateAttributes.attributes_id,
+                self._next_attributes_id,
+            ),
+            (self._event_rows, Events.event_id, self._next_event_id),
+            (self._state_rows, States.state_id, self._next_state_id),
+        ):
+            if not rows:
+                continue
+            session.execute(
+                text("SELECT setval(pg_get_serial_sequence(:table, :column), :id)"),
+                {"table": column.table.name, "column": column.name, "id": next_id - 1},
+            )
+
+    def committed(self) -> None:
+        """Forget the rows once they are committed."""
+        _LOGGER.debug(
+            "Committed %s events, %s states and %s state attributes",
+            len(self._event_rows),
+            len(self._state_rows),
+            len(self._attributes_rows),
+        )
+        for shared_attrs, attributes_id in self._pending_attributes_ids.items():
+            self._cache_attributes_id(shared_attrs, attributes_id)
+        self._clear()
+
+    def _cache_attributes_id(self, shared_attrs: str, attributes_id: int) -> None:
+        """Remember the id of state attributes, forgetting the least used."""
+        self._state_attributes_ids[shared_attrs] = attributes_id
+        if len(self._state_attributes_ids) > self._cache_size:
+            self._state_attributes_ids.popitem(last=False)
+
+    def reset(self, session: Any) -> None:
+        """Drop the queued rows after they could not be written."""
+        self._clear()
+        self._old_state_ids.clear()
+        self.setup(session)
+
+    def _clear(self) -> None:
+        """Clear the queued rows."""
+        self._event_rows = []
+        self._state_rows = []
+        self._attributes_rows = []
+        self._pending_attributes_ids = {}
+
+
+def _max_id(session: Any, column: Any) -> int:
+    """Return the highest id in a column."""
+    return session.query(func.max(column)).scalar() or 0
@@ -0,0 +1,167 @@
+"""Append-only journal for events that do not fit in the recorder queue."""
+from collections import deque
+import json
+import logging
+import os
+import threading
+from typing import Any, Deque, Dict, List, Optional, TextIO
+
+from homeassistant.const import ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED
+from homeassistant.core import Context, Event, EventOrigin, State
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RecorderJournal:
+    """Spill events to disk while the recorder queue is full.
+
+    Events are appended as JSON lines and replayed in order once the
+    recorder has caught up. While the journal has pending events, new
+    events are appended as well so they are not recorded out of order.
+
+    Events are appended in the event loop, which only serializes them to
+    a buffer. The buffer is written to disk by flush, or before replaying,
+    in a worker thread.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the journal."""
+        self.path = path
+        # Only changed in the event loop
+        self._appended = 0
+        # Set in the event loop, cleared by flush
+        self._flush_scheduled = False
+        # Only changed while holding the lock
+        self._removed = 0
+        self._buffer: Deque[str] = deque()
+        self._lock = threading.Lock()
+        self._file: Optional[TextIO] = None
+        self._offset = 0
+
+    @property
+    def pending(self) -> int:
+        """Return the number of events waiting in the journal."""
+        return self._appended - self._removed
+
+    def load(self) -> None:
+        """Count the events left in the journal by a previous run."""
+        with self._lock:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, encoding="utf-8") as journal:
+                self._appended += sum(1 for _ in journal)
+            if self.pending:
+                _LOGGER.info("Replaying %s journaled events", self.pending)
+
+    def append(self, event: Event, force: bool) -> bool:
+        """Append an event if forced or events are pending in the journal.
+
+        Raises TypeError or ValueError if the event can not be serialized.
+        """
+        if not force and not self.pending:
+            return False
+        # Shares the serialization cached on the event
+        self._buffer.append(event.as_json())
+        self._appended += 1
+        return True
+
+    def async_flush_needed(self) -> bool:
+        """Return True if a flush has to be scheduled for appended events."""
+        if self._flush_scheduled or not self._buffer:
+            return False
+        self._flush_scheduled = True
+        return True
+
+    def flush(self) -> None:
+        """Write appended events to disk."""
+        self._flush_scheduled = False
+        with self._lock:
+            try:
+                self._write_buffer()
+            except OSError as err:
+                _LOGGER.error("Error writing to the recorder journal: %s", err)
+
+    def replay(self, limit: int) -> List[Event]:
+        """Return up to limit of the oldest pending events."""
+        events = []
+        with self._lock:
+            self._write_buffer()
+            if not self.pending:
+                return events
+            with open(self.path, encoding="utf-8") as journal:
+                journal.seek(self._offset)
+                while len(events) < limit:
+                    line = journal.readline()
+                    if not line:
+                        break
+                    self._removed += 1
+                    try:
+                        events.append(_event_from_dict(json.loads(line)))
+                    except (KeyError, TypeError, ValueError):
+                        _LOGGER.warning("Skipping invalid journal entry: %s", line)
+                self._offset = journal.tell()
+            if not line:
+                # The journal can only end up short if it was damaged
+                self._removed = self._appended - len(self._buffer)
+            if not self.pending:
+                self._truncate()
+        return events
+
+    def close(self) -> None:
+        """Close the journal, keeping pending events for the next run."""
+        with self._lock:
+            self._write_buffer()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._offset:
+                # Drop the replayed part of the journal
+                with open(self.path, encoding="utf-8") as journal:
+                    journal.seek(self._offset)
+                    lines = journal.readlines()
+                with open(self.path, "w", encoding="utf-8") as journal:
+                    journal.writelines(lines)
+                self._offset = 0
+
+    def _write_buffer(self) -> None:
+        """Write the buffered events to the journal file."""
+        if not self._buffer:
+            return
+        lines = []
+        while self._buffer:
+            lines.append(f"{self._buffer.popleft()}\n")
+        try:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.writelines(lines)
+            self._file.flush()
+        except OSError:
+            # The events are lost
+            self._removed += len(lines)
+            raise
+
+    def _truncate(self) -> None:
+        """Remove the journal once all events are replayed."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        os.remove(self.path)
+        self._offset = 0
+
+
+def _event_from_dict(data: Dict[str, Any]) -> Event:
+    """Restore an event from the journal."""
+    event_data = data["data"]
+    if data["event_type"] == EVENT_STATE_CHANGED:
+        event_data["new_state"] = State.from_dict(event_data.get("new_state"))
+        event_data["old_state"] = State.from_dict(event_data.get("old_state"))
+    elif data["event_type"] == EVENT_TIME_CHANGED:
+        event_data[ATTR_NOW] = dt_util.parse_datetime(event_data[ATTR_NOW])
+    return Event(
+        data["event_type"],
+        event_data,
+        EventOrigin(data["origin"]),
+        dt_util.parse_datetime(data["time_fired"]),
+        Context(**data["context"]),
+    )
@@ -277,6 +277,17 @@ def _apply_update(engine, new_version, old_version):
         _drop_index(engine, "states", "ix_states_entity_id")
         _create_index(engine, "events", "ix_events_event_type_time_fired")
         _drop_index(engine, "events", "ix_events_event_type")
+    elif new_version == 10:
+        # The state_attributes table is created with the other tables,
+        # existing states keep their attributes in the attributes column
+        _add_columns(engine, "states", ["attributes_id INTEGER"])
+        _create_index(engine, "states", "ix_states_attributes_id")
+    elif new_version == 11:
+        # The statistics table is created with the other tables
+        pass
+    elif new_version == 12:
+        # The state_snapshots table is created with the other tables
+        pass
     else:
         raise ValueError(f"No schema migration defined for version {new_version}")
 
@@ -1,11 +1,14 @@
 """Models for SQLAlchemy."""
+import hashlib
 import json
 import logging
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
@@ -18,14 +21,13 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.orm.session import Session
 
 from homeassistant.core import Context, Event, EventOrigin, State, split_entity_id
-from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
 
 # SQLAlchemy Schema
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 9
+SCHEMA_VERSION = 12
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,10 +35,23 @@ DB_TIMEZONE = "+00:00"
 
 TABLE_EVENTS = "events"
 TABLE_STATES = "states"
+TABLE_STATE_ATTRIBUTES = "state_attributes"
+TABLE_STATISTICS = "statistics"
+TABLE_STATE_SNAPSHOTS = "state_snapshots"
 TABLE_RECORDER_RUNS = "recorder_runs"
 TABLE_SCHEMA_CHANGES = "schema_changes"
 
-ALL_TABLES = [TABLE_EVENTS, TABLE_STATES, TABLE_RECORDER_RUNS, TABLE_SCHEMA_CHANGES]
+ALL_TABLES = [
+    TABLE_EVENTS,
+    TABLE_STATES,
+    TABLE_STATE_ATTRIBUTES,
+    TABLE_STATISTICS,
+    TABLE_STATE_SNAPSHOTS,
+    TABLE_RECORDER_RUNS,
+    TABLE_SCHEMA_CHANGES,
+]
+
+EMPTY_JSON_OBJECT = "{}"
 
 
 class Events(Base):  # type: ignore
@@ -64,7 +79,7 @@ class Events(Base):  # type: ignore
         """Create an event database object from a native event."""
         return Events(
             event_type=event.event_type,
-            event_data=event_data or json.dumps(event.data, cls=JSONEncoder),
+            event_data=event_data or event.data_as_json(),
             origin=str(event.origin.value),
             time_fired=event.time_fired,
             context_id=event.context.id,
@@ -101,7 +116,12 @@ class States(Base):  # type: ignore
     domain = Column(String(64))
     entity_id = Column(String(255))
     state = Column(String(255))
+    # Only set for rows written before schema version 10,
+    # newer rows store their attributes in state_attributes
     attributes = Column(Text)
+    attributes_id = Column(
+        Integer, ForeignKey("state_attributes.attributes_id"), index=True
+    )
     event_id = Column(Integer, ForeignKey("events.event_id"), index=True)
     last_changed = Column(DateTime(timezone=True), default=dt_util.utcnow)
     last_updated = Column(DateTime(timezone=True), default=dt_util.utcnow, index=True)
@@ -109,6 +129,7 @@ class States(Base):  # type: ignore
     old_state_id = Column(Integer, ForeignKey("states.state_id"))
     event = relationship("Events", uselist=False)
     old_state = relationship("States", remote_side=[state_id])
+    state_attributes = relationship("StateAttributes", lazy="joined")
 
     __table_args__ = (
         # Used for fetching the state of entities at a specific time
@@ -128,25 +149,32 @@ class States(Base):  # type: ignore
         if state is None:
             dbstate.state = ""
             dbstate.domain = split_entity_id(entity_id)[0]
-            dbstate.attributes = "{}"
             dbstate.last_changed = event.time_fired
             dbstate.last_updated = event.time_fired
         else:
             dbstate.domain = state.domain
             dbstate.state = state.state
-            dbstate.attributes = json.dumps(dict(state.attributes), cls=JSONEncoder)
             dbstate.last_changed = state.last_changed
             dbstate.last_updated = state.last_updated
 
         return dbstate
 
+    @property
+    def shared_attrs(self):
+        """Return the serialized attributes of the state."""
+        if self.attributes is not None:
+            return self.attributes
+        if self.state_attributes is not None:
+            return self.state_attributes.shared_attrs
+        return EMPTY_JSON_OBJECT
+
     def to_native(self, validate_entity_id=True):
         """Convert to an HA state object."""
         try:
             return State(
                 self.entity_id,
                 self.state,
-                json.loads(self.attributes),
+                json.loads(self.shared_attrs),
                 process_timestamp(self.last_changed),
                 process_timestamp(self.last_updated),
                 # Join the events table on event_id to get the context instead
@@ -160,6 +188,86 @@ class States(Base):  # type: ignore
             return None
 
 
+class StateAttributes(Base):  # type: ignore
+    """State attributes shared by all states that have them."""
+
+    __tablename__ = TABLE_STATE_ATTRIBUTES
+    attributes_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    shared_attrs = Column(Text)
+
+    @staticmethod
+    def shared_attrs_from_event(event):
+        """Return the serialized attributes of a state_changed event."""
+        state = event.data.get("new_state")
+        if state is None:
+            return EMPTY_JSON_OBJECT
+        return state.attributes_as_json()
+
+    @staticmethod
+    def hash_shared_attrs(shared_attrs):
+        """Return a hash of serialized attributes that fits a BigInteger."""
+        return int.from_bytes(
+            hashlib.blake2b(shared_attrs.encode("utf-8"), digest_size=8).digest(),
+            "big",
+            signed=True,
+        )
+
+
+class Statistics(Base):  # type: ignore
+    """Statistics of a numeric sensor over a period of time."""
+
+    __tablename__ = TABLE_STATISTICS
+    id = Column(Integer, primary_key=True)
+    entity_id = Column(String(255))
+    # Length of the period in seconds
+    period = Column(Integer)
+    start = Column(DateTime(timezone=True))
+    min = Column(Float)
+    max = Column(Float)
+    # Mean of the recorded values, not weighted by how long each was held
+    mean = Column(Float)
+    last = Column(Float)
+    count = Column(Integer)
+
+    __table_args__ = (
+        Index(
+            "ix_statistics_entity_id_period_start",
+            "entity_id",
+            "period",
+            "start",
+            unique=True,
+        ),
+    )
+
+    def add(self, value):
+        """Add a value to the statistics."""
+        if not self.count:
+            self.min = self.max = self.mean = value
+            self.count = 1
+        else:
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+            self.count += 1
+            self.mean += (value - self.mean) / self.count
+        self.last = value
+
+
+class StateSnapshots(Base):  # type: ignore
+    """The last state of an entity before the start of an interval."""
+
+    __tablename__ = TABLE_STATE_SNAPSHOTS
+    id = Column(Integer, primary_key=True)
+    start = Column(DateTime(timezone=True))
+    entity_id = Column(String(255))
+    # Not a foreign key, the state can be purged before its snapshot
+    state_id = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_state_snapshots_start_entity_id", "start", "entity_id"),
+    )
+
+
 class RecorderRuns(Base):  # type: ignore
     """Representation of recorder run."""
 
@@ -3,66 +3,108 @@ from datetime import timedelta
 import logging
 import time
 
+from sqlalchemy import and_, exists, func, or_
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
 import homeassistant.util.dt as dt_util
 
-from .models import Events, RecorderRuns, States
-from .util import execute, session_scope
+from .models import (
+    Events,
+    RecorderRuns,
+    StateAttributes,
+    States,
+    StateSnapshots,
+    Statistics,
+)
+from .statistics import PERIOD_5MINUTE
+from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+# At most this many of the oldest states and events are deleted at once,
+# so the recorder can go on recording in between
+MAX_ROWS_TO_PURGE = 1000
+
 
 def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
     """Purge events and states older than purge_days ago.
 
-    Cleans up an timeframe of an hour, based on the oldest record.
+    Cleans up a bounded number of the oldest states and events and returns
+    False while there are more left to purge.
     """
     purge_before = dt_util.utcnow() - timedelta(days=purge_days)
-    _LOGGER.debug("Purging states and events before target %s", purge_before)
+    _LOGGER.debug("Purging states and events before %s", purge_before)
 
     try:
         with session_scope(session=instance.get_session()) as session:
-            # Purge a max of 1 hour, based on the oldest states or events record
-            batch_purge_before = purge_before
-
-            query = session.query(States).order_by(States.last_updated.asc()).limit(1)
-            states = execute(query, to_native=True, validate_entity_ids=False)
-            if states:
-                batch_purge_before = min(
-                    batch_purge_before,
-                    states[0].last_updated + timedelta(hours=1),
-                )
-
-            query = session.query(Events).order_by(Events.time_fired.asc()).limit(1)
-            events = execute(query, to_native=True)
-            if events:
-                batch_purge_before = min(
-                    batch_purge_before,
-                    events[0].time_fired + timedelta(hours=1),
-                )
+            states_end = _oldest_rows_end(
+                session, States.last_updated, States.state_id, purge_before
+            )
+            _purge_rows(
+                session,
+                States,
+                States.last_updated,
+                States.state_id,
+                purge_before,
+                states_end,
+            )
+            events_end = _oldest_rows_end(
+                session, Events.time_fired, Events.event_id, purge_before
+            )
+            # States reference their events, so events of states that are
+            # not purged yet are kept for a later chunk
+            _purge_rows(
+                session,
+                Events,
+                Events.time_fired,
+                Events.event_id,
+                purge_before,
+                events_end,
+                ~exists().where(States.event_id == Events.event_id),
+            )
 
-            _LOGGER.debug("Purging states and events before %s", batch_purge_before)
+            if states_end is not None or events_end is not None:
+                _LOGGER.debug("Purging hasn't fully completed yet")
+                return False
 
+            # Attributes can be shared by states of any age, so only
+            # remove them once they are no longer used at all
             deleted_rows = (
-                session.query(States)
-                .filter(States.last_updated < batch_purge_before)
+                session.query(StateAttributes)
+                .filter(
+                    ~exists().where(
+                        States.attributes_id == StateAttributes.attributes_id
+                    )
+                )
                 .delete(synchronize_session=False)
             )
-            _LOGGER.debug("Deleted %s states", deleted_rows)
+            _LOGGER.debug("Deleted %s state attributes", deleted_rows)
 
+            # Hourly statistics are kept for the long term
             deleted_rows = (
-                session.query(Events)
-                .filter(Events.time_fired < batch_purge_before)
+                session.query(Statistics)
+                .filter(
+                    (Statistics.period == int(PERIOD_5MINUTE.total_seconds()))
+                    & (Statistics.start < purge_before)
+                )
                 .delete(synchronize_session=False)
             )
-            _LOGGER.debug("Deleted %s events", deleted_rows)
-
-            # If states or events purging isn't processing the purge_before yet,
-            # return false, as we are not done yet.
-            if batch_purge_before != purge_before:
-                _LOGGER.debug("Purging hasn't fully completed yet")
-                return False
+            _LOGGER.debug("Deleted %s 5-minute statistics", deleted_rows)
+
+            # Keep the latest snapshot before purge_before, lookups of the
+            # states right after purge_before start from it
+            snapshot_start = (
+                session.query(func.max(StateSnapshots.start))
+                .filter(StateSnapshots.start <= purge_before)
+                .scalar()
+            )
+            if snapshot_start is not None:
+                deleted_rows = (
+                    session.query(StateSnapshots)
+                    .filter(StateSnapshots.start < snapshot_start)
+                    .delete(synchronize_session=False)
+                )
+                _LOGGER.debug("Deleted %s state snapshots", deleted_rows)
 
             # Recorder runs is small, no need to batch run it
             deleted_rows = (
@@ -80,7 +122,9 @@ def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
             # Optimize mysql / mariadb tables to free up space on disk
             elif instance.engine.driver in ("mysqldb", "pymysql"):
                 _LOGGER.debug("Optimizing SQL DB to free space")
-                instance.engine.execute("OPTIMIZE TABLE states, events, recorder_runs")
+                instance.engine.execute(
+                    "OPTIMIZE TABLE states, state_attributes, events, recorder_runs"
+                )
 
     except OperationalError as err:
         # Retry when one of the following MySQL errors occurred:
@@ -100,3 +144,42 @@ def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
     except SQLAlchemyError as err:
         _LOGGER.warning("Error purging history: %s", err)
     return True
+
+
+def _oldest_rows_end(session, column, id_column, purge_before):
+    """Return the column and id of the MAX_ROWS_TO_PURGE-th oldest row.
+
+    Rows are ordered by id after column, as many rows can share a point
+    in time. Returns None if there are fewer rows to purge.
+    """
+    return (
+        session.query(column, id_column)
+        .filter(column < purge_before)
+        .order_by(column.asc(), id_column.asc())
+        .offset(MAX_ROWS_TO_PURGE - 1)
+        .limit(1)
+        .first()
+    )
+
+
+def _purge_rows(
+    session, table, column, id_column, purge_before, chunk_end, *filters
+) -> None:
+    """Delete the rows of a table up to chunk_end, or all before purge_before."""
+    if chunk_end is None:
+        chunk_filter = column < purge_before
+    else:
+        end, end_id = chunk_end
+        chunk_filter = or_(column < end, and_(column == end, id_column <= end_id))
+
+    deleted_rows = (
+        session.query(table)
+        .filter(chunk_filter, *filters)
+        .delete(synchronize_session=False)
+    )
+    _LOGGER.debug(
+        "Deleted %s %s up to %s",
+        deleted_rows,
+        table.__tablename__,
+        chunk_end or purge_before,
+    )
@@ -0,0 +1,68 @@
+"""Sensors reporting how well the recorder keeps up."""
+from datetime import timedelta
+
+from homeassistant.const import TIME_SECONDS
+from homeassistant.helpers.entity import Entity
+
+from .const import DATA_INSTANCE
+
+SCAN_INTERVAL = timedelta(seconds=10)
+
+UNIT_EVENTS = "events"
+
+# Recorder attribute, name, unit and icon of each sensor
+SENSOR_TYPES = (
+    ("queue_depth", "Recorder queue depth", UNIT_EVENTS, "mdi:tray-full"),
+    ("lag", "Recorder lag", TIME_SECONDS, "mdi:timer-sand"),
+    ("dropped_events", "Recorder dropped events", UNIT_EVENTS, "mdi:delete"),
+    ("journaled_events", "Recorder journaled events", UNIT_EVENTS, "mdi:file"),
+)
+
+
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
+    """Set up the recorder sensor platform."""
+    instance = hass.data[DATA_INSTANCE]
+    async_add_entities(
+        [RecorderSensor(instance, *sensor_type) for sensor_type in SENSOR_TYPES],
+        True,
+    )
+
+
+class RecorderSensor(Entity):
+    """Representation of a recorder sensor."""
+
+    def __init__(self, instance, attribute, name, unit, icon):
+        """Initialize the recorder sensor."""
+        self._instance = instance
+        self._attribute = attribute
+        self._name = name
+        self._unit = unit
+        self._icon = icon
+        self._state = None
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return self._name
+
+    @property
+    def icon(self):
+        """Icon to display in the front end."""
+        return self._icon
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement the value is expressed in."""
+        return self._unit
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return self._state
+
+    async def async_update(self):
+        """Update the state of the sensor."""
+        value = getattr(self._instance, self._attribute)
+        if isinstance(value, float):
+            value = round(value, 1)
+        self._state = value
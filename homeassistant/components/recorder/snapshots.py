@@ -0,0 +1,112 @@
+"""Snapshots of the last state of each entity at interval boundaries."""
+from datetime import datetime, timedelta
+import logging
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import and_, func, select, union_all
+
+from .models import States, StateSnapshots
+
+_LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_INTERVAL = timedelta(hours=1)
+
+
+def last_state_ids(
+    session: Any,
+    point_in_time: datetime,
+    entity_ids: Optional[Iterable[str]] = None,
+    since: Optional[datetime] = None,
+) -> Any:
+    """Return a query of the id of the last state of each entity before a time.
+
+    The last state is the one updated last, states updated at the same time
+    are ordered by state_id. The query starts from the latest snapshot
+    before point_in_time, so only the states recorded since that snapshot
+    have to be scanned. Without a snapshot all states before point_in_time
+    are scanned.
+
+    If since is given, like the start of a recorder run, states and
+    snapshots before it are not looked at.
+    """
+    snapshot_query = session.query(func.max(StateSnapshots.start)).filter(
+        StateSnapshots.start <= point_in_time
+    )
+    if since is not None:
+        snapshot_query = snapshot_query.filter(StateSnapshots.start >= since)
+    snapshot_start = snapshot_query.scalar()
+
+    states = select([States.entity_id, States.state_id, States.last_updated]).where(
+        States.last_updated < point_in_time
+    )
+    if entity_ids is not None:
+        states = states.where(States.entity_id.in_(entity_ids))
+    if since is not None:
+        states = states.where(States.last_updated >= since)
+
+    if snapshot_start is None:
+        candidates = states.alias("candidates")
+    else:
+        states = states.where(States.last_updated >= snapshot_start)
+        snapshot = (
+            select(
+                [StateSnapshots.entity_id, StateSnapshots.state_id, States.last_updated]
+            )
+            .select_from(
+                StateSnapshots.__table__.join(
+                    States, States.state_id == StateSnapshots.state_id
+                )
+            )
+            .where(StateSnapshots.start == snapshot_start)
+        )
+        if entity_ids is not None:
+            snapshot = snapshot.where(StateSnapshots.entity_id.in_(entity_ids))
+        candidates = union_all(states, snapshot).alias("candidates")
+
+    last_updated = (
+        session.query(
+            candidates.c.entity_id.label("entity_id"),
+            func.max(candidates.c.last_updated).label("max_last_updated"),
+        )
+        .group_by(candidates.c.entity_id)
+        .subquery()
+    )
+
+    return (
+        session.query(
+            candidates.c.entity_id.label("max_entity_id"),
+            func.max(candidates.c.state_id).label("max_state_id"),
+        )
+        .select_from(candidates)
+        .join(
+            last_updated,
+            and_(
+                candidates.c.entity_id == last_updated.c.entity_id,
+                candidates.c.last_updated == last_updated.c.max_last_updated,
+            ),
+        )
+        .group_by(candidates.c.entity_id)
+    )
+
+
+def write_snapshot(
+    session: Any, start: datetime, since: Optional[datetime] = None
+) -> None:
+    """Store the last state of each entity before start, unless already done.
+
+    The snapshot is built from the states since the given time, or the
+    previous snapshot after it.
+    """
+    if (
+        session.query(StateSnapshots.id).filter(StateSnapshots.start >= start).first()
+        is not None
+    ):
+        return
+
+    rows = [
+        {"start": start, "entity_id": entity_id, "state_id": state_id}
+        for entity_id, state_id in last_state_ids(session, start, since=since)
+    ]
+    if rows:
+        session.execute(StateSnapshots.__table__.insert(), rows)
+    _LOGGER.debug("Stored a snapshot of %s states at %s", len(rows), start)
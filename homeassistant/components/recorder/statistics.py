@@ -0,0 +1,97 @@
+"""Compile long-term statistics of numeric sensors."""
+from datetime import datetime, timedelta
+import math
+from typing import Any, Dict, Tuple
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+from homeassistant.core import Event
+import homeassistant.util.dt as dt_util
+
+from .models import Statistics
+
+SENSOR_DOMAIN = "sensor"
+
+PERIOD_5MINUTE = timedelta(minutes=5)
+PERIOD_HOUR = timedelta(hours=1)
+PERIODS = (PERIOD_5MINUTE, PERIOD_HOUR)
+
+
+def period_start(time: datetime, period: timedelta) -> datetime:
+    """Return the start of the period a point in time falls in."""
+    time = dt_util.as_utc(time)
+    seconds = period.total_seconds()
+    return dt_util.utc_from_timestamp(time.timestamp() // seconds * seconds)
+
+
+class StatisticsCompiler:
+    """Update the statistics of numeric sensors as their states arrive.
+
+    The statistics of the current period of each sensor are kept in the
+    event session and updated in place, so they are written with the
+    next commit.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the statistics compiler."""
+        self._current: Dict[Tuple[str, timedelta], Tuple[datetime, Statistics]] = {}
+
+    def add_state(self, session: Any, event: Event) -> None:
+        """Add the new state of a state_changed event to the statistics."""
+        state = event.data.get("new_state")
+        if (
+            state is None
+            or state.domain != SENSOR_DOMAIN
+            or ATTR_UNIT_OF_MEASUREMENT not in state.attributes
+        ):
+            return
+
+        try:
+            value = float(state.state)
+        except ValueError:
+            return
+        if not math.isfinite(value):
+            return
+
+        for period in PERIODS:
+            self._add_value(session, state.entity_id, period, state.last_updated, value)
+
+    def _add_value(
+        self,
+        session: Any,
+        entity_id: str,
+        period: timedelta,
+        time: datetime,
+        value: float,
+    ) -> None:
+        """Add a value to the statistics of the period it falls in."""
+        start = period_start(time, period)
+        current = self._current.get((entity_id, period))
+        if current is not None:
+            if start < current[0]:
+                # The period of a late state has already been written
+                return
+            if start == current[0]:
+                current[1].add(value)
+                return
+
+        seconds = int(period.total_seconds())
+        with session.no_autoflush:
+            # Continue statistics of a previous run
+            statistics = (
+                session.query(Statistics)
+                .filter(
+                    (Statistics.entity_id == entity_id)
+                    & (Statistics.period == seconds)
+                    & (Statistics.start == start)
+                )
+                .first()
+            )
+        if statistics is None:
+            statistics = Statistics(entity_id=entity_id, period=seconds, start=start)
+            session.add(statistics)
+        statistics.add(value)
+        self._current[(entity_id, period)] = (start, statistics)
+
+    def reset(self) -> None:
+        """Forget the current statistics after they were rolled back."""
+        self._current = {}
@@ -5,6 +5,7 @@ import logging
 import os
 import time
 
+from sqlalchemy import event as sqlalchemy_event
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
 import homeassistant.util.dt as dt_util
@@ -23,12 +24,21 @@ SQLITE3_POSTFIXES = ["", "-wal", "-shm"]
 # should do a check on the sqlite3 database.
 MAX_RESTART_TIME = timedelta(minutes=10)
 
+# Queries that take longer than this many seconds are logged
+SLOW_QUERY_TIME = 3
+
 
 @contextmanager
-def session_scope(*, hass=None, session=None):
-    """Provide a transactional scope around a series of operations."""
+def session_scope(*, hass=None, session=None, read_only=False):
+    """Provide a transactional scope around a series of operations.
+
+    With read_only the session uses the pool of connections for queries.
+    """
     if session is None and hass is not None:
-        session = hass.data[DATA_INSTANCE].get_session()
+        if read_only:
+            session = hass.data[DATA_INSTANCE].get_read_session()
+        else:
+            session = hass.data[DATA_INSTANCE].get_session()
 
     if session is None:
         raise RuntimeError("Session required")
@@ -48,6 +58,27 @@ def session_scope(*, hass=None, session=None):
         session.close()
 
 
+def instrument_query_timing(engine):
+    """Log how long the queries of an engine take."""
+
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        """Remember when the query started."""
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        """Log the duration of the query."""
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        if elapsed > SLOW_QUERY_TIME:
+            _LOGGER.warning("Query took %.1fs: %s", elapsed, statement)
+        elif _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Query took %fs: %s", elapsed, statement)
+
+    sqlalchemy_event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    sqlalchemy_event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
 def commit(session, work):
     """Commit & retry work: Either a model or in a function."""
     for _ in range(0, RETRIES):
@@ -325,7 +325,7 @@ class StatisticsSensor(Entity):
 
         _LOGGER.debug("%s: initializing values from the database", self.entity_id)
 
-        with session_scope(hass=self.hass) as session:
+        with session_scope(hass=self.hass, read_only=True) as session:
             query = session.query(States).filter(
                 States.entity_id == self._entity_id.lower()
             )
@@ -14,7 +14,11 @@ from homeassistant.exceptions import (
     Unauthorized,
 )
 from homeassistant.helpers import config_validation as cv, entity
-from homeassistant.helpers.event import TrackTemplate, async_track_template_result
+from homeassistant.helpers.event import (
+    TrackTemplate,
+    async_get_template_render_stats,
+    async_track_template_result,
+)
 from homeassistant.helpers.service import async_get_all_descriptions
 from homeassistant.helpers.template import Template
 from homeassistant.loader import IntegrationNotFound, async_get_integration
@@ -35,6 +39,7 @@ def async_register_commands(hass, async_reg):
     async_reg(hass, handle_get_config)
     async_reg(hass, handle_ping)
     async_reg(hass, handle_render_template)
+    async_reg(hass, handle_template_stats)
     async_reg(hass, handle_manifest_list)
     async_reg(hass, handle_manifest_get)
     async_reg(hass, handle_entity_source)
@@ -68,27 +73,26 @@ def handle_subscribe_events(hass, connection, msg):
     if event_type == EVENT_STATE_CHANGED:
 
         @callback
-        def forward_events(event):
-            """Forward state changed events to websocket."""
-            if not connection.user.permissions.check_entity(
+        def event_filter(event):
+            """Filter state changed events the user is allowed to read."""
+            return connection.user.permissions.check_entity(
                 event.data["entity_id"], POLICY_READ
-            ):
-                return
-
-            connection.send_message(messages.cached_event_message(msg["id"], event))
+            )
 
     else:
 
         @callback
-        def forward_events(event):
-            """Forward events to websocket."""
-            if event.event_type == EVENT_TIME_CHANGED:
-                return
+        def event_filter(event):
+            """Filter out time changed events."""
+            return event.event_type != EVENT_TIME_CHANGED
 
-            connection.send_message(messages.cached_event_message(msg["id"], event))
+    @callback
+    def forward_events(event):
+        """Forward events to websocket."""
+        connection.send_message(messages.cached_event_message(msg["id"], event))
 
     connection.subscriptions[msg["id"]] = hass.bus.async_listen(
-        event_type, forward_events
+        event_type, forward_events, event_filter=event_filter
     )
 
     connection.send_message(messages.result_message(msg["id"]))
@@ -302,6 +306,24 @@ async def handle_render_template(hass, connection, msg):
     hass.loop.call_soon_threadsafe(info.async_refresh)
 
 
+@callback
+@decorators.websocket_command({vol.Required("type"): "template/stats"})
+@decorators.require_admin
+def handle_template_stats(hass, connection, msg):
+    """Handle template stats command."""
+    connection.send_result(
+        msg["id"],
+        [
+            {"template": template, "renders": stats.renders, "time": stats.time}
+            for template, stats in sorted(
+                async_get_template_render_stats(hass).items(),
+                key=lambda item: item[1].time,
+                reverse=True,
+            )
+        ],
+    )
+
+
 @callback
 @decorators.websocket_command(
     {vol.Required("type"): "entity/source", vol.Optional("entity_id"): [cv.entity_id]}
@@ -28,6 +28,7 @@ from homeassistant.const import (
     CONF_CUSTOMIZE_DOMAIN,
     CONF_CUSTOMIZE_GLOB,
     CONF_ELEVATION,
+    CONF_EXECUTOR_POOLS,
     CONF_EXTERNAL_URL,
     CONF_ID,
     CONF_INTERNAL_URL,
@@ -193,6 +194,9 @@ CORE_CONFIG_SCHEMA = CUSTOMIZE_CONFIG_SCHEMA.extend(
             cv.ensure_list, [vol.IsDir()]  # pylint: disable=no-value-for-parameter
         ),
         vol.Optional(CONF_ALLOWLIST_EXTERNAL_URLS): vol.All(cv.ensure_list, [cv.url]),
+        vol.Optional(CONF_EXECUTOR_POOLS): {
+            cv.string: vol.All(vol.Coerce(int), vol.Range(min=1))
+        },
         vol.Optional(CONF_PACKAGES, default={}): PACKAGES_CONFIG_SCHEMA,
         vol.Optional(CONF_AUTH_PROVIDERS): vol.All(
             cv.ensure_list,
@@ -539,6 +543,15 @@ async def async_process_ha_core_config(hass: HomeAssistant, config: Dict) -> Non
             for url in config[CONF_ALLOWLIST_EXTERNAL_URLS]
         )
 
+    for name, max_workers in config.get(CONF_EXECUTOR_POOLS, {}).items():
+        try:
+            hass.executors.configure(name, max_workers)
+        except ValueError:
+            _LOGGER.warning(
+                "Executor pool %s is already running, restart to change its size",
+                name,
+            )
+
     # Customize
     cust_exact = dict(config[CONF_CUSTOMIZE])
     cust_domain = dict(config[CONF_CUSTOMIZE_DOMAIN])
@@ -5,10 +5,12 @@ Home Assistant is a Home Automation framework for observing the state
 of entities and react to changes.
 """
 import asyncio
+from collections import deque
 import datetime
 import enum
 import functools
 from ipaddress import ip_address
+import json
 import logging
 import os
 import pathlib
@@ -23,12 +25,14 @@ from typing import (
     Callable,
     Collection,
     Coroutine,
+    Deque,
     Dict,
     Iterable,
     List,
     Mapping,
     Optional,
     Set,
+    Tuple,
     TypeVar,
     Union,
     cast,
@@ -40,13 +44,17 @@ import yarl
 
 from homeassistant import block_async_io, loader, util
 from homeassistant.const import (
+    ATTR_AREA_ID,
+    ATTR_DEVICE_ID,
     ATTR_DOMAIN,
+    ATTR_ENTITY_ID,
     ATTR_FRIENDLY_NAME,
     ATTR_NOW,
     ATTR_SECONDS,
     ATTR_SERVICE,
     ATTR_SERVICE_DATA,
     CONF_UNIT_SYSTEM_IMPERIAL,
+    ENTITY_MATCH_ALL,
     EVENT_CALL_SERVICE,
     EVENT_CORE_CONFIG_UPDATE,
     EVENT_HOMEASSISTANT_CLOSE,
@@ -73,6 +81,9 @@ from homeassistant.exceptions import (
 from homeassistant.util import location, network
 from homeassistant.util.async_ import fire_coroutine_threadsafe, run_callback_threadsafe
 import homeassistant.util.dt as dt_util
+from homeassistant.util.executor import ExecutorPools
+from homeassistant.util.job_profiler import JobProfiler
+from homeassistant.util.json_encoder import JSONEncoder
 from homeassistant.util.thread import fix_threading_exception_logging
 from homeassistant.util.timeout import TimeoutManager
 from homeassistant.util.unit_system import IMPERIAL_SYSTEM, METRIC_SYSTEM, UnitSystem
@@ -103,6 +114,9 @@ DOMAIN = "homeassistant"
 # How long to wait to log tasks that are blocking
 BLOCK_LOG_TIMEOUT = 60
 
+# How many of the tasks that finished last are reported
+LAST_FINISHED_TASKS = 5
+
 # How long we wait for the result of a service call
 SERVICE_CALL_LIMIT = 10  # seconds
 
@@ -195,6 +209,15 @@ def _get_callable_job_type(target: Callable) -> HassJobType:
     return HassJobType.Executor
 
 
+def _profiled_job(profiler: JobProfiler, hassjob: HassJob) -> HassJob:
+    """Return a job that reports its run time to the profiler."""
+    if hassjob.job_type == HassJobType.Coroutinefunction:
+        return HassJob(profiler.wrap_coroutine_function(hassjob.target))
+    if hassjob.job_type == HassJobType.Callback:
+        return HassJob(callback(profiler.wrap_callback(hassjob.target)))
+    return HassJob(profiler.wrap_executor(hassjob.target))
+
+
 class CoreState(enum.Enum):
     """Represent the current state of Home Assistant."""
 
@@ -220,7 +243,12 @@ class HomeAssistant:
     def __init__(self) -> None:
         """Initialize new Home Assistant object."""
         self.loop = asyncio.get_running_loop()
-        self._pending_tasks: list = []
+        self._pending_tasks: Set[asyncio.Future] = set()
+        self._pending_drained: Optional[asyncio.Future] = None
+        self._finishing_tasks: Deque[asyncio.Future] = deque(
+            maxlen=LAST_FINISHED_TASKS
+        )
+        self._last_finished_tasks: List[str] = []
         self._track_task = True
         self.bus = EventBus(self)
         self.services = ServiceRegistry(self)
@@ -236,6 +264,10 @@ class HomeAssistant:
         self._stopped: Optional[asyncio.Event] = None
         # Timeout handler for Core/Helper namespace
         self.timeout: TimeoutManager = TimeoutManager()
+        # If not None, jobs are timed by the profiler
+        self.job_profiler: Optional[JobProfiler] = None
+        # Named executor pools next to the default executor
+        self.executors = ExecutorPools(self.loop)
 
     @property
     def is_running(self) -> bool:
@@ -379,7 +411,7 @@ class HomeAssistant:
 
         # If a task is scheduled
         if self._track_task:
-            self._pending_tasks.append(task)
+            self._async_track_pending(task)
 
         return task
 
@@ -394,7 +426,7 @@ class HomeAssistant:
         task: asyncio.tasks.Task = self.loop.create_task(target)
 
         if self._track_task:
-            self._pending_tasks.append(task)
+            self._async_track_pending(task)
 
         return task
 
@@ -407,10 +439,60 @@ class HomeAssistant:
 
         # If a task is scheduled
         if self._track_task:
-            self._pending_tasks.append(task)
+            self._async_track_pending(task)
 
         return task
 
+    @callback
+    def async_add_pool_executor_job(
+        self, pool: str, target: Callable[..., T], *args: Any
+    ) -> Awaitable[T]:
+        """Add an executor job to a named executor pool.
+
+        Pools named integration:<domain> limit how many jobs of a single
+        integration run at the same time.
+
+        This method must be run in the event loop.
+        """
+        task = self.executors.async_submit(pool, target, *args)
+
+        # If a task is scheduled
+        if self._track_task:
+            self._async_track_pending(task)
+
+        return task
+
+    @callback
+    def _async_track_pending(self, task: asyncio.Future) -> None:
+        """Track a task until it is done."""
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._async_pending_task_done)
+
+    @callback
+    def _async_pending_task_done(self, task: asyncio.Future) -> None:
+        """Stop tracking a task and wake up waiters when none are left."""
+        self._pending_tasks.discard(task)
+        drained = self._pending_drained
+        if drained is None or drained.done():
+            return
+
+        self._finishing_tasks.append(task)
+        if self._pending_tasks:
+            return
+
+        self._last_finished_tasks = [str(task) for task in self._finishing_tasks]
+        self._finishing_tasks.clear()
+        drained.set_result(None)
+
+    @callback
+    def async_last_finished_tasks(self) -> List[str]:
+        """Return the tracked tasks that were last to finish.
+
+        Filled in when the tracked tasks drain while waiting in
+        async_block_till_done.
+        """
+        return self._last_finished_tasks
+
     @callback
     def async_track_tasks(self) -> None:
         """Track tasks so you can wait for all tasks to be done."""
@@ -435,6 +517,43 @@ class HomeAssistant:
         else:
             self.async_add_hass_job(hassjob, *args)
 
+    @callback
+    def async_set_job_profiler(self, profiler: Optional[JobProfiler]) -> None:
+        """Time all jobs with a profiler, or stop timing them if None.
+
+        The profiled versions of async_add_hass_job and async_run_hass_job
+        are only installed while a profiler is set, so there is no
+        overhead when profiling is disabled.
+
+        This method must be run in the event loop.
+        """
+        self.job_profiler = profiler
+        if profiler is None:
+            self.__dict__.pop("async_add_hass_job", None)
+            self.__dict__.pop("async_run_hass_job", None)
+            return
+
+        self.async_add_hass_job = self._async_add_profiled_hass_job  # type: ignore
+        self.async_run_hass_job = self._async_run_profiled_hass_job  # type: ignore
+
+    @callback
+    def _async_add_profiled_hass_job(
+        self, hassjob: HassJob, *args: Any
+    ) -> Optional[asyncio.Future]:
+        """Add a HassJob that reports its run time to the job profiler."""
+        assert self.job_profiler is not None
+        return HomeAssistant.async_add_hass_job(
+            self, _profiled_job(self.job_profiler, hassjob), *args
+        )
+
+    @callback
+    def _async_run_profiled_hass_job(self, hassjob: HassJob, *args: Any) -> None:
+        """Run a HassJob that reports its run time to the job profiler."""
+        assert self.job_profiler is not None
+        HomeAssistant.async_run_hass_job(
+            self, _profiled_job(self.job_profiler, hassjob), *args
+        )
+
     @callback
     def async_run_job(
         self, target: Callable[..., Union[None, Awaitable]], *args: Any
@@ -462,40 +581,20 @@ class HomeAssistant:
         """Block until all pending work is done."""
         # To flush out any call_soon_threadsafe
         await asyncio.sleep(0)
-        start_time: Optional[float] = None
+        self._last_finished_tasks = []
+        wait_time = 0
 
         while self._pending_tasks:
-            pending = [task for task in self._pending_tasks if not task.done()]
-            self._pending_tasks.clear()
-            if pending:
-                await self._await_and_log_pending(pending)
-
-                if start_time is None:
-                    # Avoid calling monotonic() until we know
-                    # we may need to start logging blocked tasks.
-                    start_time = 0
-                elif start_time == 0:
-                    # If we have waited twice then we set the start
-                    # time
-                    start_time = monotonic()
-                elif monotonic() - start_time > BLOCK_LOG_TIMEOUT:
-                    # We have waited at least three loops and new tasks
-                    # continue to block. At this point we start
-                    # logging all waiting tasks.
-                    for task in pending:
-                        _LOGGER.debug("Waiting for task: %s", task)
-            else:
-                await asyncio.sleep(0)
+            drained = self._pending_drained
+            if drained is None or drained.done():
+                drained = self._pending_drained = self.loop.create_future()
+
+            await asyncio.wait([drained], timeout=BLOCK_LOG_TIMEOUT)
+            if drained.done():
+                continue
 
-    async def _await_and_log_pending(self, pending: Iterable[Awaitable[Any]]) -> None:
-        """Await and log tasks that take a long time."""
-        wait_time = 0
-        while pending:
-            _, pending = await asyncio.wait(pending, timeout=BLOCK_LOG_TIMEOUT)
-            if not pending:
-                return
             wait_time += BLOCK_LOG_TIMEOUT
-            for task in pending:
+            for task in list(self._pending_tasks):
                 _LOGGER.debug("Waited %s seconds for task: %s", wait_time, task)
 
     def stop(self) -> None:
@@ -559,6 +658,8 @@ class HomeAssistant:
                 "Timed out waiting for shutdown stage 3 to complete, the shutdown will continue"
             )
 
+        await self.executors.async_shutdown()
+
         # Python 3.9+ and backported in runner.py
         await self.loop.shutdown_default_executor()  # type: ignore
 
@@ -584,6 +685,35 @@ class Context:
         return {"id": self.id, "parent_id": self.parent_id, "user_id": self.user_id}
 
 
+class TimeResolution(enum.IntEnum):
+    """Represent how often a time changed listener wants to be called."""
+
+    second = 1
+    minute = 60
+    hour = 3600
+
+
+class _TimeResolutionFilter:
+    """Let one time changed event through per resolution period."""
+
+    __slots__ = ("resolution", "_period")
+
+    _hass_callback = True
+
+    def __init__(self, resolution: TimeResolution, now: datetime.datetime) -> None:
+        """Initialize the filter at the current period."""
+        self.resolution = resolution
+        self._period = int(now.timestamp()) // resolution
+
+    def __call__(self, event: "Event") -> bool:
+        """Return if the event starts a new period."""
+        period = int(event.data[ATTR_NOW].timestamp()) // self.resolution
+        if period == self._period:
+            return False
+        self._period = period
+        return True
+
+
 class EventOrigin(enum.Enum):
     """Represent the origin of an event."""
 
@@ -598,7 +728,16 @@ class EventOrigin(enum.Enum):
 class Event:
     """Representation of an event within the bus."""
 
-    __slots__ = ["event_type", "data", "origin", "time_fired", "context"]
+    __slots__ = [
+        "event_type",
+        "data",
+        "origin",
+        "time_fired",
+        "context",
+        "_as_dict",
+        "_as_json",
+        "_data_json",
+    ]
 
     def __init__(
         self,
@@ -614,6 +753,9 @@ class Event:
         self.origin = origin
         self.time_fired = time_fired or dt_util.utcnow()
         self.context: Context = context or Context()
+        self._as_dict: Optional[Dict[str, Any]] = None
+        self._as_json: Optional[str] = None
+        self._data_json: Optional[str] = None
 
     def __hash__(self) -> int:
         """Make hashable."""
@@ -623,15 +765,40 @@ class Event:
     def as_dict(self) -> Dict:
         """Create a dict representation of this Event.
 
+        The dict is cached and shared by all callers, it must not be changed.
+
         Async friendly.
         """
-        return {
-            "event_type": self.event_type,
-            "data": dict(self.data),
-            "origin": str(self.origin.value),
-            "time_fired": self.time_fired.isoformat(),
-            "context": self.context.as_dict(),
-        }
+        if self._as_dict is None:
+            self._as_dict = {
+                "event_type": self.event_type,
+                "data": dict(self.data),
+                "origin": str(self.origin.value),
+                "time_fired": self.time_fired.isoformat(),
+                "context": self.context.as_dict(),
+            }
+        return self._as_dict
+
+    def as_json(self) -> str:
+        """Return the JSON representation of this Event.
+
+        The result is cached so all consumers of the event share
+        a single serialization.
+
+        Async friendly.
+        """
+        if self._as_json is None:
+            self._as_json = json.dumps(self.as_dict(), cls=JSONEncoder)
+        return self._as_json
+
+    def data_as_json(self) -> str:
+        """Return the JSON representation of the event data.
+
+        Async friendly.
+        """
+        if self._data_json is None:
+            self._data_json = json.dumps(self.data, cls=JSONEncoder)
+        return self._data_json
 
     def __repr__(self) -> str:
         """Return the representation."""
@@ -658,8 +825,10 @@ class EventBus:
 
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
-        self._listeners: Dict[str, List[HassJob]] = {}
+        self._listeners: Dict[str, List[Tuple[HassJob, Optional[Callable]]]] = {}
         self._hass = hass
+        # Called when time changed listeners are added or removed
+        self._time_listeners_changed: List[CALLBACK_TYPE] = []
 
     @callback
     def async_listeners(self) -> Dict[str, int]:
@@ -706,15 +875,23 @@ class EventBus:
         if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
             listeners = match_all_listeners + listeners
 
+        # Nobody will see the event, don't bother creating it
+        if not listeners:
+            return
+
         event = Event(event_type, event_data, origin, time_fired, context)
 
         if event_type != EVENT_TIME_CHANGED:
             _LOGGER.debug("Bus:Handling %s", event)
 
-        if not listeners:
-            return
-
-        for job in listeners:
+        for job, event_filter in listeners:
+            if event_filter is not None:
+                try:
+                    if not event_filter(event):
+                        continue
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Error in event filter")
+                    continue
             self._hass.async_add_hass_job(job, event)
 
     def listen(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
@@ -734,23 +911,106 @@ class EventBus:
         return remove_listener
 
     @callback
-    def async_listen(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
+    def async_listen(
+        self,
+        event_type: str,
+        listener: Callable,
+        event_filter: Optional[Callable] = None,
+    ) -> CALLBACK_TYPE:
         """Listen for all events or events of a specific type.
 
         To listen to all events specify the constant ``MATCH_ALL``
-        as event_type.
+        as event_type. Listeners for all events do not keep the core timer
+        ticking, they only see time changed events while another listener
+        needs them. Use async_listen_time_changed to rely on them.
+
+        An optional event_filter, which must be a callable decorated with
+        @callback that returns a boolean value, determines if the
+        listener callable should run. The filter is evaluated inline
+        when the event is fired, before a job is scheduled.
+
+        This method must be run in the event loop.
+        """
+        if event_filter is not None and not is_callback(event_filter):
+            raise HomeAssistantError(f"Event filter {event_filter} is not a callback")
+        return self._async_listen_filterable_job(
+            event_type, (HassJob(listener), event_filter)
+        )
+
+    @callback
+    def async_listen_time_changed(
+        self,
+        listener: Callable,
+        resolution: TimeResolution = TimeResolution.second,
+    ) -> CALLBACK_TYPE:
+        """Listen for time changed events at a resolution.
+
+        The listener is called once per second, minute or hour. The core
+        timer only fires time changed events as often as the finest
+        resolution any listener asked for.
+
+        This method must be run in the event loop.
+        """
+        event_filter = None
+        if resolution != TimeResolution.second:
+            event_filter = _TimeResolutionFilter(resolution, dt_util.utcnow())
+        return self._async_listen_filterable_job(
+            EVENT_TIME_CHANGED, (HassJob(listener), event_filter)
+        )
+
+    @callback
+    def async_time_resolution(self) -> Optional[TimeResolution]:
+        """Return the finest resolution time changed listeners need.
+
+        Listeners without a declared resolution need every second. Returns
+        None if nobody listens for time changed events. Listeners for all
+        events do not count, they have to listen for time changed events
+        explicitly if they rely on them.
+
+        This method must be run in the event loop.
+        """
+        listeners = self._listeners.get(EVENT_TIME_CHANGED)
+        if not listeners:
+            return None
+        return min(
+            event_filter.resolution
+            if isinstance(event_filter, _TimeResolutionFilter)
+            else TimeResolution.second
+            for _, event_filter in listeners
+        )
+
+    @callback
+    def async_listen_time_listeners_changed(
+        self, action: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Call an action when time changed listeners are added or removed.
+
+        Used by the core timer to follow async_time_resolution.
 
         This method must be run in the event loop.
         """
-        return self._async_listen_job(event_type, HassJob(listener))
+        self._time_listeners_changed.append(action)
+
+        @callback
+        def remove_action() -> None:
+            """Stop calling the action."""
+            self._time_listeners_changed.remove(action)
+
+        return remove_action
 
     @callback
-    def _async_listen_job(self, event_type: str, hassjob: HassJob) -> CALLBACK_TYPE:
-        self._listeners.setdefault(event_type, []).append(hassjob)
+    def _async_listen_filterable_job(
+        self, event_type: str, filterable_job: Tuple[HassJob, Optional[Callable]]
+    ) -> CALLBACK_TYPE:
+        self._listeners.setdefault(event_type, []).append(filterable_job)
+
+        if event_type == EVENT_TIME_CHANGED:
+            for action in list(self._time_listeners_changed):
+                action()
 
         def remove_listener() -> None:
             """Remove the listener."""
-            self._async_remove_listener(event_type, hassjob)
+            self._async_remove_listener(event_type, filterable_job)
 
         return remove_listener
 
@@ -783,12 +1043,12 @@ class EventBus:
 
         This method must be run in the event loop.
         """
-        job: Optional[HassJob] = None
+        filterable_job: Optional[Tuple[HassJob, Optional[Callable]]] = None
 
         @callback
         def _onetime_listener(event: Event) -> None:
             """Remove listener from event bus and then fire listener."""
-            nonlocal job
+            nonlocal filterable_job
             if hasattr(_onetime_listener, "run"):
                 return
             # Set variable so that we will never run twice.
@@ -797,22 +1057,24 @@ class EventBus:
             # multiple times as well.
             # This will make sure the second time it does nothing.
             setattr(_onetime_listener, "run", True)
-            assert job is not None
-            self._async_remove_listener(event_type, job)
+            assert filterable_job is not None
+            self._async_remove_listener(event_type, filterable_job)
             self._hass.async_run_job(listener, event)
 
-        job = HassJob(_onetime_listener)
+        filterable_job = (HassJob(_onetime_listener), None)
 
-        return self._async_listen_job(event_type, job)
+        return self._async_listen_filterable_job(event_type, filterable_job)
 
     @callback
-    def _async_remove_listener(self, event_type: str, hassjob: HassJob) -> None:
+    def _async_remove_listener(
+        self, event_type: str, filterable_job: Tuple[HassJob, Optional[Callable]]
+    ) -> None:
         """Remove a listener of a specific event_type.
 
         This method must be run in the event loop.
         """
         try:
-            self._listeners[event_type].remove(hassjob)
+            self._listeners[event_type].remove(filterable_job)
 
             # delete event_type list if empty
             if not self._listeners[event_type]:
@@ -820,7 +1082,14 @@ class EventBus:
         except (KeyError, ValueError):
             # KeyError is key event_type listener did not exist
             # ValueError if listener did not exist within event_type
-            _LOGGER.exception("Unable to remove unknown job listener %s", hassjob)
+            _LOGGER.exception(
+                "Unable to remove unknown job listener %s", filterable_job
+            )
+            return
+
+        if event_type == EVENT_TIME_CHANGED:
+            for action in list(self._time_listeners_changed):
+                action()
 
 
 class State:
@@ -846,6 +1115,7 @@ class State:
         "domain",
         "object_id",
         "_as_dict",
+        "_attributes_json",
     ]
 
     def __init__(
@@ -881,6 +1151,7 @@ class State:
         self.context = context or Context()
         self.domain, self.object_id = split_entity_id(self.entity_id)
         self._as_dict: Optional[Dict[str, Collection[Any]]] = None
+        self._attributes_json: Optional[str] = None
 
     @property
     def name(self) -> str:
@@ -894,7 +1165,8 @@ class State:
 
         Async friendly.
 
-        To be used for JSON serialization.
+        To be used for JSON serialization. The dict is cached and shared by
+        all callers, it must not be changed.
         Ensures: state == State.from_dict(state.as_dict())
         """
         if not self._as_dict:
@@ -913,6 +1185,15 @@ class State:
             }
         return self._as_dict
 
+    def attributes_as_json(self) -> str:
+        """Return the JSON representation of the state attributes.
+
+        Async friendly.
+        """
+        if self._attributes_json is None:
+            self._attributes_json = json.dumps(dict(self.attributes), cls=JSONEncoder)
+        return self._attributes_json
+
     @classmethod
     def from_dict(cls, json_dict: Dict) -> Any:
         """Initialize a state from a dict.
@@ -973,7 +1254,9 @@ class StateMachine:
     def __init__(self, bus: EventBus, loop: asyncio.events.AbstractEventLoop) -> None:
         """Initialize state machine."""
         self._states: Dict[str, State] = {}
+        self._domain_index: Dict[str, Dict[str, State]] = {}
         self._reservations: Set[str] = set()
+        self._batch_listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
         self._bus = bus
         self._loop = loop
 
@@ -990,19 +1273,22 @@ class StateMachine:
     ) -> List[str]:
         """List of entity ids that are being tracked.
 
+        When filtering on several domains, the entity ids are grouped by
+        domain in the order of the filter.
+
         This method must be run in the event loop.
         """
         if domain_filter is None:
             return list(self._states)
 
         if isinstance(domain_filter, str):
-            domain_filter = (domain_filter.lower(),)
+            return list(self._domain_index.get(domain_filter.lower(), ()))
 
-        return [
-            state.entity_id
-            for state in self._states.values()
-            if state.domain in domain_filter
-        ]
+        entity_ids: List[str] = []
+        for domain in dict.fromkeys(domain_filter):
+            if domain in self._domain_index:
+                entity_ids.extend(self._domain_index[domain])
+        return entity_ids
 
     @callback
     def async_entity_ids_count(
@@ -1016,10 +1302,12 @@ class StateMachine:
             return len(self._states)
 
         if isinstance(domain_filter, str):
-            domain_filter = (domain_filter.lower(),)
+            return len(self._domain_index.get(domain_filter.lower(), ()))
 
-        return len(
-            [None for state in self._states.values() if state.domain in domain_filter]
+        return sum(
+            len(self._domain_index[domain])
+            for domain in set(domain_filter)
+            if domain in self._domain_index
         )
 
     def all(self, domain_filter: Optional[Union[str, Iterable]] = None) -> List[State]:
@@ -1034,17 +1322,23 @@ class StateMachine:
     ) -> List[State]:
         """Create a list of all states matching the filter.
 
+        When filtering on several domains, the states are grouped by
+        domain in the order of the filter.
+
         This method must be run in the event loop.
         """
         if domain_filter is None:
             return list(self._states.values())
 
         if isinstance(domain_filter, str):
-            domain_filter = (domain_filter.lower(),)
+            domain_states = self._domain_index.get(domain_filter.lower())
+            return [] if domain_states is None else list(domain_states.values())
 
-        return [
-            state for state in self._states.values() if state.domain in domain_filter
-        ]
+        states: List[State] = []
+        for domain in dict.fromkeys(domain_filter):
+            if domain in self._domain_index:
+                states.extend(self._domain_index[domain].values())
+        return states
 
     def get(self, entity_id: str) -> Optional[State]:
         """Retrieve state of entity_id or None if not found.
@@ -1087,12 +1381,19 @@ class StateMachine:
         if old_state is None:
             return False
 
+        domain_states = self._domain_index[old_state.domain]
+        del domain_states[entity_id]
+        if not domain_states:
+            del self._domain_index[old_state.domain]
+
+        change = {"entity_id": entity_id, "old_state": old_state, "new_state": None}
         self._bus.async_fire(
             EVENT_STATE_CHANGED,
-            {"entity_id": entity_id, "old_state": old_state, "new_state": None},
+            change,
             EventOrigin.local,
             context=context,
         )
+        self._async_notify_batch_listeners([change])
         return True
 
     def set(
@@ -1161,6 +1462,66 @@ class StateMachine:
 
         This method must be run in the event loop.
         """
+        now = dt_util.utcnow()
+        change = self._async_apply_state(
+            now, entity_id, new_state, attributes, force_update, context
+        )
+        if change is None:
+            return
+
+        self._bus.async_fire(
+            EVENT_STATE_CHANGED,
+            change,
+            EventOrigin.local,
+            change["new_state"].context,
+            time_fired=now,
+        )
+        self._async_notify_batch_listeners([change])
+
+    @callback
+    def async_set_many(self, updates: Iterable[Tuple]) -> None:
+        """Set the state of multiple entities in one pass.
+
+        Each update is a tuple of the arguments accepted by async_set:
+        (entity_id, new_state[, attributes[, force_update[, context]]]).
+
+        All states are applied first, then the state_changed events are
+        fired and batch listeners are called once with the list of changes.
+
+        This method must be run in the event loop.
+        """
+        now = dt_util.utcnow()
+        changes = []
+        for update in updates:
+            change = self._async_apply_state(now, *update)
+            if change is not None:
+                changes.append(change)
+
+        if not changes:
+            return
+
+        async_fire = self._bus.async_fire
+        for change in changes:
+            async_fire(
+                EVENT_STATE_CHANGED,
+                change,
+                EventOrigin.local,
+                change["new_state"].context,
+                time_fired=now,
+            )
+        self._async_notify_batch_listeners(changes)
+
+    @callback
+    def _async_apply_state(
+        self,
+        now: datetime.datetime,
+        entity_id: str,
+        new_state: str,
+        attributes: Optional[Dict] = None,
+        force_update: bool = False,
+        context: Optional[Context] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Store a new state and return the change, or None if unchanged."""
         entity_id = entity_id.lower()
         new_state = str(new_state)
         attributes = attributes or {}
@@ -1175,13 +1536,11 @@ class StateMachine:
             last_changed = old_state.last_changed if same_state else None
 
         if same_state and same_attr:
-            return
+            return None
 
         if context is None:
             context = Context()
 
-        now = dt_util.utcnow()
-
         state = State(
             entity_id,
             new_state,
@@ -1192,13 +1551,41 @@ class StateMachine:
             old_state is None,
         )
         self._states[entity_id] = state
-        self._bus.async_fire(
-            EVENT_STATE_CHANGED,
-            {"entity_id": entity_id, "old_state": old_state, "new_state": state},
-            EventOrigin.local,
-            context,
-            time_fired=now,
-        )
+        self._domain_index.setdefault(state.domain, {})[entity_id] = state
+        return {"entity_id": entity_id, "old_state": old_state, "new_state": state}
+
+    @callback
+    def async_listen_batch(
+        self, listener: Callable[[List[Dict[str, Any]]], None]
+    ) -> CALLBACK_TYPE:
+        """Listen for state changes in batch mode.
+
+        The listener must be decorated with @callback and is called with
+        a list of changes, each being the data of a state_changed event.
+        Changes made by async_set_many are delivered in a single call.
+
+        This method must be run in the event loop.
+        """
+        if not is_callback(listener):
+            raise HomeAssistantError(f"Batch listener {listener} is not a callback")
+
+        self._batch_listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the batch listener."""
+            self._batch_listeners.remove(listener)
+
+        return remove_listener
+
+    @callback
+    def _async_notify_batch_listeners(self, changes: List[Dict[str, Any]]) -> None:
+        """Call the batch listeners with a list of changes."""
+        for listener in self._batch_listeners[:]:
+            try:
+                listener(changes)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error in batch state listener %s", listener)
 
 
 class Service:
@@ -1220,7 +1607,7 @@ class Service:
 class ServiceCall:
     """Representation of a call to a service."""
 
-    __slots__ = ["domain", "service", "data", "context"]
+    __slots__ = ["domain", "service", "data", "context", "target_results"]
 
     def __init__(
         self,
@@ -1234,6 +1621,8 @@ class ServiceCall:
         self.service = service.lower()
         self.data = MappingProxyType(data or {})
         self.context = context or Context()
+        # Filled by entity services with the result of each entity when set
+        self.target_results: Optional[Dict[str, Union[bool, BaseException]]] = None
 
     def __repr__(self) -> str:
         """Return the representation of the service."""
@@ -1395,36 +1784,10 @@ class ServiceRegistry:
         context = context or Context()
         service_data = service_data or {}
 
-        try:
-            handler = self._services[domain][service]
-        except KeyError:
-            raise ServiceNotFound(domain, service) from None
-
-        if handler.schema:
-            try:
-                processed_data = handler.schema(service_data)
-            except vol.Invalid:
-                _LOGGER.debug(
-                    "Invalid data for service call %s.%s: %s",
-                    domain,
-                    service,
-                    service_data,
-                )
-                raise
-        else:
-            processed_data = service_data
-
-        service_call = ServiceCall(domain, service, processed_data, context)
-
-        self._hass.bus.async_fire(
-            EVENT_CALL_SERVICE,
-            {
-                ATTR_DOMAIN: domain.lower(),
-                ATTR_SERVICE: service.lower(),
-                ATTR_SERVICE_DATA: service_data,
-            },
-            context=context,
+        handler, service_call = self._async_validate_call(
+            domain, service, service_data, context
         )
+        self._async_fire_call_event(domain, service, service_data, context)
 
         coro = self._execute_service(handler, service_call)
         if not blocking:
@@ -1457,6 +1820,192 @@ class ServiceRegistry:
         _LOGGER.debug("Service did not complete before timeout: %s", service_call)
         return False
 
+    async def async_call_many(
+        self,
+        calls: Iterable[Tuple[str, str, Optional[Dict]]],
+        context: Optional[Context] = None,
+        limit: Optional[float] = SERVICE_CALL_LIMIT,
+    ) -> List[Dict[str, Union[bool, BaseException]]]:
+        """Call many services and wait for them to finish.
+
+        Calls of the same service whose data only differs in the targeted
+        entity_id are merged into a single call of all their entities, so
+        the data is validated and the service handler runs only once. If
+        the schema of the service rejects the merged call, for example
+        because it only accepts a single entity_id, the calls run one by
+        one instead. Each call is still announced with its own data on the
+        event bus. The calls run concurrently and are waited for up to
+        limit seconds in total.
+
+        Returns the results per target of each call, in the order of the
+        calls: a dict of each targeted entity id to True if the entity
+        completed the call, False if it did not complete within limit, or
+        the exception it raised. Calls that do not target entity ids have
+        a single result for ENTITY_MATCH_ALL. Entities the service does not
+        report on, like those of services that are not entity services,
+        get the result of the whole call.
+
+        This method is a coroutine.
+        """
+        call_context = context or Context()
+        # The original data of each call and the entity ids it targets
+        call_data: List[Tuple[str, str, Dict, List[str]]] = []
+        groups: Dict[Any, Tuple[str, str, Dict, List[int]]] = {}
+
+        for index, (domain, service, service_data) in enumerate(calls):
+            domain = domain.lower()
+            service = service.lower()
+            service_data = service_data or {}
+            key = _call_group_key(domain, service, service_data)
+            if key is None:
+                key = index
+                targets = [ENTITY_MATCH_ALL]
+            else:
+                targets = _entity_id_list(service_data)
+            call_data.append((domain, service, service_data, targets))
+
+            group = groups.get(key)
+            if group is None:
+                groups[key] = (domain, service, service_data, [index])
+                continue
+
+            group_data = group[2]
+            if len(group[3]) == 1:
+                group_data = dict(group_data)
+                group_data[ATTR_ENTITY_ID] = _entity_id_list(group_data)
+                groups[key] = (domain, service, group_data, group[3])
+            group_data[ATTR_ENTITY_ID].extend(_entity_id_list(service_data))
+            group[3].append(index)
+
+        results: List[Dict[str, Union[bool, BaseException]]] = [{} for _ in call_data]
+
+        def set_results(
+            indexes: List[int],
+            result: Union[bool, BaseException],
+            target_results: Optional[Dict[str, Union[bool, BaseException]]] = None,
+        ) -> None:
+            """Set the results of the targets of calls."""
+            for index in indexes:
+                for target in call_data[index][3]:
+                    if target_results is not None and target in target_results:
+                        results[index][target] = target_results[target]
+                    else:
+                        results[index][target] = result
+
+        tasks: Dict[asyncio.Task, Tuple[ServiceCall, List[int]]] = {}
+
+        def start_call(
+            domain: str, service: str, service_data: Dict, indexes: List[int]
+        ) -> None:
+            """Validate a call, announce it and start running it."""
+            handler, service_call = self._async_validate_call(
+                domain, service, service_data, call_context
+            )
+
+            for index in indexes:
+                self._async_fire_call_event(
+                    domain, service, call_data[index][2], call_context
+                )
+
+            service_call.target_results = {}
+            task = self._hass.async_create_task(
+                self._execute_service(handler, service_call)
+            )
+            tasks[task] = (service_call, indexes)
+
+        for domain, service, service_data, indexes in groups.values():
+            if len(indexes) > 1:
+                service_data[ATTR_ENTITY_ID] = list(
+                    dict.fromkeys(service_data[ATTR_ENTITY_ID])
+                )
+            try:
+                start_call(domain, service, service_data, indexes)
+            except ServiceNotFound as err:
+                set_results(indexes, err)
+            except vol.Invalid as err:
+                if len(indexes) == 1:
+                    set_results(indexes, err)
+                    continue
+
+                # The schema may only accept a single entity_id
+                for index in indexes:
+                    try:
+                        start_call(domain, service, call_data[index][2], [index])
+                    except vol.Invalid as call_err:
+                        set_results([index], call_err)
+
+        if not tasks:
+            return results
+
+        try:
+            await asyncio.wait(set(tasks), timeout=limit)
+        except asyncio.CancelledError:
+            _LOGGER.debug("Service calls were cancelled")
+            for task in tasks:
+                task.cancel()
+            await asyncio.wait(set(tasks), timeout=SERVICE_CALL_LIMIT)
+            raise
+
+        for task, (service_call, indexes) in tasks.items():
+            result: Union[bool, BaseException]
+            if not task.done():
+                # Let it keep running in background.
+                self._run_service_in_background(task, service_call)
+                _LOGGER.debug(
+                    "Service did not complete before timeout: %s", service_call
+                )
+                result = False
+            elif task.cancelled():
+                result = asyncio.CancelledError()
+            else:
+                result = task.exception() or True
+
+            # Entities of a call that timed out can still report later on
+            set_results(indexes, result, dict(service_call.target_results or {}))
+
+        return results
+
+    @callback
+    def _async_validate_call(
+        self, domain: str, service: str, service_data: Dict, context: Context
+    ) -> Tuple[Service, ServiceCall]:
+        """Look up the handler of a service call and validate its data."""
+        try:
+            handler = self._services[domain][service]
+        except KeyError:
+            raise ServiceNotFound(domain, service) from None
+
+        if handler.schema:
+            try:
+                processed_data = handler.schema(service_data)
+            except vol.Invalid:
+                _LOGGER.debug(
+                    "Invalid data for service call %s.%s: %s",
+                    domain,
+                    service,
+                    service_data,
+                )
+                raise
+        else:
+            processed_data = service_data
+
+        return handler, ServiceCall(domain, service, processed_data, context)
+
+    @callback
+    def _async_fire_call_event(
+        self, domain: str, service: str, service_data: Dict, context: Context
+    ) -> None:
+        """Announce a service call on the event bus."""
+        self._hass.bus.async_fire(
+            EVENT_CALL_SERVICE,
+            {
+                ATTR_DOMAIN: domain,
+                ATTR_SERVICE: service,
+                ATTR_SERVICE_DATA: service_data,
+            },
+            context=context,
+        )
+
     def _run_service_in_background(
         self, coro_or_task: Union[Coroutine, asyncio.Task], service_call: ServiceCall
     ) -> None:
@@ -1490,6 +2039,40 @@ class ServiceRegistry:
             await self._hass.async_add_executor_job(handler.job.target, service_call)
 
 
+def _entity_id_list(service_data: Dict) -> List[str]:
+    """Return the entity ids targeted by service data as a list."""
+    entity_ids = service_data[ATTR_ENTITY_ID]
+    if isinstance(entity_ids, str):
+        return [entity_id.strip() for entity_id in entity_ids.split(",")]
+    return list(entity_ids)
+
+
+def _call_group_key(domain: str, service: str, service_data: Dict) -> Optional[Tuple]:
+    """Return a key shared by calls that can be merged into one call.
+
+    Only calls that target entities by entity_id can be merged.
+    """
+    entity_ids = service_data.get(ATTR_ENTITY_ID)
+    if (
+        not isinstance(entity_ids, (str, list))
+        or entity_ids == ENTITY_MATCH_ALL
+        or ATTR_AREA_ID in service_data
+        or ATTR_DEVICE_ID in service_data
+    ):
+        return None
+
+    try:
+        shape = json.dumps(
+            {key: val for key, val in service_data.items() if key != ATTR_ENTITY_ID},
+            sort_keys=True,
+            cls=JSONEncoder,
+        )
+    except (TypeError, ValueError):
+        return None
+
+    return (domain, service, shape)
+
+
 class Config:
     """Configuration settings for Home Assistant."""
 
@@ -1745,21 +2328,37 @@ class Config:
 
 
 def _async_create_timer(hass: HomeAssistant) -> None:
-    """Create a timer that will start on HOMEASSISTANT_START."""
+    """Create a timer that will start on HOMEASSISTANT_START.
+
+    The timer only wakes up as often as the time changed listeners need,
+    and not at all while nobody listens.
+    """
     handle = None
+    resolution: Optional[TimeResolution] = None
     timer_context = Context()
 
     def schedule_tick(now: datetime.datetime) -> None:
-        """Schedule a timer tick when the next second rolls around."""
-        nonlocal handle
+        """Schedule a timer tick when the next period rolls around."""
+        nonlocal handle, resolution
 
-        slp_seconds = 1 - (now.microsecond / 10 ** 6)
+        if handle is not None:
+            handle.cancel()
+            handle = None
+
+        resolution = hass.bus.async_time_resolution()
+        if resolution is None:
+            return
+
+        elapsed = (now.minute * 60 + now.second) % resolution
+        slp_seconds = resolution - elapsed - (now.microsecond / 10 ** 6)
         target = monotonic() + slp_seconds
         handle = hass.loop.call_later(slp_seconds, fire_time_event, target)
 
     @callback
     def fire_time_event(target: float) -> None:
         """Fire next time event."""
+        nonlocal handle
+        handle = None
         now = dt_util.utcnow()
 
         hass.bus.async_fire(
@@ -1778,9 +2377,20 @@ def _async_create_timer(hass: HomeAssistant) -> None:
 
         schedule_tick(now)
 
+    @callback
+    def time_listeners_changed() -> None:
+        """Reschedule the timer if listeners need another resolution."""
+        if hass.bus.async_time_resolution() != resolution:
+            schedule_tick(dt_util.utcnow())
+
+    remove_listener = hass.bus.async_listen_time_listeners_changed(
+        time_listeners_changed
+    )
+
     @callback
     def stop_timer(_: Event) -> None:
         """Stop the timer."""
+        remove_listener()
         if handle is not None:
             handle.cancel()
 
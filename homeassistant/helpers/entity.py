@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 import functools as ft
 import logging
 from timeit import default_timer as timer
-from typing import Any, Awaitable, Dict, Iterable, List, Optional
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Tuple
 
 from homeassistant.config import DATA_CUSTOMIZE
 from homeassistant.const import (
@@ -32,6 +32,7 @@ from homeassistant.helpers.event import Event, async_track_entity_registry_updat
 from homeassistant.helpers.typing import StateType
 from homeassistant.loader import bind_hass
 from homeassistant.util import dt as dt_util, ensure_unique_string, slugify
+from homeassistant.util.executor import INTEGRATION_POOL_PREFIX
 
 _LOGGER = logging.getLogger(__name__)
 SLOW_UPDATE_WARNING = 10
@@ -298,6 +299,22 @@ class Entity(ABC):
     @callback
     def _async_write_ha_state(self) -> None:
         """Write the state to the state machine."""
+        calculated_state = self._async_calculate_state()
+        if calculated_state is None:
+            return
+
+        assert self.hass is not None
+        state, attr = calculated_state
+        self.hass.states.async_set(
+            self.entity_id, state, attr, self.force_update, self._context
+        )
+
+    @callback
+    def _async_calculate_state(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Calculate the state and attributes to write to the state machine.
+
+        Returns None if the state should not be written.
+        """
         if self.registry_entry and self.registry_entry.disabled_by:
             if not self._disabled_reported:
                 self._disabled_reported = True
@@ -307,7 +324,7 @@ class Entity(ABC):
                     self.entity_id,
                     self.platform.platform_name,
                 )
-            return
+            return None
 
         start = timer()
 
@@ -405,9 +422,7 @@ class Entity(ABC):
             self._context = None
             self._context_set = None
 
-        self.hass.states.async_set(
-            self.entity_id, state, attr, self.force_update, self._context
-        )
+        return state, attr
 
     def schedule_update_ha_state(self, force_refresh: bool = False) -> None:
         """Schedule an update ha state change task.
@@ -457,6 +472,12 @@ class Entity(ABC):
             # pylint: disable=no-member
             if hasattr(self, "async_update"):
                 task = self.hass.async_create_task(self.async_update())  # type: ignore
+            elif hasattr(self, "update") and self.platform is not None:
+                # Keep a slow integration from using up all executor threads
+                task = self.hass.async_add_pool_executor_job(
+                    f"{INTEGRATION_POOL_PREFIX}{self.platform.platform_name}",
+                    self.update,  # type: ignore
+                )
             elif hasattr(self, "update"):
                 task = self.hass.async_add_executor_job(self.update)  # type: ignore
             else:
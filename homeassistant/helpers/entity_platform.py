@@ -609,14 +609,49 @@ class EntityPlatform:
             return
 
         async with self._process_updates:
-            tasks = []
-            for entity in self.entities.values():
-                if not entity.should_poll:
+            entities = [
+                entity for entity in self.entities.values() if entity.should_poll
+            ]
+            if not entities:
+                return
+
+            results = await asyncio.gather(
+                *[self._async_poll_entity(entity) for entity in entities]
+            )
+
+            # Write all the polled states to the state machine in one pass
+            updates = []
+            for entity, updated in zip(entities, results):
+                # The entity may have been removed while it was updating
+                if not updated or entity.hass is None:
                     continue
-                tasks.append(entity.async_update_ha_state(True))
+                # pylint: disable=protected-access
+                calculated_state = entity._async_calculate_state()
+                if calculated_state is None:
+                    continue
+                updates.append(
+                    (
+                        entity.entity_id,
+                        *calculated_state,
+                        entity.force_update,
+                        entity._context,
+                    )
+                )
 
-            if tasks:
-                await asyncio.gather(*tasks)
+            if updates:
+                self.hass.states.async_set_many(updates)
+
+    async def _async_poll_entity(self, entity: "Entity") -> bool:
+        """Update a polling entity without writing its state.
+
+        Returns False if the update failed.
+        """
+        try:
+            await entity.async_device_update()
+        except Exception:  # pylint: disable=broad-except
+            self.logger.exception("Update for %s fails", entity.entity_id)
+            return False
+        return True
 
 
 current_platform: ContextVar[Optional[EntityPlatform]] = ContextVar(
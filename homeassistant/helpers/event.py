@@ -1,5 +1,4 @@
 """Helpers for listening to events."""
-import asyncio
 import copy
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -11,6 +10,7 @@ from typing import (
     Awaitable,
     Callable,
     Dict,
+    FrozenSet,
     Iterable,
     List,
     Optional,
@@ -26,7 +26,6 @@ from homeassistant.const import (
     ATTR_NOW,
     EVENT_CORE_CONFIG_UPDATE,
     EVENT_STATE_CHANGED,
-    EVENT_TIME_CHANGED,
     MATCH_ALL,
     SUN_EVENT_SUNRISE,
     SUN_EVENT_SUNSET,
@@ -37,6 +36,7 @@ from homeassistant.core import (
     HassJob,
     HomeAssistant,
     State,
+    TimeResolution,
     callback,
     split_entity_id,
 )
@@ -44,7 +44,13 @@ from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.entity_registry import EVENT_ENTITY_REGISTRY_UPDATED
 from homeassistant.helpers.ratelimit import KeyedRateLimit
 from homeassistant.helpers.sun import get_astral_event_next
-from homeassistant.helpers.template import RenderInfo, Template, result_as_boolean
+from homeassistant.helpers.template import (
+    RenderInfo,
+    StateAggregate,
+    Template,
+    result_as_boolean,
+)
+from homeassistant.helpers.timer_wheel import async_get_timer_wheel
 from homeassistant.helpers.typing import TemplateVarsType
 from homeassistant.loader import bind_hass
 from homeassistant.util import dt as dt_util
@@ -62,6 +68,8 @@ TRACK_STATE_REMOVED_DOMAIN_LISTENER = "track_state_removed_domain_listener"
 TRACK_ENTITY_REGISTRY_UPDATED_CALLBACKS = "track_entity_registry_updated_callbacks"
 TRACK_ENTITY_REGISTRY_UPDATED_LISTENER = "track_entity_registry_updated_listener"
 
+TEMPLATE_SCHEDULER = "template_scheduler"
+
 _ALL_LISTENER = "all"
 _DOMAINS_LISTENER = "domains"
 _ENTITIES_LISTENER = "entities"
@@ -116,6 +124,18 @@ class TrackTemplateResult:
     result: Any
 
 
+@dataclass
+class TemplateRenderStats:
+    """Class for keeping track of the renders of a template.
+
+    renders: Number of times the template was rendered
+    time: Total time spent rendering the template in seconds
+    """
+
+    renders: int = 0
+    time: float = 0.0
+
+
 def threaded_listener_factory(async_factory: Callable[..., Any]) -> CALLBACK_TYPE:
     """Convert an async event helper to a threaded one."""
 
@@ -244,6 +264,11 @@ def async_track_state_change_event(
 
     if TRACK_STATE_CHANGE_LISTENER not in hass.data:
 
+        @callback
+        def _async_state_change_filter(event: Event) -> bool:
+            """Filter state changes by entity_id."""
+            return event.data.get("entity_id") in entity_callbacks
+
         @callback
         def _async_state_change_dispatcher(event: Event) -> None:
             """Dispatch state changes by entity_id."""
@@ -261,7 +286,9 @@ def async_track_state_change_event(
                     )
 
         hass.data[TRACK_STATE_CHANGE_LISTENER] = hass.bus.async_listen(
-            EVENT_STATE_CHANGED, _async_state_change_dispatcher
+            EVENT_STATE_CHANGED,
+            _async_state_change_dispatcher,
+            event_filter=_async_state_change_filter,
         )
 
     job = HassJob(action)
@@ -328,6 +355,12 @@ def async_track_entity_registry_updated_event(
 
     if TRACK_ENTITY_REGISTRY_UPDATED_LISTENER not in hass.data:
 
+        @callback
+        def _async_entity_registry_updated_filter(event: Event) -> bool:
+            """Filter entity registry updates by entity_id."""
+            entity_id = event.data.get("old_entity_id", event.data["entity_id"])
+            return entity_id in entity_callbacks
+
         @callback
         def _async_entity_registry_updated_dispatcher(event: Event) -> None:
             """Dispatch entity registry updates by entity_id."""
@@ -346,7 +379,9 @@ def async_track_entity_registry_updated_event(
                     )
 
         hass.data[TRACK_ENTITY_REGISTRY_UPDATED_LISTENER] = hass.bus.async_listen(
-            EVENT_ENTITY_REGISTRY_UPDATED, _async_entity_registry_updated_dispatcher
+            EVENT_ENTITY_REGISTRY_UPDATED,
+            _async_entity_registry_updated_dispatcher,
+            event_filter=_async_entity_registry_updated_filter,
         )
 
     job = HassJob(action)
@@ -368,13 +403,19 @@ def async_track_entity_registry_updated_event(
     return remove_listener
 
 
+@callback
+def _async_domain_has_listeners(domain: str, callbacks: Dict[str, List]) -> bool:
+    """Determine if a domain has any listeners."""
+    return domain in callbacks or MATCH_ALL in callbacks
+
+
 @callback
 def _async_dispatch_domain_event(
     hass: HomeAssistant, event: Event, callbacks: Dict[str, List]
 ) -> None:
     domain = split_entity_id(event.data["entity_id"])[0]
 
-    if domain not in callbacks and MATCH_ALL not in callbacks:
+    if not _async_domain_has_listeners(domain, callbacks):
         return
 
     listeners = callbacks.get(domain, []) + callbacks.get(MATCH_ALL, [])
@@ -403,6 +444,13 @@ def async_track_state_added_domain(
 
     if TRACK_STATE_ADDED_DOMAIN_LISTENER not in hass.data:
 
+        @callback
+        def _async_state_change_filter(event: Event) -> bool:
+            """Filter state changes by entity_id."""
+            return event.data.get("old_state") is None and _async_domain_has_listeners(
+                split_entity_id(event.data["entity_id"])[0], domain_callbacks
+            )
+
         @callback
         def _async_state_change_dispatcher(event: Event) -> None:
             """Dispatch state changes by entity_id."""
@@ -412,7 +460,9 @@ def async_track_state_added_domain(
             _async_dispatch_domain_event(hass, event, domain_callbacks)
 
         hass.data[TRACK_STATE_ADDED_DOMAIN_LISTENER] = hass.bus.async_listen(
-            EVENT_STATE_CHANGED, _async_state_change_dispatcher
+            EVENT_STATE_CHANGED,
+            _async_state_change_dispatcher,
+            event_filter=_async_state_change_filter,
         )
 
     job = HassJob(action)
@@ -449,6 +499,13 @@ def async_track_state_removed_domain(
 
     if TRACK_STATE_REMOVED_DOMAIN_LISTENER not in hass.data:
 
+        @callback
+        def _async_state_change_filter(event: Event) -> bool:
+            """Filter state changes by entity_id."""
+            return event.data.get("new_state") is None and _async_domain_has_listeners(
+                split_entity_id(event.data["entity_id"])[0], domain_callbacks
+            )
+
         @callback
         def _async_state_change_dispatcher(event: Event) -> None:
             """Dispatch state changes by entity_id."""
@@ -458,7 +515,9 @@ def async_track_state_removed_domain(
             _async_dispatch_domain_event(hass, event, domain_callbacks)
 
         hass.data[TRACK_STATE_REMOVED_DOMAIN_LISTENER] = hass.bus.async_listen(
-            EVENT_STATE_CHANGED, _async_state_change_dispatcher
+            EVENT_STATE_CHANGED,
+            _async_state_change_dispatcher,
+            event_filter=_async_state_change_filter,
         )
 
     job = HassJob(action)
@@ -742,6 +801,7 @@ class _TrackTemplateResultInfo:
         """Handle removal / refresh of tracker init."""
         self.hass = hass
         self._job = HassJob(action)
+        self._scheduler = _async_get_template_scheduler(hass)
 
         for track_template_ in track_templates:
             track_template_.template.hass = hass
@@ -753,16 +813,20 @@ class _TrackTemplateResultInfo:
         self._info: Dict[Template, RenderInfo] = {}
         self._track_state_changes: Optional[_TrackStateChangeFiltered] = None
         self._time_listeners: Dict[Template, Callable] = {}
+        self._aggregate_listeners: Dict[
+            Template, Tuple[FrozenSet[StateAggregate], List[Callable]]
+        ] = {}
 
     def async_setup(self, raise_on_template_error: bool) -> None:
         """Activation of template tracking."""
+        self._scheduler.async_add_tracker(self)
         for track_template_ in self._track_templates:
             template = track_template_.template
-            variables = track_template_.variables
-            self._info[template] = info = template.async_render_to_info(variables)
+            self._info[template] = info = self._render_to_info(track_template_)
 
             if info.exception:
                 if raise_on_template_error:
+                    self._scheduler.async_remove_tracker(self)
                     raise info.exception
                 _LOGGER.error(
                     "Error while processing template: %s",
@@ -771,9 +835,13 @@ class _TrackTemplateResultInfo:
                 )
 
         self._track_state_changes = async_track_state_change_filtered(
-            self.hass, _render_infos_to_track_states(self._info.values()), self._refresh
+            self.hass,
+            _render_infos_to_track_states(self._info.values()),
+            self._schedule_refresh,
         )
         self._update_time_listeners()
+        for template, info in self._info.items():
+            self._setup_aggregate_listeners(template, info.aggregates)
         _LOGGER.debug(
             "Template group %s listens for %s",
             self._track_templates,
@@ -814,6 +882,37 @@ class _TrackTemplateResultInfo:
             self.hass, _refresh_from_time, second=0
         )
 
+    @callback
+    def _setup_aggregate_listeners(
+        self, template: Template, aggregates: FrozenSet[StateAggregate]
+    ) -> None:
+        if template in self._aggregate_listeners:
+            if self._aggregate_listeners[template][0] == aggregates:
+                return
+            for remove in self._aggregate_listeners.pop(template)[1]:
+                remove()
+
+        if not aggregates:
+            return
+
+        track_templates = [
+            track_template_
+            for track_template_ in self._track_templates
+            if track_template_.template == template
+        ]
+
+        @callback
+        def _refresh_from_aggregate() -> None:
+            self._refresh(None, track_templates=track_templates)
+
+        self._aggregate_listeners[template] = (
+            aggregates,
+            [
+                aggregate.async_add_listener(_refresh_from_aggregate)
+                for aggregate in aggregates
+            ],
+        )
+
     @callback
     def _update_time_listeners(self) -> None:
         for template, info in self._info.items():
@@ -825,14 +924,40 @@ class _TrackTemplateResultInfo:
         assert self._track_state_changes
         self._track_state_changes.async_remove()
         self._rate_limit.async_remove()
+        self._scheduler.async_remove_tracker(self)
         for template in list(self._time_listeners):
             self._time_listeners.pop(template)()
+        for template in list(self._aggregate_listeners):
+            for remove in self._aggregate_listeners.pop(template)[1]:
+                remove()
 
     @callback
     def async_refresh(self) -> None:
         """Force recalculate the template."""
         self._refresh(None)
 
+    @callback
+    def async_reads_any(self, entity_ids: Iterable[str]) -> bool:
+        """Return if a state change of any of the entities triggers a render."""
+        return any(
+            info.filter(entity_id)
+            for info in self._info.values()
+            for entity_id in entity_ids
+        )
+
+    @callback
+    def _schedule_refresh(self, event: Event) -> None:
+        """Refresh with the other trackers once this loop iteration is done."""
+        self._scheduler.async_schedule(self, event)
+
+    def _render_to_info(self, track_template_: TrackTemplate) -> RenderInfo:
+        """Render a template, recording how long it took."""
+        template = track_template_.template
+        start = time.perf_counter()
+        info = template.async_render_to_info(track_template_.variables)
+        self._scheduler.async_record_render(template, time.perf_counter() - start)
+        return info
+
     def _render_template_if_ready(
         self,
         track_template_: TrackTemplate,
@@ -877,9 +1002,7 @@ class _TrackTemplateResultInfo:
             )
 
         self._rate_limit.async_triggered(template, now)
-        self._info[template] = info = template.async_render_to_info(
-            track_template_.variables
-        )
+        self._info[template] = info = self._render_to_info(track_template_)
 
         try:
             result: Union[str, TemplateError] = info.result()
@@ -903,6 +1026,7 @@ class _TrackTemplateResultInfo:
         event: Optional[Event],
         track_templates: Optional[Iterable[TrackTemplate]] = None,
         replayed: Optional[bool] = False,
+        batch: Optional[List[Event]] = None,
     ) -> None:
         """Refresh the template.
 
@@ -915,18 +1039,33 @@ class _TrackTemplateResultInfo:
 
         replayed is True if the event is being replayed because the
         rate limit was hit.
+
+        batch is an optional list of state_changed events, ending with
+        event, that are handled together. Each template is refreshed
+        for the first of them that triggers a render without a rate limit.
         """
         updates = []
         info_changed = False
         now = event.time_fired if not replayed and event else dt_util.utcnow()
 
         for track_template_ in track_templates or self._track_templates:
-            update = self._render_template_if_ready(track_template_, now, event)
+            template_event = event
+            if batch is not None:
+                template_event = _batch_event_for_rerender(
+                    batch, self._info[track_template_.template], track_template_
+                )
+                if template_event is None:
+                    continue
+
+            update = self._render_template_if_ready(
+                track_template_, now, template_event
+            )
             if not update:
                 continue
 
             template = track_template_.template
             self._setup_time_listener(template, self._info[template].has_time)
+            self._setup_aggregate_listeners(template, self._info[template].aggregates)
 
             info_changed = True
 
@@ -934,6 +1073,7 @@ class _TrackTemplateResultInfo:
                 updates.append(update)
 
         if info_changed:
+            self._scheduler.async_record_states(self)
             assert self._track_state_changes
             self._track_state_changes.async_update_listeners(
                 _render_infos_to_track_states(
@@ -957,7 +1097,7 @@ class _TrackTemplateResultInfo:
         for track_result in updates:
             self._last_result[track_result.template] = track_result.result
 
-        self.hass.async_run_hass_job(self._job, event, updates)
+        self._scheduler.async_run_action(self, self._job, event, updates)
 
 
 TrackTemplateResultListener = Callable[
@@ -1025,6 +1165,207 @@ def async_track_template_result(
     return tracker
 
 
+class _TemplateScheduler:
+    """Re-render dependent templates once per batch of state changes.
+
+    The scheduler builds a graph of the entities trackers write from their
+    actions and the entities their templates read. State changes that
+    trigger a tracker reading a written entity are collected until the
+    next iteration of the event loop. Each of those trackers is then
+    refreshed once, in topological order of the graph, so it renders
+    after the entities it reads were updated and is not rendered again
+    when their state changes reach it. Other trackers are refreshed right
+    away, so they still see short-lived states.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the template scheduler."""
+        self.hass = hass
+        self.stats: Dict[str, TemplateRenderStats] = {}
+        # Number of trackers of each template source, to drop unused stats
+        self._template_trackers: Dict[str, int] = {}
+        self._trackers: Set[_TrackTemplateResultInfo] = set()
+        self._pending: Dict[_TrackTemplateResultInfo, List[Event]] = {}
+        self._flushing: Dict[_TrackTemplateResultInfo, List[Event]] = {}
+        # Entities written from the action of each tracker
+        self._outputs: Dict[_TrackTemplateResultInfo, Set[str]] = {}
+        self._written: Set[str] = set()
+        # States of written entities each tracker last rendered with
+        self._rendered_states: Dict[
+            _TrackTemplateResultInfo, Dict[str, Optional[State]]
+        ] = {}
+        # If each tracker reads a written entity
+        self._reads_written: Dict[_TrackTemplateResultInfo, bool] = {}
+        self._running: Optional[_TrackTemplateResultInfo] = None
+        hass.states.async_listen_batch(self._async_state_changes)
+
+    @callback
+    def async_schedule(self, tracker: _TrackTemplateResultInfo, event: Event) -> None:
+        """Schedule a refresh of a tracker for a state change."""
+        rendered_states = self._rendered_states.get(tracker)
+        entity_id = event.data.get(ATTR_ENTITY_ID)
+        if (
+            rendered_states
+            and entity_id in rendered_states
+            and rendered_states[entity_id] is event.data.get("new_state")
+        ):
+            # The tracker has already rendered with this state
+            return
+
+        reads_written = self._reads_written.get(tracker)
+        if reads_written is None:
+            reads_written = self._reads_written[tracker] = tracker.async_reads_any(
+                self._written
+            )
+        if not reads_written and tracker not in self._pending:
+            # pylint: disable=protected-access
+            tracker._refresh(event)
+            return
+
+        if not self._pending:
+            # A task, so async_block_till_done waits for the refresh
+            self.hass.async_create_task(self._async_flush())
+        self._pending.setdefault(tracker, []).append(event)
+
+    @callback
+    def async_add_tracker(self, tracker: _TrackTemplateResultInfo) -> None:
+        """Keep the render stats of the templates of a tracker."""
+        self._trackers.add(tracker)
+        # pylint: disable=protected-access
+        for track_template_ in tracker._track_templates:
+            source = track_template_.template.template
+            self._template_trackers[source] = self._template_trackers.get(source, 0) + 1
+
+    @callback
+    def async_remove_tracker(self, tracker: _TrackTemplateResultInfo) -> None:
+        """Forget a tracker that was removed."""
+        if tracker in self._trackers:
+            self._trackers.remove(tracker)
+            # pylint: disable=protected-access
+            for track_template_ in tracker._track_templates:
+                source = track_template_.template.template
+                self._template_trackers[source] -= 1
+                if not self._template_trackers[source]:
+                    del self._template_trackers[source]
+                    self.stats.pop(source, None)
+        self._pending.pop(tracker, None)
+        self._flushing.pop(tracker, None)
+        self._outputs.pop(tracker, None)
+        self._rendered_states.pop(tracker, None)
+        self._reads_written.pop(tracker, None)
+
+    @callback
+    def async_record_render(self, template: Template, duration: float) -> None:
+        """Record the time it took to render a template."""
+        source = template.template
+        if source not in self._template_trackers:
+            return
+        stats = self.stats.get(source)
+        if stats is None:
+            stats = self.stats[source] = TemplateRenderStats()
+        stats.renders += 1
+        stats.time += duration
+
+    @callback
+    def async_record_states(self, tracker: _TrackTemplateResultInfo) -> None:
+        """Record the states of written entities a tracker rendered with."""
+        self._reads_written.pop(tracker, None)
+        get_state = self.hass.states.get
+        self._rendered_states[tracker] = {
+            entity_id: get_state(entity_id)
+            # pylint: disable=protected-access
+            for info in tracker._info.values()
+            for entity_id in info.entities
+            if entity_id in self._written
+        }
+
+    @callback
+    def async_run_action(
+        self, tracker: _TrackTemplateResultInfo, job: HassJob, *args: Any
+    ) -> None:
+        """Run the action of a tracker, recording the entities it writes."""
+        running = self._running
+        self._running = tracker
+        try:
+            self.hass.async_run_hass_job(job, *args)
+        finally:
+            self._running = running
+
+    @callback
+    def _async_state_changes(self, changes: List[Dict[str, Any]]) -> None:
+        """Record the entities written from the action of a tracker."""
+        if self._running is None:
+            return
+        outputs = self._outputs.setdefault(self._running, set())
+        for change in changes:
+            entity_id = change["entity_id"]
+            outputs.add(entity_id)
+            if entity_id not in self._written:
+                self._written.add(entity_id)
+                self._reads_written.clear()
+
+    async def _async_flush(self) -> None:
+        """Refresh the trackers affected by the collected state changes."""
+        self._flushing = self._pending
+        self._pending = {}
+        for tracker in self._async_order(list(self._flushing)):
+            # Trackers can be removed by the actions of other trackers
+            batch = self._flushing.get(tracker)
+            if batch is not None:
+                # pylint: disable=protected-access
+                tracker._refresh(batch[-1], batch=batch)
+        self._flushing = {}
+
+    @callback
+    def _async_order(
+        self, trackers: List[_TrackTemplateResultInfo]
+    ) -> List[_TrackTemplateResultInfo]:
+        """Order trackers so those writing an entity come before its readers."""
+        readers: Dict[_TrackTemplateResultInfo, List[_TrackTemplateResultInfo]] = {
+            tracker: [] for tracker in trackers
+        }
+        blocked_by = dict.fromkeys(trackers, 0)
+        for writer in trackers:
+            outputs = self._outputs.get(writer)
+            if not outputs:
+                continue
+            for reader in trackers:
+                if reader is not writer and reader.async_reads_any(outputs):
+                    readers[writer].append(reader)
+                    blocked_by[reader] += 1
+
+        ordered = [tracker for tracker in trackers if not blocked_by[tracker]]
+        for writer in ordered:
+            for reader in readers[writer]:
+                blocked_by[reader] -= 1
+                if not blocked_by[reader]:
+                    ordered.append(reader)
+
+        if len(ordered) < len(trackers):
+            # Trackers in a cycle are refreshed in the order they were triggered
+            ordered.extend(tracker for tracker in trackers if blocked_by[tracker])
+
+        return ordered
+
+
+@callback
+def _async_get_template_scheduler(hass: HomeAssistant) -> _TemplateScheduler:
+    """Return the template scheduler of a hass instance."""
+    scheduler: Optional[_TemplateScheduler] = hass.data.get(TEMPLATE_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[TEMPLATE_SCHEDULER] = _TemplateScheduler(hass)
+    return scheduler
+
+
+@callback
+@bind_hass
+def async_get_template_render_stats(
+    hass: HomeAssistant,
+) -> Dict[str, TemplateRenderStats]:
+    """Return the render count and time of each tracked template."""
+    return _async_get_template_scheduler(hass).stats
+
+
 @callback
 @bind_hass
 def async_track_same_state(
@@ -1111,7 +1452,10 @@ def async_track_point_in_time(
         """Convert passed in UTC now to local now."""
         hass.async_run_hass_job(job, dt_util.as_local(utc_now))
 
-    return async_track_point_in_utc_time(hass, utc_converter, point_in_time)
+    utc_point_in_time = dt_util.as_utc(point_in_time)
+    return async_get_timer_wheel(hass).async_schedule(
+        utc_point_in_time, HassJob(utc_converter), utc_point_in_time, owner=job.target
+    )
 
 
 track_point_in_time = threaded_listener_factory(async_track_point_in_time)
@@ -1132,39 +1476,12 @@ def async_track_point_in_utc_time(
     # having to figure out how to call the action every time its called.
     job = action if isinstance(action, HassJob) else HassJob(action)
 
-    cancel_callback: Optional[asyncio.TimerHandle] = None
-
-    @callback
-    def run_action() -> None:
-        """Call the action."""
-        nonlocal cancel_callback
-
-        now = time_tracker_utcnow()
-
-        # Depending on the available clock support (including timer hardware
-        # and the OS kernel) it can happen that we fire a little bit too early
-        # as measured by utcnow(). That is bad when callbacks have assumptions
-        # about the current time. Thus, we rearm the timer for the remaining
-        # time.
-        delta = (utc_point_in_time - now).total_seconds()
-        if delta > 0:
-            _LOGGER.debug("Called %f seconds too early, rearming", delta)
-
-            cancel_callback = hass.loop.call_later(delta, run_action)
-            return
-
-        hass.async_run_hass_job(job, utc_point_in_time)
-
-    delta = utc_point_in_time.timestamp() - time.time()
-    cancel_callback = hass.loop.call_later(delta, run_action)
-
-    @callback
-    def unsub_point_in_time_listener() -> None:
-        """Cancel the call_later."""
-        assert cancel_callback is not None
-        cancel_callback.cancel()
-
-    return unsub_point_in_time_listener
+    # The timer wheel only fires a timer once utcnow() has passed its
+    # point in time, so the action never runs too early even if the
+    # event loop clock wakes up slightly before it.
+    return async_get_timer_wheel(hass).async_schedule(
+        utc_point_in_time, job, utc_point_in_time
+    )
 
 
 track_point_in_utc_time = threaded_listener_factory(async_track_point_in_utc_time)
@@ -1196,24 +1513,28 @@ def async_track_time_interval(
     interval_listener_job = None
 
     job = HassJob(action)
-
-    def next_interval() -> datetime:
-        """Return the next interval."""
-        return dt_util.utcnow() + interval
+    timer_wheel = async_get_timer_wheel(hass)
+
+    def schedule_next_interval() -> CALLBACK_TYPE:
+        """Schedule the next interval."""
+        next_interval = dt_util.utcnow() + interval
+        return timer_wheel.async_schedule(
+            next_interval,
+            interval_listener_job,  # type: ignore
+            next_interval,
+            owner=action,
+        )
 
     @callback
     def interval_listener(now: datetime) -> None:
         """Handle elapsed intervals."""
         nonlocal remove
-        nonlocal interval_listener_job
 
-        remove = async_track_point_in_utc_time(
-            hass, interval_listener_job, next_interval()  # type: ignore
-        )
+        remove = schedule_next_interval()
         hass.async_run_hass_job(job, now)
 
     interval_listener_job = HassJob(interval_listener)
-    remove = async_track_point_in_utc_time(hass, interval_listener_job, next_interval())
+    remove = schedule_next_interval()
 
     def remove_listener() -> None:
         """Remove interval listener."""
@@ -1338,7 +1659,7 @@ def async_track_utc_time_change(
             """Fire every time event that comes in."""
             hass.async_run_hass_job(job, event.data[ATTR_NOW])
 
-        return hass.bus.async_listen(EVENT_TIME_CHANGED, time_change_listener)
+        return hass.bus.async_listen_time_changed(time_change_listener)
 
     matching_seconds = dt_util.parse_time_expression(second, 0, 59)
     matching_minutes = dt_util.parse_time_expression(minute, 0, 59)
@@ -1352,6 +1673,14 @@ def async_track_utc_time_change(
         )
 
     time_listener: Optional[CALLBACK_TYPE] = None
+    timer_wheel = async_get_timer_wheel(hass)
+
+    def schedule_next(now: datetime) -> CALLBACK_TYPE:
+        """Schedule the next time the trigger should fire."""
+        next_time = dt_util.as_utc(calculate_next(now))
+        return timer_wheel.async_schedule(
+            next_time, pattern_time_change_listener_job, next_time, owner=action
+        )
 
     @callback
     def pattern_time_change_listener(_: datetime) -> None:
@@ -1361,15 +1690,10 @@ def async_track_utc_time_change(
         now = time_tracker_utcnow()
         hass.async_run_hass_job(job, dt_util.as_local(now) if local else now)
 
-        time_listener = async_track_point_in_utc_time(
-            hass,
-            pattern_time_change_listener,
-            calculate_next(now + timedelta(seconds=1)),
-        )
+        time_listener = schedule_next(now + timedelta(seconds=1))
 
-    time_listener = async_track_point_in_utc_time(
-        hass, pattern_time_change_listener, calculate_next(dt_util.utcnow())
-    )
+    pattern_time_change_listener_job = HassJob(pattern_time_change_listener)
+    time_listener = schedule_next(dt_util.utcnow())
 
     @callback
     def unsub_pattern_time_change_listener() -> None:
@@ -1383,6 +1707,31 @@ def async_track_utc_time_change(
 track_utc_time_change = threaded_listener_factory(async_track_utc_time_change)
 
 
+@callback
+@bind_hass
+def async_track_time_resolution(
+    hass: HomeAssistant,
+    action: Callable[..., None],
+    resolution: TimeResolution,
+) -> CALLBACK_TYPE:
+    """Add a listener that is called once per second, minute or hour.
+
+    Unlike listening to every time changed event, this allows the core
+    timer to stay asleep while nobody needs per second updates.
+    """
+    job = HassJob(action)
+
+    @callback
+    def time_resolution_listener(event: Event) -> None:
+        """Fire the action with the time of the event."""
+        hass.async_run_hass_job(job, event.data[ATTR_NOW])
+
+    return hass.bus.async_listen_time_changed(time_resolution_listener, resolution)
+
+
+track_time_resolution = threaded_listener_factory(async_track_time_resolution)
+
+
 @callback
 @bind_hass
 def async_track_time_change(
@@ -1474,6 +1823,21 @@ def _event_triggers_rerender(event: Event, info: RenderInfo) -> bool:
     return bool(info.filter_lifecycle(entity_id))
 
 
+@callback
+def _batch_event_for_rerender(
+    batch: List[Event], info: RenderInfo, track_template_: TrackTemplate
+) -> Optional[Event]:
+    """Select the event of a batch a template should be re-rendered for."""
+    selected = None
+    for event in batch:
+        if not _event_triggers_rerender(event, info):
+            continue
+        if _rate_limit_for_event(event, info, track_template_) is None:
+            return event
+        selected = event
+    return selected
+
+
 @callback
 def _rate_limit_for_event(
     event: Event, info: RenderInfo, track_template_: TrackTemplate
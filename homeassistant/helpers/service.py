@@ -55,6 +55,11 @@ _LOGGER = logging.getLogger(__name__)
 
 SERVICE_DESCRIPTION_CACHE = "service_description_cache"
 
+# Entity platforms that can handle a service for many entities in one
+# request implement this coroutine function:
+# async_batch_entity_service(hass, entities, method_name, data)
+BATCH_ENTITY_SERVICE = "async_batch_entity_service"
+
 
 @bind_hass
 def call_from_config(
@@ -479,15 +484,47 @@ async def entity_service_call(
     if not entities:
         return
 
-    done, pending = await asyncio.wait(
-        [
+    entity_calls: Dict[asyncio.Future, List["Entity"]] = {}
+    # Platforms that can send a group command handle all their entities at once
+    batches: Dict["EntityPlatform", List["Entity"]] = {}
+
+    for entity in entities:
+        if (
+            isinstance(func, str)
+            and entity.platform is not None
+            and hasattr(entity.platform.platform, BATCH_ENTITY_SERVICE)
+        ):
+            batches.setdefault(entity.platform, []).append(entity)
+            continue
+
+        future = asyncio.ensure_future(
             entity.async_request_call(
                 _handle_entity_call(hass, entity, func, data, call.context)
             )
-            for entity in entities
-        ]
-    )
+        )
+        entity_calls[future] = [entity]
+
+    for platform, platform_entities in batches.items():
+        # The entities of a platform share its PARALLEL_UPDATES semaphore,
+        # a batch counts as a single request
+        batch_call = _handle_batch_entity_call(
+            hass, platform, platform_entities, func, data, call.context  # type: ignore
+        )
+        future = asyncio.ensure_future(
+            platform_entities[0].async_request_call(batch_call)
+        )
+        entity_calls[future] = platform_entities
+
+    done, pending = await asyncio.wait(entity_calls)
     assert not pending
+    if call.target_results is not None:
+        for future, call_entities in entity_calls.items():
+            if future.cancelled():
+                result: Union[bool, BaseException] = asyncio.CancelledError()
+            else:
+                result = future.exception() or True
+            for entity in call_entities:
+                call.target_results[entity.entity_id] = result
     for future in done:
         future.result()  # pop exception if have
 
@@ -509,6 +546,21 @@ async def entity_service_call(
             future.result()  # pop exception if have
 
 
+async def _handle_batch_entity_call(
+    hass: HomeAssistantType,
+    platform: "EntityPlatform",
+    entities: List["Entity"],
+    func: str,
+    data: Dict,
+    context: ha.Context,
+) -> None:
+    """Handle calling a service method for many entities of a platform at once."""
+    for entity in entities:
+        entity.async_set_context(context)
+
+    await getattr(platform.platform, BATCH_ENTITY_SERVICE)(hass, entities, func, data)
+
+
 async def _handle_entity_call(
     hass: HomeAssistantType,
     entity: "Entity",
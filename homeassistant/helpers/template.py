@@ -4,21 +4,35 @@ import asyncio
 import base64
 import collections.abc
 from datetime import datetime, timedelta
+from fractions import Fraction
 from functools import partial, wraps
 import json
 import logging
 import math
+import operator
 from operator import attrgetter
 import random
 import re
-from typing import Any, Dict, Generator, Iterable, Optional, Type, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 from urllib.parse import urlencode as urllib_urlencode
 import weakref
 
 import jinja2
-from jinja2 import contextfilter, contextfunction
+from jinja2 import contextfilter, contextfunction, nodes
 from jinja2.sandbox import ImmutableSandboxedEnvironment
-from jinja2.utils import Namespace  # type: ignore
+from jinja2.utils import LRUCache, Namespace  # type: ignore
 import voluptuous as vol
 
 from homeassistant.const import (
@@ -29,7 +43,13 @@ from homeassistant.const import (
     LENGTH_METERS,
     STATE_UNKNOWN,
 )
-from homeassistant.core import State, callback, split_entity_id, valid_entity_id
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    State,
+    callback,
+    split_entity_id,
+    valid_entity_id,
+)
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import location as loc_helper
 from homeassistant.helpers.typing import HomeAssistantType, TemplateVarsType
@@ -47,6 +67,7 @@ DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 _RENDER_INFO = "template.render_info"
 _ENVIRONMENT = "template.environment"
+_AGGREGATES = "template.aggregates"
 
 _RE_JINJA_DELIMITERS = re.compile(r"\{%|\{\{|\{#")
 
@@ -68,6 +89,9 @@ _COLLECTABLE_STATE_ATTRIBUTES = {
 ALL_STATES_RATE_LIMIT = timedelta(minutes=1)
 DOMAIN_STATES_RATE_LIMIT = timedelta(seconds=1)
 
+# Number of distinct templates whose compiled code is kept
+COMPILED_CODE_CACHE_SIZE = 1024
+
 
 @bind_hass
 def attach(hass: HomeAssistantType, obj: Any) -> None:
@@ -201,6 +225,7 @@ class RenderInfo:
         self.domains = set()
         self.domains_lifecycle = set()
         self.entities = set()
+        self.aggregates = set()
         self.rate_limit = None
         self.has_time = False
 
@@ -235,6 +260,7 @@ class RenderInfo:
 
     def _freeze_sets(self) -> None:
         self.entities = frozenset(self.entities)
+        self.aggregates = frozenset(self.aggregates)
         self.domains = frozenset(self.domains)
         self.domains_lifecycle = frozenset(self.domains_lifecycle)
 
@@ -277,6 +303,7 @@ class Template:
         "is_static",
         "_compiled_code",
         "_compiled",
+        "_fast_path",
     )
 
     def __init__(self, template, hass=None):
@@ -287,6 +314,7 @@ class Template:
         self.template: str = template.strip()
         self._compiled_code = None
         self._compiled = None
+        self._fast_path = None
         self.hass = hass
         self.is_static = not is_template_string(template)
 
@@ -348,7 +376,11 @@ class Template:
             kwargs.update(variables)
 
         try:
-            render_result = compiled.render(kwargs)
+            value = self._fast_path(kwargs) if self._fast_path else _SENTINEL
+            if value is _SENTINEL:
+                render_result = compiled.render(kwargs)
+            else:
+                render_result = str(value)
         except Exception as err:  # pylint: disable=broad-except
             raise TemplateError(err) from err
 
@@ -357,6 +389,12 @@ class Template:
         if self.hass.config.legacy_templates or not parse_result:
             return render_result
 
+        if type(value) is int or (  # pylint: disable=unidiomatic-typecheck
+            type(value) is float and math.isfinite(value)
+        ):
+            # Numbers parse back to themselves
+            return value
+
         return self._parse_result(render_result)
 
     def _parse_result(self, render_result: str) -> Any:  # pylint: disable=no-self-use
@@ -494,7 +532,10 @@ class Template:
             pass
 
         try:
-            return self._compiled.render(variables).strip()
+            result = self._fast_path(variables) if self._fast_path else _SENTINEL
+            if result is _SENTINEL:
+                return self._compiled.render(variables).strip()
+            return str(result).strip()
         except jinja2.TemplateError as ex:
             if error_value is _SENTINEL:
                 _LOGGER.error(
@@ -516,6 +557,7 @@ class Template:
         self._compiled = jinja2.Template.from_code(
             env, self._compiled_code, env.globals, None
         )
+        self._fast_path = env.fast_path(self.template)
 
         return self._compiled
 
@@ -631,6 +673,245 @@ class DomainStates:
         return f"<template DomainStates('{self._domain}')>"
 
 
+class StateAggregate:
+    """Aggregate of the states of the entities matching a selector.
+
+    The selector is a domain, optionally narrowed down to entities having
+    an attribute, or an attribute with a specific value. Members and the
+    sum of their numeric states are updated as states change, so reading
+    the aggregate does not iterate over the states of the domain.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistantType,
+        domain: str,
+        attribute: Optional[str],
+        value: Any,
+        on_unused: Optional[CALLBACK_TYPE] = None,
+    ) -> None:
+        """Initialize the aggregate from the current states."""
+        self.domain = domain
+        self.attribute = attribute
+        self.value = value
+        self._values: Dict[str, Optional[float]] = {}
+        # Exact, so the sum does not depend on the order of the updates
+        self._sum = Fraction(0)
+        self._numeric = 0
+        self._min: Optional[float] = None
+        self._max: Optional[float] = None
+        self._extremes_valid = True
+        self._listeners: List[CALLBACK_TYPE] = []
+        self._on_unused = on_unused
+        for state in hass.states.async_all(domain):
+            self.async_update(state.entity_id, state)
+
+    @property
+    def count(self) -> int:
+        """Return the number of members."""
+        return len(self._values)
+
+    @property
+    def sum(self) -> float:
+        """Return the sum of the numeric states of the members."""
+        return float(self._sum)
+
+    @property
+    def avg(self) -> Optional[float]:
+        """Return the average of the numeric states of the members."""
+        if not self._numeric:
+            return None
+        return float(self._sum / self._numeric)
+
+    @property
+    def min(self) -> Optional[float]:
+        """Return the lowest numeric state of the members."""
+        self._ensure_extremes()
+        return self._min
+
+    @property
+    def max(self) -> Optional[float]:
+        """Return the highest numeric state of the members."""
+        self._ensure_extremes()
+        return self._max
+
+    def _matches(self, state: Optional[State]) -> bool:
+        """Return if a state is a member of the aggregate."""
+        if state is None:
+            return False
+        if self.attribute is None:
+            return True
+        if self.attribute not in state.attributes:
+            return False
+        return self.value is None or state.attributes[self.attribute] == self.value
+
+    @callback
+    def async_update(self, entity_id: str, state: Optional[State]) -> bool:
+        """Update an entity of the domain and return if the aggregate changed."""
+        if not self._matches(state):
+            if entity_id not in self._values:
+                return False
+            self._remove_value(self._values.pop(entity_id))
+            return True
+
+        value = _numeric_state(state)
+        if entity_id in self._values:
+            old_value = self._values[entity_id]
+            if old_value == value:
+                return False
+            self._remove_value(old_value)
+
+        self._values[entity_id] = value
+        self._add_value(value)
+        return True
+
+    def _add_value(self, value: Optional[float]) -> None:
+        if value is None:
+            return
+        self._sum += Fraction(value)
+        self._numeric += 1
+        if not self._extremes_valid:
+            return
+        if self._min is None or value < self._min:
+            self._min = value
+        if self._max is None or value > self._max:
+            self._max = value
+
+    def _remove_value(self, value: Optional[float]) -> None:
+        if value is None:
+            return
+        self._sum -= Fraction(value)
+        self._numeric -= 1
+        if value in (self._min, self._max):
+            self._extremes_valid = False
+
+    def _ensure_extremes(self) -> None:
+        """Find the extremes again after one of them was removed."""
+        if self._extremes_valid:
+            return
+        values = [value for value in self._values.values() if value is not None]
+        self._min = min(values, default=None)
+        self._max = max(values, default=None)
+        self._extremes_valid = True
+
+    @callback
+    def async_add_listener(self, listener: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for changes of the aggregate."""
+        self._listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the listener."""
+            self._listeners.remove(listener)
+            if not self._listeners and self._on_unused is not None:
+                self._on_unused()
+
+        return remove_listener
+
+    @property
+    def has_listeners(self) -> bool:
+        """Return if the aggregate has listeners."""
+        return bool(self._listeners)
+
+    @callback
+    def async_notify(self) -> None:
+        """Call the listeners after the aggregate changed."""
+        for listener in self._listeners[:]:
+            listener()
+
+    def __repr__(self) -> str:
+        """Representation of the aggregate."""
+        return (
+            f"<template StateAggregate('{self.domain}', "
+            f"{self.attribute!r}, {self.value!r})>"
+        )
+
+
+def _numeric_state(state: State) -> Optional[float]:
+    """Return the state as a finite float, or None if it is not numeric."""
+    try:
+        value = float(state.state)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+class _StateAggregates:
+    """Keep the aggregates used by templates up to date.
+
+    Aggregates are dropped once they have no listeners, checked when the
+    event loop gets to it so the listeners of a template that is rendered
+    again can move over to the aggregates it still uses.
+    """
+
+    def __init__(self, hass: HomeAssistantType) -> None:
+        """Initialize the aggregates."""
+        self._hass = hass
+        self._domains: Dict[str, Dict[Tuple[Optional[str], Any], StateAggregate]] = {}
+        self._changed: Set[StateAggregate] = set()
+        hass.states.async_listen_batch(self._async_state_changes)
+
+    @callback
+    def async_get(
+        self, domain: str, attribute: Optional[str], value: Any
+    ) -> StateAggregate:
+        """Return the aggregate of a selector, creating it if needed."""
+        aggregates = self._domains.setdefault(domain, {})
+        key = (attribute, value)
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+
+            @callback
+            def schedule_remove() -> None:
+                """Drop the aggregate if it is still unused later on."""
+                self._hass.loop.call_soon(self._async_remove_unused, domain, key)
+
+            aggregate = aggregates[key] = StateAggregate(
+                self._hass, domain, attribute, value, schedule_remove
+            )
+            schedule_remove()
+        return aggregate
+
+    @callback
+    def _async_remove_unused(self, domain: str, key: Tuple[Optional[str], Any]) -> None:
+        """Drop an aggregate that has no listeners."""
+        aggregates = self._domains.get(domain)
+        if aggregates is None:
+            return
+        aggregate = aggregates.get(key)
+        if aggregate is None or aggregate.has_listeners:
+            return
+        del aggregates[key]
+        self._changed.discard(aggregate)
+        if not aggregates:
+            del self._domains[domain]
+
+    @callback
+    def _async_state_changes(self, changes: List[Dict[str, Any]]) -> None:
+        """Update the aggregates of the domains of the changed entities."""
+        for change in changes:
+            entity_id = change["entity_id"]
+            aggregates = self._domains.get(split_entity_id(entity_id)[0])
+            if not aggregates:
+                continue
+            for aggregate in aggregates.values():
+                if not aggregate.async_update(entity_id, change["new_state"]):
+                    continue
+                if not self._changed:
+                    # Listeners render templates, which must not happen
+                    # while the state machine is being updated
+                    self._hass.loop.call_soon(self._async_notify)
+                self._changed.add(aggregate)
+
+    @callback
+    def _async_notify(self) -> None:
+        """Notify the listeners of the aggregates that changed."""
+        changed = self._changed
+        self._changed = set()
+        for aggregate in changed:
+            aggregate.async_notify()
+
+
 class TemplateState(State):
     """Class to represent a state object in a template."""
 
@@ -980,6 +1261,54 @@ def state_attr(hass, entity_id, name):
     return None
 
 
+def _get_aggregate(
+    hass: HomeAssistantType, domain: str, attribute: Optional[str], value: Any
+) -> StateAggregate:
+    """Return the aggregate of a selector and record it in the render info."""
+    if not valid_entity_id(f"{domain}.entity"):
+        raise TemplateError(f"Invalid domain name '{domain}'")  # type: ignore
+    try:
+        hash(value)
+    except TypeError as err:
+        raise TemplateError(f"Unhashable value {value!r}") from err  # type: ignore
+
+    aggregates = hass.data.get(_AGGREGATES)
+    if aggregates is None:
+        aggregates = hass.data[_AGGREGATES] = _StateAggregates(hass)
+    aggregate = aggregates.async_get(domain, attribute, value)
+
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.aggregates.add(aggregate)
+
+    return aggregate
+
+
+def state_count(hass, domain, attribute=None, value=None):
+    """Return the number of entities matching a selector."""
+    return _get_aggregate(hass, domain, attribute, value).count
+
+
+def state_sum(hass, domain, attribute=None, value=None):
+    """Return the sum of the numeric states of entities matching a selector."""
+    return _get_aggregate(hass, domain, attribute, value).sum
+
+
+def state_min(hass, domain, attribute=None, value=None):
+    """Return the lowest numeric state of entities matching a selector."""
+    return _get_aggregate(hass, domain, attribute, value).min
+
+
+def state_max(hass, domain, attribute=None, value=None):
+    """Return the highest numeric state of entities matching a selector."""
+    return _get_aggregate(hass, domain, attribute, value).max
+
+
+def state_avg(hass, domain, attribute=None, value=None):
+    """Return the average numeric state of entities matching a selector."""
+    return _get_aggregate(hass, domain, attribute, value).avg
+
+
 def now(hass):
     """Record fetching now."""
     render_info = hass.data.get(_RENDER_INFO)
@@ -1275,14 +1604,273 @@ def urlencode(value):
     return urllib_urlencode(value).encode("utf-8")
 
 
+class _FastPathUnsupported(Exception):
+    """Raised when an expression has to be rendered by Jinja."""
+
+
+_BINARY_OPERATORS = {
+    nodes.Add: operator.add,
+    nodes.Sub: operator.sub,
+    nodes.Mul: operator.mul,
+    nodes.Div: operator.truediv,
+    nodes.FloorDiv: operator.floordiv,
+    nodes.Mod: operator.mod,
+}
+
+_COMPARE_OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gteq": operator.ge,
+    "lt": operator.lt,
+    "lteq": operator.le,
+    "in": lambda left, right: left in right,
+    "notin": lambda left, right: left not in right,
+}
+
+
+def _compile_fast_path(env, source):
+    """Compile a template that outputs a single simple expression.
+
+    The evaluator returns the value of the expression, or _SENTINEL if it
+    has to be rendered by Jinja after all. Returns None if the template is
+    not a single expression of the supported subset.
+    """
+    try:
+        body = env.parse(source).body
+    except jinja2.TemplateError:
+        return None
+
+    if (
+        len(body) != 1
+        or not isinstance(body[0], nodes.Output)
+        or len(body[0].nodes) != 1
+    ):
+        return None
+
+    try:
+        expression = _compile_expression(env, body[0].nodes[0])
+    except _FastPathUnsupported:
+        return None
+
+    def evaluate(variables):
+        try:
+            return expression(variables)
+        except _FastPathUnsupported:
+            return _SENTINEL
+
+    return evaluate
+
+
+def _compile_expression(env, node):
+    """Compile a Jinja expression node to a function of the variables.
+
+    Mirrors the code Jinja generates for the node, so both paths give the
+    same results and track the same entities in a RenderInfo.
+    """
+    if isinstance(node, nodes.Const):
+        const = node.value
+        return lambda variables: const
+
+    if isinstance(node, nodes.Name) and node.ctx == "load":
+        name = node.name
+
+        def resolve(variables):
+            if name in variables:
+                return variables[name]
+            if name in env.globals:
+                return env.globals[name]
+            return env.undefined(name=name)
+
+        return resolve
+
+    if isinstance(node, nodes.Getattr):
+        obj = _compile_expression(env, node.node)
+        attr = node.attr
+        return lambda variables: env.getattr(obj(variables), attr)
+
+    if isinstance(node, nodes.Getitem) and not isinstance(node.arg, nodes.Slice):
+        obj = _compile_expression(env, node.node)
+        key = _compile_expression(env, node.arg)
+        return lambda variables: env.getitem(obj(variables), key(variables))
+
+    if type(node) in _BINARY_OPERATORS:
+        binary_operator = _BINARY_OPERATORS[type(node)]
+        left = _compile_expression(env, node.left)
+        right = _compile_expression(env, node.right)
+        return lambda variables: binary_operator(left(variables), right(variables))
+
+    if isinstance(node, nodes.Compare):
+        return _compile_compare(env, node)
+
+    if isinstance(node, nodes.And):
+        left = _compile_expression(env, node.left)
+        right = _compile_expression(env, node.right)
+        return lambda variables: left(variables) and right(variables)
+
+    if isinstance(node, nodes.Or):
+        left = _compile_expression(env, node.left)
+        right = _compile_expression(env, node.right)
+        return lambda variables: left(variables) or right(variables)
+
+    if isinstance(node, nodes.Not):
+        operand = _compile_expression(env, node.node)
+        return lambda variables: not operand(variables)
+
+    if isinstance(node, nodes.Neg):
+        operand = _compile_expression(env, node.node)
+        return lambda variables: -operand(variables)
+
+    if isinstance(node, nodes.Pos):
+        operand = _compile_expression(env, node.node)
+        return lambda variables: +operand(variables)
+
+    if isinstance(node, nodes.CondExpr) and node.expr2 is not None:
+        test = _compile_expression(env, node.test)
+        expr1 = _compile_expression(env, node.expr1)
+        expr2 = _compile_expression(env, node.expr2)
+        return lambda variables: (
+            expr1(variables) if test(variables) else expr2(variables)
+        )
+
+    if isinstance(node, nodes.Filter):
+        return _compile_filter(env, node)
+
+    if isinstance(node, nodes.Call):
+        return _compile_call(env, node)
+
+    raise _FastPathUnsupported
+
+
+def _compile_compare(env, node):
+    """Compile a possibly chained comparison."""
+    first = _compile_expression(env, node.expr)
+    operands = []
+    for operand in node.ops:
+        if operand.op not in _COMPARE_OPERATORS:
+            raise _FastPathUnsupported
+        operands.append(
+            (_COMPARE_OPERATORS[operand.op], _compile_expression(env, operand.expr))
+        )
+
+    def compare(variables):
+        left = first(variables)
+        for compare_operator, expr in operands:
+            right = expr(variables)
+            result = compare_operator(left, right)
+            if not result:
+                return result
+            left = right
+        return result
+
+    return compare
+
+
+def _compile_arguments(env, node):
+    """Compile the positional arguments of a filter or call."""
+    if node.kwargs or node.dyn_args is not None or node.dyn_kwargs is not None:
+        raise _FastPathUnsupported
+    return [_compile_expression(env, arg) for arg in node.args]
+
+
+def _compile_filter(env, node):
+    """Compile a filter that does not need the template context."""
+    func = env.filters.get(node.name)
+    if (
+        node.node is None
+        or func is None
+        or getattr(func, "contextfilter", False)
+        or getattr(func, "evalcontextfilter", False)
+    ):
+        raise _FastPathUnsupported
+
+    value = _compile_expression(env, node.node)
+    args = _compile_arguments(env, node)
+
+    if getattr(func, "environmentfilter", False):
+        return lambda variables: func(
+            env, value(variables), *[arg(variables) for arg in args]
+        )
+    return lambda variables: func(value(variables), *[arg(variables) for arg in args])
+
+
+def _compile_call(env, node):
+    """Compile a call of a global function.
+
+    Other calls, like methods of variables, are left to Jinja so the
+    sandbox can check them.
+    """
+    if not isinstance(node.node, nodes.Name):
+        raise _FastPathUnsupported
+
+    name = node.node.name
+    args = _compile_arguments(env, node)
+
+    def call(variables):
+        func = env.globals.get(name)
+        if name in variables or func is None or not env.is_safe_callable(func):
+            raise _FastPathUnsupported
+        if any(getattr(func, flag, False) for flag in _RESERVED_NAMES):
+            # Globals depending on hass discard their context
+            if not getattr(func, "contextfunction", False):
+                raise _FastPathUnsupported
+            return func(None, *[arg(variables) for arg in args])
+        return func(*[arg(variables) for arg in args])
+
+    return call
+
+
+class CompiledCodeCache:
+    """Cache the compiled code of the most recently used templates.
+
+    Code that was evicted is still found while a template uses it.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize the cache."""
+        self._recent = LRUCache(capacity)
+        self._live: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, source: str) -> Any:
+        """Return the compiled code of a template source if it is cached."""
+        code = self._recent.get(source)
+        if code is None:
+            code = self._live.get(source)
+            if code is not None:
+                self._recent[source] = code
+        if code is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return code
+
+    def add(self, source: str, code: Any) -> None:
+        """Cache the compiled code of a template source."""
+        self._recent[source] = code
+        self._live[source] = code
+
+
 class TemplateEnvironment(ImmutableSandboxedEnvironment):
     """The Home Assistant template environment."""
 
+    # Compiled code is checked against the filters of the environment,
+    # which differ with and without hass, so only environments of the
+    # same kind share it
+    _template_caches: Dict[bool, CompiledCodeCache] = {}
+
     def __init__(self, hass):
         """Initialise template environment."""
         super().__init__()
         self.hass = hass
-        self.template_cache = weakref.WeakValueDictionary()
+        has_hass = hass is not None
+        if has_hass not in self._template_caches:
+            self._template_caches[has_hass] = CompiledCodeCache(
+                COMPILED_CODE_CACHE_SIZE
+            )
+        self.template_cache = self._template_caches[has_hass]
+        self.fast_path_cache = LRUCache(COMPILED_CODE_CACHE_SIZE)
         self.filters["round"] = forgiving_round
         self.filters["multiply"] = multiply
         self.filters["log"] = logarithm
@@ -1359,6 +1947,11 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
         self.globals["is_state_attr"] = hassfunction(is_state_attr)
         self.globals["state_attr"] = hassfunction(state_attr)
         self.globals["states"] = AllStates(hass)
+        self.globals["state_count"] = hassfunction(state_count)
+        self.globals["state_sum"] = hassfunction(state_sum)
+        self.globals["state_min"] = hassfunction(state_min)
+        self.globals["state_max"] = hassfunction(state_max)
+        self.globals["state_avg"] = hassfunction(state_avg)
         self.globals["utcnow"] = hassfunction(utcnow)
         self.globals["now"] = hassfunction(now)
 
@@ -1392,9 +1985,21 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
         cached = self.template_cache.get(source)
 
         if cached is None:
-            cached = self.template_cache[source] = super().compile(source)
+            cached = super().compile(source)
+            self.template_cache.add(source, cached)
 
         return cached
 
+    def fast_path(self, source):
+        """Return the evaluator of a template that is a simple expression.
+
+        Returns None if the template has to be rendered by Jinja.
+        """
+        evaluator = self.fast_path_cache.get(source)
+        if evaluator is None:
+            evaluator = _compile_fast_path(self, source) or False
+            self.fast_path_cache[source] = evaluator
+        return evaluator or None
+
 
 _NO_HASS_ENV = TemplateEnvironment(None)
@@ -0,0 +1,249 @@
+"""Timer wheel to group point in time callbacks."""
+import asyncio
+from datetime import datetime
+import functools
+import heapq
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.singleton import singleton
+import homeassistant.util.dt as dt_util
+
+DATA_TIMER_WHEEL = "timer_wheel"
+
+# Timers due within the same tick share a slot
+TIMER_WHEEL_TICK = 0.1
+
+# Shortest delay to wake up again when the event loop woke up before
+# the wall clock reached the earliest timer
+MIN_REARM_DELAY = 0.001
+
+# Rebuild the slot heap once it holds this many times more
+# cancelled slots than live ones
+COMPACT_THRESHOLD = 4
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Timer:
+    """A pending timer on the wheel."""
+
+    __slots__ = ("when", "slot", "job", "args", "owner", "cancelled")
+
+    def __init__(
+        self,
+        when: float,
+        slot: int,
+        job: HassJob,
+        args: Tuple[Any, ...],
+        owner: Optional[Callable],
+    ) -> None:
+        """Initialize a timer."""
+        self.when = when
+        self.slot = slot
+        self.job = job
+        self.args = args
+        self.owner = owner
+        self.cancelled = False
+
+
+def _owner_name(owner: Callable) -> str:
+    """Return a readable name for the owner of a timer."""
+    while isinstance(owner, functools.partial):
+        owner = owner.func
+    module = getattr(owner, "__module__", None)
+    qualname = getattr(owner, "__qualname__", None) or repr(owner)
+    return f"{module}.{qualname}" if module else qualname
+
+
+class TimerWheel:
+    """Group point in time callbacks into ticks.
+
+    Timers are stored in slots of TIMER_WHEEL_TICK seconds. Only the
+    earliest occupied slot has a handle on the event loop, armed for the
+    earliest timer in that slot, so timers are not fired late. Every
+    timer that is due when the loop wakes up is fired together.
+    """
+
+    def __init__(self, hass: HomeAssistant, tick: float = TIMER_WHEEL_TICK) -> None:
+        """Initialize the timer wheel."""
+        self.hass = hass
+        self._tick = tick
+        self._slots: Dict[int, Set[_Timer]] = {}
+        self._slot_heap: List[int] = []
+        self._heap_slots: Set[int] = set()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._handle_slot: Optional[int] = None
+        self._handle_when: Optional[float] = None
+
+    @callback
+    def async_schedule(
+        self,
+        point_in_time: datetime,
+        job: HassJob,
+        *args: Any,
+        owner: Optional[Callable] = None,
+    ) -> CALLBACK_TYPE:
+        """Schedule a job to run at a point in time.
+
+        The owner is the callable reported by async_timers_by_owner,
+        it defaults to the target of the job.
+
+        Returns a function to cancel the timer.
+        """
+        when = point_in_time.timestamp()
+        slot = math.ceil(when / self._tick)
+        timer = _Timer(when, slot, job, args, owner)
+
+        timers = self._slots.get(slot)
+        if timers is None:
+            timers = self._slots[slot] = set()
+            if slot not in self._heap_slots:
+                self._heap_slots.add(slot)
+                heapq.heappush(self._slot_heap, slot)
+        timers.add(timer)
+
+        if self._handle_when is None or when < self._handle_when:
+            self._async_arm(slot, when)
+
+        @callback
+        def cancel_timer() -> None:
+            """Cancel the timer."""
+            self._async_cancel(timer)
+
+        return cancel_timer
+
+    @callback
+    def _async_cancel(self, timer: _Timer) -> None:
+        """Remove a timer from the wheel."""
+        # The timer may already be taken off the wheel to be fired
+        timer.cancelled = True
+        timers = self._slots.get(timer.slot)
+        if timers is None or timer not in timers:
+            return
+
+        timers.remove(timer)
+        if timers:
+            return
+
+        del self._slots[timer.slot]
+
+        if not self._slots:
+            self._async_disarm()
+            self._slot_heap.clear()
+            self._heap_slots.clear()
+        elif len(self._slot_heap) > COMPACT_THRESHOLD * len(self._slots):
+            self._slot_heap = list(self._slots)
+            heapq.heapify(self._slot_heap)
+            self._heap_slots = set(self._slot_heap)
+
+    @callback
+    def _async_arm(self, slot: int, when: float) -> None:
+        """Wake up the event loop when the earliest timer of a slot is due."""
+        self._async_disarm()
+        self._handle_slot = slot
+        self._handle_when = when
+        self._handle = self.hass.loop.call_later(
+            max(when - time.time(), MIN_REARM_DELAY), self._async_handle_tick
+        )
+
+    @callback
+    def _async_disarm(self) -> None:
+        """Cancel the pending wake up."""
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = None
+        self._handle_slot = None
+        self._handle_when = None
+
+    @callback
+    def _async_handle_tick(self) -> None:
+        """Fire the timers that are due."""
+        self._handle = None
+        self._handle_slot = None
+        self._handle_when = None
+        self.async_fire_due(dt_util.utcnow())
+
+    @callback
+    def async_fire_due(self, now: datetime) -> None:
+        """Fire all timers that are due at now."""
+        timestamp = now.timestamp()
+        current_slot = math.ceil(timestamp / self._tick)
+        heap = self._slot_heap
+        due: List[_Timer] = []
+        pending_slots = []
+
+        while heap and heap[0] <= current_slot:
+            slot = heapq.heappop(heap)
+            self._heap_slots.discard(slot)
+            timers = self._slots.pop(slot, None)
+            if not timers:
+                continue
+
+            remaining = set()
+            for timer in timers:
+                if timer.when <= timestamp:
+                    due.append(timer)
+                else:
+                    remaining.add(timer)
+
+            if remaining:
+                self._slots[slot] = remaining
+                pending_slots.append(slot)
+
+        for slot in pending_slots:
+            self._heap_slots.add(slot)
+            heapq.heappush(heap, slot)
+
+        self._async_rearm()
+
+        due.sort(key=lambda timer: timer.when)
+        for timer in due:
+            # A timer fired earlier in this batch may have cancelled it
+            if timer.cancelled:
+                continue
+            try:
+                self.hass.async_run_hass_job(timer.job, *timer.args)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error running timer job %s", timer.job)
+
+    @callback
+    def _async_rearm(self) -> None:
+        """Arm the wake up for the earliest occupied slot."""
+        heap = self._slot_heap
+        while heap and heap[0] not in self._slots:
+            self._heap_slots.discard(heapq.heappop(heap))
+
+        if not heap:
+            self._async_disarm()
+            return
+
+        when = min(timer.when for timer in self._slots[heap[0]])
+        if when != self._handle_when:
+            self._async_arm(heap[0], when)
+
+    @callback
+    def async_timers_by_owner(self) -> Dict[str, List[datetime]]:
+        """Return the pending timers grouped by owner."""
+        timers_by_owner: Dict[str, List[datetime]] = {}
+        for timers in self._slots.values():
+            for timer in timers:
+                owner = _owner_name(timer.owner or timer.job.target)
+                timers_by_owner.setdefault(owner, []).append(
+                    dt_util.utc_from_timestamp(timer.when)
+                )
+
+        for when in timers_by_owner.values():
+            when.sort()
+
+        return timers_by_owner
+
+
+@callback
+@singleton(DATA_TIMER_WHEEL)
+def async_get_timer_wheel(hass: HomeAssistant) -> TimerWheel:
+    """Return the timer wheel of a Home Assistant instance."""
+    return TimerWheel(hass)
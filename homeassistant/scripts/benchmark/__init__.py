@@ -11,7 +11,12 @@ from typing import Callable, Dict, TypeVar
 
 from homeassistant import core
 from homeassistant.components.websocket_api.const import JSON_DUMP
-from homeassistant.const import ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED
+from homeassistant.const import (
+    ATTR_NOW,
+    EVENT_HOMEASSISTANT_START,
+    EVENT_STATE_CHANGED,
+    EVENT_TIME_CHANGED,
+)
 from homeassistant.helpers.entityfilter import convert_include_exclude_filter
 from homeassistant.helpers.json import JSONEncoder
 from homeassistant.util import dt as dt_util
@@ -236,6 +241,63 @@ async def _logbook_filtering(hass, last_changed, last_updated):
     return timer() - start
 
 
+@benchmark
+async def recorder_write_orm(hass):
+    """Record state changes through the ORM."""
+    return await _recorder_write(hass, False)
+
+
+@benchmark
+async def recorder_write_bulk(hass):
+    """Record state changes with bulk inserts."""
+    return await _recorder_write(hass, True)
+
+
+async def _recorder_write(hass, bulk_insert):
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components import recorder
+
+    instance = recorder.Recorder(
+        hass=hass,
+        auto_purge=False,
+        keep_days=10,
+        commit_interval=recorder.DEFAULT_COMMIT_INTERVAL,
+        uri="sqlite://",
+        bulk_insert=bulk_insert,
+        db_max_retries=recorder.DEFAULT_DB_MAX_RETRIES,
+        db_retry_wait=recorder.DEFAULT_DB_RETRY_WAIT,
+        entity_filter=lambda entity_id: True,
+        exclude_t=[],
+        db_integrity_check=False,
+    )
+    instance.async_initialize()
+    instance.start()
+    await instance.async_db_ready
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    await hass.async_add_executor_job(instance.block_till_done)
+
+    start = timer()
+
+    for i in range(10 ** 5):
+        hass.states.async_set(
+            f"sensor.benchmark_{i % 100}", i, {"unit_of_measurement": "W"}
+        )
+        if i % 1000 == 0:
+            # The recorder commits once per second
+            hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: dt_util.utcnow()})
+
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: dt_util.utcnow()})
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(instance.block_till_done)
+    runtime = timer() - start
+
+    # Home Assistant is not running, so it will not stop the recorder
+    instance.queue.put(None)
+    await hass.async_add_executor_job(instance.join)
+
+    return runtime
+
+
 @benchmark
 async def filtering_entity_id(hass):
     """Run a 100k state changes through entity filter."""
@@ -301,6 +363,47 @@ async def filtering_entity_id(hass):
     return timer() - start
 
 
+@benchmark
+async def template_render_fast_path(hass):
+    """Render MQTT payload templates with the fast path evaluator."""
+    return await _template_render(hass, True)
+
+
+@benchmark
+async def template_render_jinja(hass):
+    """Render MQTT payload templates with Jinja."""
+    return await _template_render(hass, False)
+
+
+async def _template_render(hass, fast_path):
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.helpers.template import Template
+
+    hass.states.async_set("sensor.benchmark", "21.5")
+    templates = []
+    for template_string in (
+        "{{ value_json.temperature }}",
+        "{{ value_json.humidity | float * 2 }}",
+        "{{ 'ON' if value_json.power > 10 else 'OFF' }}",
+        "{{ states('sensor.benchmark') | float + value_json.temperature }}",
+    ):
+        tpl = Template(template_string, hass)
+        # pylint: disable=protected-access
+        tpl._ensure_compiled()
+        if not fast_path:
+            tpl._fast_path = None
+        templates.append(tpl)
+
+    payload = json.dumps({"temperature": 21.5, "humidity": "55", "power": 17})
+
+    start = timer()
+
+    for i in range(10 ** 5):
+        templates[i % len(templates)].async_render_with_possible_json_value(payload)
+
+    return timer() - start
+
+
 @benchmark
 async def valid_entity_id(hass):
     """Run valid entity ID a million times."""
@@ -0,0 +1,174 @@
+"""Named executor pools with per-pool metrics.
+
+Blocking work can be sent to a named pool so a busy integration can not
+starve unrelated work of threads. Pools named ``integration:<domain>``
+share the default executor but only run a limited number of jobs of the
+domain at the same time, the remaining jobs wait in the event loop
+without holding a thread.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+POOL_IO = "io"
+POOL_CPU = "cpu"
+POOL_DB = "db"
+
+INTEGRATION_POOL_PREFIX = "integration:"
+
+DEFAULT_POOL_SIZES = {
+    POOL_IO: 16,
+    POOL_CPU: os.cpu_count() or 1,
+    POOL_DB: 4,
+}
+DEFAULT_INTEGRATION_LIMIT = 8
+
+
+class PoolStats:
+    """Queue depth and latency of a pool."""
+
+    __slots__ = ("queued", "running", "completed", "total_wait", "max_wait")
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a dictionary representation of the statistics."""
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "average_wait": self.total_wait / self.completed if self.completed else 0,
+            "max_wait": self.max_wait,
+        }
+
+
+class ExecutorPools:
+    """Manage named executor pools.
+
+    Metrics are only updated from the event loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize the pools."""
+        self._loop = loop
+        self._sizes: Dict[str, int] = dict(DEFAULT_POOL_SIZES)
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, PoolStats] = {}
+
+    def configure(self, name: str, max_workers: int) -> None:
+        """Set the size of a pool before it is first used.
+
+        For integration pools this is the number of jobs the integration
+        can run at the same time. Sizes are set from the executor_pools
+        option of the core configuration.
+        """
+        if name in self._executors or name in self._semaphores:
+            raise ValueError(f"Executor pool {name} is already running")
+        self._sizes[name] = max_workers
+
+    def async_submit(
+        self, name: str, target: Callable[..., T], *args: Any
+    ) -> Awaitable[T]:
+        """Run a function in a named pool.
+
+        This method must be run in the event loop.
+        """
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = PoolStats()
+        stats.queued += 1
+        submitted = time.monotonic()
+        dequeued = False
+
+        def _async_dequeue() -> None:
+            """Record that the job left the queue, once."""
+            nonlocal dequeued
+            if not dequeued:
+                dequeued = True
+                stats.queued -= 1
+
+        def _async_started(wait: float) -> None:
+            """Record that the job started running."""
+            _async_dequeue()
+            stats.running += 1
+            stats.total_wait += wait
+            if wait > stats.max_wait:
+                stats.max_wait = wait
+
+        def _async_finished() -> None:
+            """Record that the job finished running."""
+            stats.running -= 1
+            stats.completed += 1
+
+        def _run() -> T:
+            """Run the target, recording when it starts and finishes.
+
+            A job that was cancelled while queued can still be started by
+            its thread, so running jobs are only counted here.
+            """
+            self._loop.call_soon_threadsafe(
+                _async_started, time.monotonic() - submitted
+            )
+            try:
+                return target(*args)
+            finally:
+                self._loop.call_soon_threadsafe(_async_finished)
+
+        if not name.startswith(INTEGRATION_POOL_PREFIX):
+            future = self._loop.run_in_executor(self._async_get_executor(name), _run)
+            # Jobs cancelled before their thread started them leave the queue
+            future.add_done_callback(lambda _: _async_dequeue())
+            return future
+
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = self._semaphores[name] = asyncio.Semaphore(
+                self._sizes.get(name, DEFAULT_INTEGRATION_LIMIT)
+            )
+
+        async def _run_limited() -> T:
+            """Wait for a free slot of the integration."""
+            try:
+                async with semaphore:
+                    return await self._loop.run_in_executor(None, _run)
+            finally:
+                _async_dequeue()
+
+        return self._loop.create_task(_run_limited())
+
+    def _async_get_executor(self, name: str) -> ThreadPoolExecutor:
+        """Return the executor of a pool, starting it if needed."""
+        executor = self._executors.get(name)
+        if executor is None:
+            executor = self._executors[name] = ThreadPoolExecutor(
+                thread_name_prefix=f"Pool-{name}",
+                max_workers=self._sizes.get(name, DEFAULT_POOL_SIZES[POOL_IO]),
+            )
+        return executor
+
+    def async_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the statistics of all pools that have been used."""
+        return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+    async def async_shutdown(self) -> None:
+        """Shut down all pools without blocking the event loop."""
+        if self._executors:
+            await self._loop.run_in_executor(None, self.shutdown)
+
+    def shutdown(self) -> None:
+        """Shut down all pools and wait for their jobs to finish."""
+        executors = list(self._executors.values())
+        self._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=True)
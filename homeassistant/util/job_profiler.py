@@ -0,0 +1,140 @@
+"""Collect runtime statistics about jobs run by Home Assistant.
+
+The profiler is attached to a Home Assistant instance while it is enabled
+and records, for every job target, how often it ran, how long it took in
+total and the longest single run. Callbacks that block the event loop for
+longer than a threshold are logged.
+"""
+import functools
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+DEFAULT_BLOCK_THRESHOLD = 0.1
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def job_name(target: Callable) -> str:
+    """Return the module and qualified name of a job target."""
+    while isinstance(target, functools.partial):
+        target = target.func
+    module = getattr(target, "__module__", None)
+    qualname = getattr(target, "__qualname__", None) or repr(target)
+    return f"{module}.{qualname}" if module else qualname
+
+
+class JobStats:
+    """Statistics of a single job target."""
+
+    __slots__ = ("calls", "total_time", "max_time", "blocked")
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.blocked = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a dictionary representation of the statistics."""
+        return {
+            "calls": self.calls,
+            "total_time": self.total_time,
+            "max_time": self.max_time,
+            "blocked": self.blocked,
+        }
+
+
+class JobProfiler:
+    """Record how long jobs take to run.
+
+    Callbacks are timed while they run in the event loop, coroutine
+    functions from the start of their task until it finishes and executor
+    jobs while they run in the executor.
+    """
+
+    def __init__(self, block_threshold: float = DEFAULT_BLOCK_THRESHOLD) -> None:
+        """Initialize the job profiler."""
+        self.block_threshold = block_threshold
+        self._stats: Dict[str, JobStats] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, target: Callable, duration: float, in_loop: bool) -> None:
+        """Record a run of a job target."""
+        name = job_name(target)
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = JobStats()
+            stats.calls += 1
+            stats.total_time += duration
+            if duration > stats.max_time:
+                stats.max_time = duration
+            if in_loop and duration > self.block_threshold:
+                stats.blocked += 1
+                blocking = True
+            else:
+                blocking = False
+
+        if blocking:
+            _LOGGER.warning(
+                "Detected %s blocking the event loop for %.3f seconds",
+                name,
+                duration,
+            )
+
+    def wrap_callback(self, target: Callable) -> Callable:
+        """Wrap a callback to time it."""
+
+        @functools.wraps(target)
+        def _profiled_callback(*args: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return target(*args)
+            finally:
+                self._record(target, time.perf_counter() - start, True)
+
+        return _profiled_callback
+
+    def wrap_coroutine_function(self, target: Callable[..., Awaitable]) -> Callable:
+        """Wrap a coroutine function to time it."""
+
+        @functools.wraps(target)
+        async def _profiled_coroutine_function(*args: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await target(*args)
+            finally:
+                self._record(target, time.perf_counter() - start, False)
+
+        return _profiled_coroutine_function
+
+    def wrap_executor(self, target: Callable) -> Callable:
+        """Wrap an executor job to time it."""
+
+        @functools.wraps(target)
+        def _profiled_executor(*args: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return target(*args)
+            finally:
+                self._record(target, time.perf_counter() - start, False)
+
+        return _profiled_executor
+
+    def top(self, count: int, sort_by: str = "total_time") -> List[Dict[str, Any]]:
+        """Return the statistics of the count most expensive job targets."""
+        with self._lock:
+            items = [
+                {"name": name, **stats.as_dict()}
+                for name, stats in self._stats.items()
+            ]
+        items.sort(key=lambda item: item[sort_by], reverse=True)  # type: ignore
+        return items[:count]
+
+    def reset(self) -> None:
+        """Clear all recorded statistics."""
+        with self._lock:
+            self._stats.clear()
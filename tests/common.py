@@ -54,6 +54,7 @@ from homeassistant.helpers import (
     storage,
 )
 from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.timer_wheel import DATA_TIMER_WHEEL
 from homeassistant.setup import setup_component
 from homeassistant.util.async_ import run_callback_threadsafe
 import homeassistant.util.dt as date_util
@@ -289,6 +290,14 @@ def async_fire_time_changed(hass, datetime_, fire_all=False):
     """Fire a time changes event."""
     hass.bus.async_fire(EVENT_TIME_CHANGED, {"now": date_util.as_utc(datetime_)})
 
+    timer_wheel = hass.data.get(DATA_TIMER_WHEEL)
+    if timer_wheel is not None:
+        with patch(
+            "homeassistant.helpers.event.time_tracker_utcnow",
+            return_value=date_util.as_utc(datetime_),
+        ):
+            timer_wheel.async_fire_due(datetime_)
+
     for task in list(hass.loop._scheduled):
         if not isinstance(task, asyncio.TimerHandle):
             continue
@@ -0,0 +1,82 @@
+"""The tests for the demo switch component."""
+import asyncio
+
+import pytest
+
+from homeassistant.components.demo import DOMAIN, switch as demo_switch
+from homeassistant.components.demo.switch import DemoSwitch
+from homeassistant.components.switch import (
+    DOMAIN as SWITCH_DOMAIN,
+    SERVICE_TURN_OFF,
+    SERVICE_TURN_ON,
+)
+from homeassistant.const import ATTR_ENTITY_ID, STATE_OFF, STATE_ON
+from homeassistant.setup import async_setup_component
+
+from tests.async_mock import patch
+
+SWITCH_ENTITY_IDS = ["switch.decorative_lights", "switch.ac"]
+
+
+@pytest.fixture(autouse=True)
+async def setup_comp(hass):
+    """Set up demo component."""
+    assert await async_setup_component(
+        hass, SWITCH_DOMAIN, {SWITCH_DOMAIN: {"platform": DOMAIN}}
+    )
+    await hass.async_block_till_done()
+
+
+async def test_batch_service(hass):
+    """Test all demo switches are switched in one request."""
+    with patch(
+        "homeassistant.components.demo.switch.async_batch_entity_service",
+        wraps=demo_switch.async_batch_entity_service,
+    ) as batch_mock:
+        results = await hass.services.async_call_many(
+            [
+                (SWITCH_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: entity_id})
+                for entity_id in SWITCH_ENTITY_IDS
+            ]
+        )
+        await hass.async_block_till_done()
+
+    assert batch_mock.call_count == 1
+
+    assert results == [{entity_id: True} for entity_id in SWITCH_ENTITY_IDS]
+    for entity_id in SWITCH_ENTITY_IDS:
+        assert hass.states.get(entity_id).state == STATE_ON
+
+    await hass.services.async_call(
+        SWITCH_DOMAIN,
+        SERVICE_TURN_OFF,
+        {ATTR_ENTITY_ID: SWITCH_ENTITY_IDS},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+    for entity_id in SWITCH_ENTITY_IDS:
+        assert hass.states.get(entity_id).state == STATE_OFF
+
+
+async def test_batch_service_switches_concurrently(hass):
+    """Test the switches of a batch are switched at the same time."""
+    started = []
+    all_started = asyncio.Event()
+
+    async def turn_on(entity, **kwargs):
+        started.append(entity.entity_id)
+        if len(started) == len(SWITCH_ENTITY_IDS):
+            all_started.set()
+        # Switching one after another would never see all switches start
+        await asyncio.wait_for(all_started.wait(), 1)
+
+    with patch.object(DemoSwitch, "async_turn_on", turn_on):
+        results = await hass.services.async_call_many(
+            [
+                (SWITCH_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: entity_id})
+                for entity_id in SWITCH_ENTITY_IDS
+            ]
+        )
+
+    assert sorted(started) == sorted(SWITCH_ENTITY_IDS)
+    assert results == [{entity_id: True} for entity_id in SWITCH_ENTITY_IDS]
@@ -1008,3 +1008,227 @@ async def test_entity_ids_limit_via_api_with_skip_initial_state(hass, hass_clien
     assert len(response_json) == 2
     assert response_json[0][0]["entity_id"] == "light.kitchen"
     assert response_json[1][0]["entity_id"] == "light.cow"
+
+
+async def test_fetch_period_api_with_resolution(hass, hass_client):
+    """Test numeric sensors are served from statistics with a resolution."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    for value in ("10", "20", "30"):
+        hass.states.async_set("sensor.temperature", value, {"unit_of_measurement": "W"})
+    hass.states.async_set("light.kitchen", "on")
+    await hass.async_block_till_done()
+
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}",
+        params={
+            "filter_entity_id": "sensor.temperature,light.kitchen",
+            "resolution": "hour",
+        },
+    )
+    assert response.status == 200
+    response_json = await response.json()
+    assert len(response_json) == 2
+
+    sensor_states, light_states = response_json
+    assert len(sensor_states) == 1
+    assert sensor_states[0]["entity_id"] == "sensor.temperature"
+    assert sensor_states[0]["state"] == "20.0"
+    assert sensor_states[0]["attributes"] == {
+        "unit_of_measurement": "W",
+        "min": 10.0,
+        "max": 30.0,
+    }
+    assert [state["state"] for state in light_states] == ["on"]
+
+    # Short ranges are served from the states
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}",
+        params={"filter_entity_id": "sensor.temperature", "resolution": "auto"},
+    )
+    response_json = await response.json()
+    assert [state["state"] for state in response_json[0]] == ["10", "20", "30"]
+
+    # Without entity ids the states of the sensor are not queried
+    with patch(
+        "homeassistant.components.history._significant_states_query",
+        wraps=history._significant_states_query,
+    ) as query_mock:
+        response = await client.get(
+            f"/api/history/period/{start.isoformat()}", params={"resolution": "hour"}
+        )
+    response_json = await response.json()
+    assert sorted(states[0]["entity_id"] for states in response_json) == [
+        "light.kitchen",
+        "sensor.temperature",
+    ]
+    assert query_mock.call_args[0][-1] == ["sensor.temperature"]
+
+    # Before the statistics start, the history is made from the states
+    response = await client.get(
+        f"/api/history/period/{(start - timedelta(hours=2)).isoformat()}",
+        params={"filter_entity_id": "sensor.temperature", "resolution": "hour"},
+    )
+    response_json = await response.json()
+    assert [state["state"] for state in response_json[0]] == ["10", "20", "30"]
+
+
+async def test_fetch_period_api_with_resolution_and_filters(hass, hass_client):
+    """Test the statistics of excluded sensors are not served."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(
+        hass,
+        "history",
+        {history.DOMAIN: {history.CONF_EXCLUDE: {"entities": ["sensor.excluded"]}}},
+    )
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow()
+    hass.states.async_set("sensor.excluded", "10", {"unit_of_measurement": "W"})
+    hass.states.async_set("sensor.included", "20", {"unit_of_measurement": "W"})
+    await hass.async_block_till_done()
+
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}", params={"resolution": "hour"}
+    )
+    assert response.status == 200
+    response_json = await response.json()
+    assert [states[0]["entity_id"] for states in response_json] == [
+        "sensor.included"
+    ]
+    assert response_json[0][0]["state"] == "20.0"
+
+async def test_fetch_period_api_with_invalid_resolution(hass, hass_client):
+    """Test the fetch period view rejects unknown resolutions."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    client = await hass_client()
+    response = await client.get("/api/history/period", params={"resolution": "day"})
+    assert response.status == 400
+
+
+async def test_fetch_period_api_streamed(hass, hass_client):
+    """Test streamed history is the same as the full response."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow() - timedelta(hours=1)
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.cow", "on")
+    hass.states.async_set("light.kitchen", "off", {"brightness": 10})
+    hass.states.async_set("light.kitchen", "on")
+    for value in ("10", "20"):
+        hass.states.async_set("sensor.temperature", value, {"unit_of_measurement": "W"})
+    await hass.async_block_till_done()
+
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    for query in (
+        "",
+        "?minimal_response",
+        "?filter_entity_id=light.kitchen,sensor.temperature",
+        "?filter_entity_id=light.kitchen,sensor.temperature&resolution=hour",
+        "?resolution=hour",
+        "?filter_entity_id=light.none",
+    ):
+        url = f"/api/history/period/{start.isoformat()}{query}"
+        response = await client.get(url)
+        assert response.status == 200
+        expected = await response.json()
+
+        separator = "&" if query else "?"
+        # Write a chunk per state
+        with patch("homeassistant.components.history.STREAM_CHUNK_SIZE", 1):
+            response = await client.get(f"{url}{separator}stream")
+        assert response.status == 200
+        assert response.headers["Transfer-Encoding"] == "chunked"
+        streamed = await response.json()
+
+        assert _without_context(streamed) == _without_context(expected)
+
+
+def _without_context(result):
+    """Sort a history result by entity and drop the contexts of its states."""
+    return sorted(
+        (
+            [
+                {key: val for key, val in state.items() if key != "context"}
+                for state in states
+            ]
+            for states in result
+        ),
+        key=lambda states: states[0]["entity_id"],
+    )
+
+
+async def test_fetch_period_api_columnar(hass, hass_client):
+    """Test the columnar history format matches the full response."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    hass.states.async_set("light.cow", "on")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    start = dt_util.utcnow()
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.kitchen", "off", {"brightness": 10})
+    hass.states.async_set("light.kitchen", "on", {"brightness": 10})
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    url = f"/api/history/period/{start.isoformat()}"
+    response = await client.get(url)
+    assert response.status == 200
+    expected = {states[0]["entity_id"]: states for states in await response.json()}
+
+    response = await client.get(f"{url}?format=columnar")
+    assert response.status == 200
+    result = await response.json()
+
+    assert set(result) == {"light.cow", "light.kitchen"}
+    for entity_id, columns in result.items():
+        states = expected[entity_id]
+        assert columns["t"] == [
+            int(dt_util.parse_datetime(state["last_updated"]).timestamp() * 1000)
+            for state in states
+        ]
+        assert columns["s"] == [state["state"] for state in states]
+
+    assert result["light.cow"]["a"] == [[0, {}]]
+    assert result["light.kitchen"]["a"] == [[0, {}], [1, {"brightness": 10}], [3, {}]]
+
+    response = await client.get(
+        f"{url}?format=columnar&filter_entity_id=light.kitchen,light.cow"
+    )
+    assert response.status == 200
+    assert list(await response.json()) == ["light.kitchen", "light.cow"]
+
+
+async def test_fetch_period_api_with_invalid_format(hass, hass_client):
+    """Test the history api rejects unknown formats."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{dt_util.utcnow().isoformat()}?format=csv"
+    )
+    assert response.status == 400
@@ -0,0 +1,129 @@
+"""The tests for the state based trigger index."""
+from homeassistant.components.homeassistant.triggers.index import (
+    async_get_trigger_index,
+)
+from homeassistant.const import MATCH_ALL
+from homeassistant.core import callback
+from homeassistant.helpers import condition
+from homeassistant.helpers.event import TRACK_STATE_CHANGE_CALLBACKS
+
+
+async def test_state_triggers_bucketed_by_value(hass):
+    """Test state triggers only run for the values they match."""
+    index = async_get_trigger_index(hass)
+    calls = []
+
+    def attach(name, from_state, to_state, attribute=None):
+        @callback
+        def action(event):
+            calls.append(name)
+
+        return index.async_attach_state(
+            ["light.Kitchen"], attribute, from_state, to_state, action
+        )
+
+    attach("any", MATCH_ALL, MATCH_ALL)
+    attach("to_on", MATCH_ALL, "on")
+    attach("off_to_on", "off", "on")
+    remove = attach("to_dim", MATCH_ALL, ["dim", "off"])
+    attach("brightness", MATCH_ALL, [10, 20], attribute="brightness")
+
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+    assert calls == ["any", "to_dim"]
+
+    calls.clear()
+    hass.states.async_set("light.kitchen", "on", {"brightness": 10})
+    await hass.async_block_till_done()
+    assert calls == ["any", "to_on", "off_to_on", "brightness"]
+
+    calls.clear()
+    remove()
+    hass.states.async_set("light.kitchen", "dim", {"brightness": 30})
+    await hass.async_block_till_done()
+    assert calls == ["any"]
+
+
+async def test_numeric_state_triggers_by_threshold(hass):
+    """Test numeric_state triggers are only checked when crossing thresholds."""
+    index = async_get_trigger_index(hass)
+    checks = []
+    calls = []
+
+    def attach(name, below, above, armed=True):
+        @callback
+        def check(entity_id, from_s, to_s):
+            checks.append(name)
+            return condition.async_numeric_state(hass, to_s, below, above)
+
+        @callback
+        def action(event):
+            calls.append(name)
+            return armed
+
+        return index.async_attach_numeric_state(
+            ["sensor.temperature"], None, below, above, None, check, action
+        )
+
+    attach("below_10", 10, None)
+    attach("above_20", None, 20)
+    attach("between", 30, 25)
+    attach("unarmed", None, 0, armed=False)
+
+    # Every trigger is checked against the first value
+    hass.states.async_set("sensor.temperature", 5)
+    await hass.async_block_till_done()
+    assert sorted(checks) == ["above_20", "below_10", "between", "unarmed"]
+    assert calls == ["below_10", "unarmed"]
+
+    # No threshold crossed, only the trigger that was not armed is checked
+    checks.clear()
+    calls.clear()
+    hass.states.async_set("sensor.temperature", 6)
+    await hass.async_block_till_done()
+    assert checks == ["unarmed"]
+    assert calls == ["unarmed"]
+
+    checks.clear()
+    calls.clear()
+    hass.states.async_set("sensor.temperature", 26)
+    await hass.async_block_till_done()
+    assert sorted(checks) == ["above_20", "below_10", "between", "unarmed"]
+    assert calls == ["above_20", "between", "unarmed"]
+
+    # Values that are not numbers are passed to every trigger
+    checks.clear()
+    calls.clear()
+    hass.states.async_set("sensor.temperature", "unavailable")
+    await hass.async_block_till_done()
+    assert sorted(checks) == ["above_20", "below_10", "between", "unarmed"]
+    assert calls == []
+
+    checks.clear()
+    hass.states.async_set("sensor.temperature", 27)
+    await hass.async_block_till_done()
+    assert calls == ["above_20", "between", "unarmed"]
+
+
+async def test_remove_last_trigger_stops_listening(hass):
+    """Test the index stops listening for entities without triggers."""
+    index = async_get_trigger_index(hass)
+    remove_state = index.async_attach_state(
+        ["sensor.temperature"], None, MATCH_ALL, MATCH_ALL, lambda event: None
+    )
+    remove_numeric = index.async_attach_numeric_state(
+        ["sensor.temperature"],
+        "humidity",
+        10,
+        None,
+        None,
+        lambda entity_id, from_s, to_s: False,
+        lambda event: True,
+    )
+    assert "sensor.temperature" in hass.data[TRACK_STATE_CHANGE_CALLBACKS]
+
+    remove_state()
+    assert "sensor.temperature" in hass.data[TRACK_STATE_CHANGE_CALLBACKS]
+
+    remove_numeric()
+    assert "sensor.temperature" not in hass.data[TRACK_STATE_CHANGE_CALLBACKS]
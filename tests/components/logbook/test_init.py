@@ -27,6 +27,7 @@ from homeassistant.const import (
     EVENT_HOMEASSISTANT_STARTED,
     EVENT_HOMEASSISTANT_STOP,
     EVENT_STATE_CHANGED,
+    MATCH_ALL,
     STATE_OFF,
     STATE_ON,
 )
@@ -1693,3 +1694,146 @@ class MockLazyEventPartialState(ha.Event):
     def time_fired_isoformat(self):
         """Time event was fired in utc isoformat."""
         return process_timestamp_to_utc_isoformat(self.time_fired)
+
+
+async def test_buffer_keeps_logbook_events(hass):
+    """Test the buffer keeps the events the database query returns."""
+    hass.data[logbook.DOMAIN] = {}
+    buffer = logbook.LogbookBuffer(hass, None)
+    hass.bus.async_listen(
+        MATCH_ALL, buffer.async_handle_event, event_filter=buffer.async_event_filter
+    )
+    context = ha.Context()
+
+    hass.states.async_set("light.kitchen", STATE_ON)
+    hass.states.async_set("light.kitchen", STATE_OFF, context=context)
+    hass.states.async_set("light.kitchen", STATE_OFF, {"brightness": 10})
+    hass.states.async_set("sensor.power", "10", {"unit_of_measurement": "W"})
+    hass.states.async_set("sensor.power", "20", {"unit_of_measurement": "W"})
+    hass.bus.async_fire(EVENT_CALL_SERVICE, {ATTR_DOMAIN: "light"}, context=context)
+    logbook.async_log_entry(hass, "Alarm", "is triggered", "switch")
+    await hass.async_block_till_done()
+
+    assert [(event.event_type, event.entity_id) for event in buffer.events] == [
+        (EVENT_STATE_CHANGED, "light.kitchen"),
+        (logbook.EVENT_LOGBOOK_ENTRY, None),
+    ]
+    assert buffer.context_lookup[context.id] is buffer.events[0]
+
+    entries = list(
+        logbook.humanify(
+            hass,
+            logbook._filter_buffered_events(hass, buffer.events, None, None, False),
+            buffer.entity_attr_cache,
+            buffer.context_lookup,
+        )
+    )
+    assert [entry["name"] for entry in entries] == ["kitchen", "Alarm"]
+
+    entries = list(
+        logbook._filter_buffered_events(
+            hass, buffer.events, ["light.kitchen"], None, False
+        )
+    )
+    assert [event.entity_id for event in entries] == ["light.kitchen"]
+
+
+async def test_buffer_coverage(hass):
+    """Test only periods after the oldest dropped event are served."""
+    hass.data[logbook.DOMAIN] = {}
+    start = dt_util.utcnow()
+    with patch("homeassistant.components.logbook.BUFFER_SIZE", 2):
+        buffer = logbook.LogbookBuffer(hass, None)
+    hass.bus.async_listen(
+        MATCH_ALL, buffer.async_handle_event, event_filter=buffer.async_event_filter
+    )
+    end = start + timedelta(days=1)
+
+    assert buffer.async_get_events(start - timedelta(seconds=1), end) is None
+    assert buffer.async_get_events(buffer.start, end) == []
+
+    hass.states.async_set("light.kitchen", STATE_ON)
+    for state in (STATE_OFF, STATE_ON, STATE_OFF):
+        hass.states.async_set("light.kitchen", state)
+        await hass.async_block_till_done()
+
+    # The first state change was dropped
+    first, second = buffer.events
+    assert buffer.start > start
+    assert buffer.async_get_events(start, end) is None
+    assert buffer.async_get_events(buffer.start, end) == [first, second]
+    assert buffer.async_get_events(buffer.start, second.time_fired) == [first]
+
+
+
+async def test_buffer_context_lookup_bounded(hass):
+    """Test the context lookup is bounded on its own."""
+    hass.data[logbook.DOMAIN] = {}
+    buffer = logbook.LogbookBuffer(hass, None)
+    hass.bus.async_listen(
+        MATCH_ALL, buffer.async_handle_event, event_filter=buffer.async_event_filter
+    )
+    times = [buffer.start + timedelta(seconds=sec) for sec in range(1, 4)]
+    contexts = [ha.Context() for _ in times]
+
+    with patch("homeassistant.components.logbook.CONTEXT_LOOKUP_SIZE", 2):
+        for time_fired, context in zip(times, contexts):
+            hass.bus.async_fire(
+                EVENT_CALL_SERVICE,
+                {ATTR_DOMAIN: "light"},
+                context=context,
+                time_fired=time_fired,
+            )
+            await hass.async_block_till_done()
+
+    assert list(buffer.context_lookup) == [contexts[1].id, contexts[2].id]
+    assert not buffer.events
+    # Events of periods that lost their context are read from the database
+    assert buffer.start == times[0]
+
+
+async def test_buffer_event_filter(hass):
+    """Test only event types that can show up in the logbook are handled."""
+    hass.data[logbook.DOMAIN] = {"custom_event": None}
+    buffer = logbook.LogbookBuffer(hass, None)
+
+    def keep(event_type):
+        return buffer.async_event_filter(ha.Event(event_type))
+
+    assert keep(EVENT_STATE_CHANGED)
+    assert keep(EVENT_CALL_SERVICE)
+    assert keep(logbook.EVENT_LOGBOOK_ENTRY)
+    assert keep("custom_event")
+    assert not keep("other_event")
+
+async def test_subscribe(hass, hass_ws_client):
+    """Test new logbook entries are pushed to subscribers."""
+    hass.data[logbook.DOMAIN] = {}
+    buffer = hass.data[logbook.DATA_BUFFER] = logbook.LogbookBuffer(hass, None)
+    hass.bus.async_listen(
+        MATCH_ALL, buffer.async_handle_event, event_filter=buffer.async_event_filter
+    )
+    hass.components.websocket_api.async_register_command(logbook.websocket_subscribe)
+    hass.states.async_set("light.kitchen", STATE_ON)
+    hass.states.async_set("light.cow", STATE_ON)
+
+    client = await hass_ws_client(hass)
+    await client.send_json(
+        {"id": 5, "type": "logbook/subscribe", "entity_ids": ["light.kitchen"]}
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+
+    hass.states.async_set("light.cow", STATE_OFF)
+    hass.states.async_set("light.kitchen", STATE_OFF)
+    msg = await client.receive_json()
+    assert msg["id"] == 5
+    assert msg["type"] == "event"
+    assert [(entry["entity_id"], entry["state"]) for entry in msg["event"]] == [
+        ("light.kitchen", STATE_OFF)
+    ]
+
+    await client.send_json({"id": 6, "type": "unsubscribe_events", "subscription": 5})
+    msg = await client.receive_json()
+    assert msg["success"]
+    assert not buffer._listeners
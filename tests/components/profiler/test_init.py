@@ -1,19 +1,23 @@
 """Test the Profiler config flow."""
+import asyncio
 from datetime import timedelta
 import os
 
 from homeassistant import setup
 from homeassistant.components.profiler import (
+    CONF_COUNT,
     CONF_SCAN_INTERVAL,
     CONF_SECONDS,
     CONF_TYPE,
     SERVICE_DUMP_LOG_OBJECTS,
+    SERVICE_JOBS,
     SERVICE_MEMORY,
     SERVICE_START,
     SERVICE_START_LOG_OBJECTS,
     SERVICE_STOP_LOG_OBJECTS,
 )
 from homeassistant.components.profiler.const import DOMAIN
+from homeassistant.core import callback
 import homeassistant.util.dt as dt_util
 
 from tests.async_mock import patch
@@ -147,3 +151,107 @@ async def test_dump_log_object(hass, caplog):
 
     assert await hass.config_entries.async_unload(entry.entry_id)
     await hass.async_block_till_done()
+
+
+async def test_job_profile(hass, caplog):
+    """Test the job profile service reports the most expensive jobs."""
+
+    await setup.async_setup_component(hass, "persistent_notification", {})
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert hass.services.has_service(DOMAIN, SERVICE_JOBS)
+
+    @callback
+    def profiled_listener(event):
+        """Listen to test events."""
+
+    hass.bus.async_listen("test_event", profiled_listener)
+
+    async def _fire_events():
+        while hass.job_profiler is None:
+            await asyncio.sleep(0)
+        hass.bus.async_fire("test_event")
+
+    hass.async_create_task(_fire_events())
+    await hass.services.async_call(
+        DOMAIN, SERVICE_JOBS, {CONF_SECONDS: 0.1, CONF_COUNT: 5}
+    )
+    await hass.async_block_till_done()
+
+    assert "Most expensive jobs" in caplog.text
+    assert "profiled_listener" in caplog.text
+    assert hass.job_profiler is None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_subscribe_jobs(hass, hass_ws_client):
+    """Test streaming the most expensive jobs over the websocket."""
+
+    await setup.async_setup_component(hass, "persistent_notification", {})
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json(
+        {"id": 5, "type": "profiler/subscribe_jobs", CONF_SCAN_INTERVAL: 10}
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+    assert hass.job_profiler is not None
+
+    @callback
+    def profiled_listener(event):
+        """Listen to test events."""
+
+    hass.bus.async_listen("test_event", profiled_listener)
+    hass.bus.async_fire("test_event")
+    await hass.async_block_till_done()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=11))
+    msg = await client.receive_json()
+    assert msg["id"] == 5
+    assert msg["type"] == "event"
+    assert any(
+        job["name"].endswith("profiled_listener") and job["calls"] == 1
+        for job in msg["event"]["jobs"]
+    )
+
+    await client.send_json({"id": 6, "type": "unsubscribe_events", "subscription": 5})
+    msg = await client.receive_json()
+    assert msg["success"]
+    assert hass.job_profiler is None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_executor_stats(hass, hass_ws_client):
+    """Test reading the executor pool statistics over the websocket."""
+
+    await setup.async_setup_component(hass, "persistent_notification", {})
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    await hass.async_add_pool_executor_job("db", lambda: None)
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "profiler/executor_stats"})
+    msg = await client.receive_json()
+    assert msg["success"]
+    assert msg["result"]["db"]["completed"] == 1
+    assert msg["result"]["db"]["queued"] == 0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,43 @@
+"""The tests for the recorder bulk writer."""
+from collections import OrderedDict
+
+from homeassistant.components.recorder.bulk import BulkWriter
+from homeassistant.core import Event
+
+from tests.async_mock import MagicMock
+
+
+def _mock_session(dialect, max_id):
+    """Return a mock session of a database with rows up to max_id."""
+    session = MagicMock()
+    session.bind.dialect.name = dialect
+    session.query.return_value.scalar.return_value = max_id
+    return session
+
+
+def test_advance_postgresql_sequences():
+    """Test the id sequences are advanced past ids assigned on PostgreSQL."""
+    session = _mock_session("postgresql", 41)
+    writer = BulkWriter(OrderedDict(), 10)
+    writer.setup(session)
+    writer.add_event(Event("test_event"))
+    writer.add_event(Event("test_event"))
+
+    writer.write(session)
+
+    setval_calls = [
+        call[1][1] for call in session.execute.mock_calls if "setval" in str(call[1][0])
+    ]
+    assert setval_calls == [{"table": "events", "column": "event_id", "id": 43}]
+
+
+def test_no_sequences_on_sqlite():
+    """Test other databases do not advance sequences."""
+    session = _mock_session("sqlite", 41)
+    writer = BulkWriter(OrderedDict(), 10)
+    writer.setup(session)
+    writer.add_event(Event("test_event"))
+
+    writer.write(session)
+
+    assert len(session.execute.mock_calls) == 1
@@ -0,0 +1,123 @@
+"""The tests for the recorder journal."""
+import json
+
+from homeassistant.components.recorder.journal import RecorderJournal
+from homeassistant.const import ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED
+from homeassistant.core import Context, Event, State
+import homeassistant.util.dt as dt_util
+
+from tests.async_mock import patch
+
+
+def _state_changed_event(state):
+    """Return a state changed event for a new state."""
+    return Event(
+        EVENT_STATE_CHANGED,
+        {"entity_id": state.entity_id, "old_state": None, "new_state": state},
+        context=state.context,
+    )
+
+
+def test_journal_replay(tmp_path):
+    """Test events are replayed in order."""
+    journal = RecorderJournal(str(tmp_path / "journal"))
+
+    assert not journal.append(Event("test_event"), False)
+    assert journal.replay(10) == []
+
+    events = [
+        Event("test_event", {"number": number}, context=Context(user_id="abc"))
+        for number in range(5)
+    ]
+    assert journal.append(events[0], True)
+    for event in events[1:]:
+        assert journal.append(event, False)
+    assert journal.pending == 5
+
+    assert journal.replay(3) == events[:3]
+    assert journal.pending == 2
+    assert journal.replay(3) == events[3:]
+    assert journal.pending == 0
+    assert not (tmp_path / "journal").exists()
+
+
+def test_journal_written_by_flush(tmp_path):
+    """Test appending only buffers events until they are flushed."""
+    path = tmp_path / "journal"
+    journal = RecorderJournal(str(path))
+    events = [Event("test_event", {"number": number}) for number in range(2)]
+
+    journal.append(events[0], True)
+    assert journal.async_flush_needed()
+    journal.append(events[1], False)
+    assert not journal.async_flush_needed()
+    assert not path.exists()
+
+    journal.flush()
+    assert path.read_text().splitlines() == [event.as_json() for event in events]
+    assert not journal.async_flush_needed()
+    assert journal.replay(10) == events
+
+
+def test_journal_shares_event_json(tmp_path):
+    """Test events already serialized are not serialized again."""
+    journal = RecorderJournal(str(tmp_path / "journal"))
+    event = Event("test_event", {"number": 1})
+
+    with patch("homeassistant.core.json.dumps", wraps=json.dumps) as dumps_mock:
+        event.as_json()
+        journal.append(event, True)
+
+    assert dumps_mock.call_count == 1
+
+
+def test_journal_time_changed(tmp_path):
+    """Test time changed events are restored with their time."""
+    journal = RecorderJournal(str(tmp_path / "journal"))
+    now = dt_util.utcnow()
+    event = Event(EVENT_TIME_CHANGED, {ATTR_NOW: now}, time_fired=now)
+
+    journal.append(event, True)
+
+    assert journal.replay(1)[0].data == {ATTR_NOW: now}
+
+
+def test_journal_state_changed(tmp_path):
+    """Test state changed events are restored with their states."""
+    journal = RecorderJournal(str(tmp_path / "journal"))
+    event = _state_changed_event(State("sensor.one", "on", {"unit": "W"}))
+
+    journal.append(event, True)
+    replayed = journal.replay(1)[0]
+
+    assert replayed == event
+    assert replayed.data["new_state"] == event.data["new_state"]
+    assert replayed.data["old_state"] is None
+
+
+def test_journal_kept_for_next_run(tmp_path):
+    """Test pending events survive closing the journal."""
+    path = str(tmp_path / "journal")
+    journal = RecorderJournal(path)
+    events = [Event("test_event", {"number": number}) for number in range(3)]
+    for event in events:
+        journal.append(event, True)
+    journal.replay(1)
+    journal.close()
+
+    journal = RecorderJournal(path)
+    journal.load()
+    assert journal.pending == 2
+    assert journal.replay(10) == events[1:]
+
+
+def test_journal_skips_invalid_entries(tmp_path, caplog):
+    """Test damaged journal entries are skipped."""
+    path = tmp_path / "journal"
+    path.write_text('{"event_type": "test_event"\n')
+    journal = RecorderJournal(str(path))
+    journal.load()
+
+    assert journal.replay(10) == []
+    assert journal.pending == 0
+    assert "Skipping invalid journal entry" in caplog.text
@@ -3,8 +3,17 @@ from datetime import datetime, timedelta
 import json
 
 from homeassistant.components import recorder
+from homeassistant.components.recorder import purge
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.models import Events, RecorderRuns, States
+from homeassistant.components.recorder.models import (
+    Events,
+    RecorderRuns,
+    StateAttributes,
+    States,
+    StateSnapshots,
+    Statistics,
+    process_timestamp,
+)
 from homeassistant.components.recorder.purge import purge_old_data
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.util import dt as dt_util
@@ -20,7 +29,9 @@ def test_purge_old_states(hass, hass_recorder):
     _add_test_states(hass)
 
     # make sure we start with 6 states
-    with session_scope(hass=hass) as session:
+    with session_scope(hass=hass) as session, patch(
+        "homeassistant.components.recorder.purge.MAX_ROWS_TO_PURGE", 2
+    ):
         states = session.query(States)
         assert states.count() == 6
 
@@ -43,7 +54,9 @@ def test_purge_old_events(hass, hass_recorder):
     hass = hass_recorder()
     _add_test_events(hass)
 
-    with session_scope(hass=hass) as session:
+    with session_scope(hass=hass) as session, patch(
+        "homeassistant.components.recorder.purge.MAX_ROWS_TO_PURGE", 2
+    ):
         events = session.query(Events).filter(Events.event_type.like("EVENT_TEST%"))
         assert events.count() == 6
 
@@ -123,11 +136,241 @@ def test_purge_method(hass, hass_recorder):
             hass.data[DATA_INSTANCE].block_till_done()
             wait_recording_done(hass)
             assert (
-                mock_logger.debug.mock_calls[5][1][0]
+                mock_logger.debug.mock_calls[6][1][0]
                 == "Vacuuming SQL DB to free space"
             )
 
 
+def test_purge_in_chunks(hass, hass_recorder):
+    """Test the purge service keeps purging chunks until it is done."""
+    hass = hass_recorder()
+    _add_test_events(hass)
+    _add_test_states(hass)
+
+    with patch(
+        "homeassistant.components.recorder.purge.MAX_ROWS_TO_PURGE", 1
+    ), patch(
+        "homeassistant.components.recorder.purge._purge_rows",
+        wraps=purge._purge_rows,
+    ) as purge_mock:
+        hass.services.call("recorder", "purge", service_data={"keep_days": 4})
+        hass.block_till_done()
+        # Each unfinished purge is queued again behind the waiting task
+        for _ in range(5):
+            hass.data[DATA_INSTANCE].block_till_done()
+
+    # Both tables are purged in one chunk per old row and a final one
+    assert len(purge_mock.mock_calls) == 10
+
+    with session_scope(hass=hass) as session:
+        assert session.query(States).count() == 2
+        events = session.query(Events).filter(Events.event_type.like("EVENT_TEST%"))
+        assert events.count() == 2
+
+
+def test_purge_chunk_of_rows_at_same_time(hass, hass_recorder):
+    """Test a chunk is bounded when many rows share a point in time."""
+    hass = hass_recorder()
+    wait_recording_done(hass)
+    eleven_days_ago = datetime.now() - timedelta(days=11)
+
+    with session_scope(hass=hass) as session:
+        for _ in range(5):
+            session.add(
+                States(
+                    entity_id="test.recorder2",
+                    domain="sensor",
+                    state="autopurgeme",
+                    attributes="{}",
+                    last_changed=eleven_days_ago,
+                    last_updated=eleven_days_ago,
+                    created=eleven_days_ago,
+                )
+            )
+            session.add(
+                Events(
+                    event_type="EVENT_TEST_PURGE",
+                    event_data="{}",
+                    origin="LOCAL",
+                    created=eleven_days_ago,
+                    time_fired=eleven_days_ago,
+                )
+            )
+
+    with session_scope(hass=hass) as session, patch(
+        "homeassistant.components.recorder.purge.MAX_ROWS_TO_PURGE", 2
+    ):
+        states = session.query(States).filter_by(state="autopurgeme")
+        events = session.query(Events).filter_by(event_type="EVENT_TEST_PURGE")
+
+        assert not purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        assert states.count() == 3
+        assert events.count() == 3
+
+        assert not purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        assert states.count() == 1
+        assert events.count() == 1
+
+        assert purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        assert states.count() == 0
+        assert events.count() == 0
+
+
+def test_purge_keeps_attributes_id_cache_until_done(hass, hass_recorder):
+    """Test the attributes id cache is only cleared once purging is done."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    instance._state_attributes_ids["{}"] = 1
+    cached = []
+
+    def purge_chunk(instance, purge_days, repack):
+        cached.append("{}" in instance._state_attributes_ids)
+        return len(cached) == 2
+
+    with patch(
+        "homeassistant.components.recorder.purge.purge_old_data",
+        side_effect=purge_chunk,
+    ):
+        hass.services.call("recorder", "purge", service_data={"keep_days": 4})
+        hass.block_till_done()
+        for _ in range(2):
+            instance.block_till_done()
+
+    assert cached == [True, True]
+    assert "{}" not in instance._state_attributes_ids
+
+
+def test_purge_keeps_events_of_remaining_states(hass, hass_recorder):
+    """Test events are not purged ahead of the states referencing them."""
+    hass = hass_recorder()
+    hass.data[DATA_INSTANCE].block_till_done()
+    wait_recording_done(hass)
+    eleven_days_ago = datetime.now() - timedelta(days=11)
+
+    with session_scope(hass=hass) as session:
+        event = Events(
+            event_type="EVENT_TEST_PURGE",
+            event_data="{}",
+            origin="LOCAL",
+            created=eleven_days_ago + timedelta(seconds=2),
+            time_fired=eleven_days_ago + timedelta(seconds=2),
+        )
+        session.add(event)
+        session.flush()
+        for seconds in range(3):
+            timestamp = eleven_days_ago + timedelta(seconds=seconds)
+            session.add(
+                States(
+                    entity_id="test.recorder2",
+                    domain="sensor",
+                    state="autopurgeme",
+                    attributes="{}",
+                    last_changed=timestamp,
+                    last_updated=timestamp,
+                    created=timestamp,
+                    event_id=event.event_id,
+                )
+            )
+
+    with session_scope(hass=hass) as session, patch(
+        "homeassistant.components.recorder.purge.MAX_ROWS_TO_PURGE", 2
+    ):
+        events = session.query(Events).filter_by(event_type="EVENT_TEST_PURGE")
+        assert not purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        assert session.query(States).count() == 1
+        assert events.count() == 1
+
+        assert purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        assert session.query(States).count() == 0
+        assert events.count() == 0
+
+
+def test_purge_unused_state_attributes(hass, hass_recorder):
+    """Test attributes are only deleted when no state uses them anymore."""
+    hass = hass_recorder()
+    now = datetime.now()
+    eleven_days_ago = now - timedelta(days=11)
+
+    with recorder.session_scope(hass=hass) as session:
+        shared = StateAttributes(hash=1, shared_attrs='{"shared": true}')
+        unused = StateAttributes(hash=2, shared_attrs='{"unused": true}')
+        for timestamp, state_attributes in (
+            (eleven_days_ago, shared),
+            (eleven_days_ago, unused),
+            (now, shared),
+        ):
+            session.add(
+                States(
+                    entity_id="test.recorder2",
+                    domain="sensor",
+                    state="on",
+                    state_attributes=state_attributes,
+                    last_changed=timestamp,
+                    last_updated=timestamp,
+                    created=timestamp,
+                )
+            )
+
+    with session_scope(hass=hass) as session:
+        assert session.query(StateAttributes).count() == 2
+
+        while not purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False):
+            pass
+
+        assert session.query(States).count() == 1
+        attributes = session.query(StateAttributes).all()
+        assert len(attributes) == 1
+        assert attributes[0].shared_attrs == '{"shared": true}'
+
+
+def test_purge_old_statistics(hass, hass_recorder):
+    """Test only old 5-minute statistics are purged."""
+    hass = hass_recorder()
+    eleven_days_ago = dt_util.utcnow() - timedelta(days=11)
+
+    with recorder.session_scope(hass=hass) as session:
+        for period, start in (
+            (300, eleven_days_ago),
+            (300, dt_util.utcnow()),
+            (3600, eleven_days_ago),
+        ):
+            session.add(
+                Statistics(entity_id="sensor.power", period=period, start=start)
+            )
+
+    with session_scope(hass=hass) as session:
+        assert purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+
+        statistics = session.query(Statistics).order_by(Statistics.period)
+        assert [row.period for row in statistics] == [300, 3600]
+
+
+def test_purge_old_state_snapshots(hass, hass_recorder):
+    """Test the latest snapshot before the purged states is kept."""
+    hass = hass_recorder()
+    now = dt_util.utcnow()
+
+    with recorder.session_scope(hass=hass) as session:
+        session.query(StateSnapshots).delete()
+        for days in (11, 5, 0):
+            session.add(
+                StateSnapshots(
+                    start=now - timedelta(days=days),
+                    entity_id="light.kitchen",
+                    state_id=1,
+                )
+            )
+
+    with session_scope(hass=hass) as session:
+        assert purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+
+        snapshots = session.query(StateSnapshots).order_by(StateSnapshots.start)
+        assert [process_timestamp(row.start) for row in snapshots] == [
+            now - timedelta(days=5),
+            now,
+        ]
+
+
 def _add_test_states(hass):
     """Add multiple states to the db for testing."""
     now = datetime.now()
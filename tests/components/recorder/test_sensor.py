@@ -0,0 +1,25 @@
+"""The tests for the recorder sensors."""
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.setup import setup_component
+
+from tests.components.recorder.common import wait_recording_done
+
+
+def test_recorder_sensors(hass_recorder):
+    """Test the recorder sensors report the queue."""
+    hass = hass_recorder({"max_queue_size": 0})
+    hass.states.set("sensor.one", "1")
+    hass.states.set("sensor.one", "2")
+    wait_recording_done(hass)
+
+    assert setup_component(hass, "sensor", {"sensor": {"platform": "recorder"}})
+    hass.block_till_done()
+
+    # Setting up the sensors also dropped the state changes they made
+    state = hass.states.get("sensor.recorder_dropped_events")
+    assert 2 <= int(state.state) < hass.data[DATA_INSTANCE].dropped_events
+    assert state.attributes["unit_of_measurement"] == "events"
+    assert hass.states.get("sensor.recorder_queue_depth").state == "0"
+    assert hass.states.get("sensor.recorder_lag").state == "0"
+    assert hass.states.get("sensor.recorder_journaled_events").state == "0"
+
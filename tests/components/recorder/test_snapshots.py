@@ -0,0 +1,146 @@
+"""The tests for the recorder state snapshots."""
+from datetime import timedelta
+
+from homeassistant.components.recorder.models import States, StateSnapshots
+from homeassistant.components.recorder.snapshots import last_state_ids, write_snapshot
+from homeassistant.components.recorder.util import session_scope
+import homeassistant.util.dt as dt_util
+
+
+def _add_state(session, entity_id, state, time):
+    """Add a state to the database and return its id."""
+    dbstate = States(
+        entity_id=entity_id,
+        domain=entity_id.split(".")[0],
+        state=state,
+        last_changed=time,
+        last_updated=time,
+    )
+    session.add(dbstate)
+    session.flush()
+    return dbstate.state_id
+
+
+def test_write_snapshot(hass_recorder):
+    """Test a snapshot holds the last state of each entity before its start."""
+    hass = hass_recorder()
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    hour_ago = start - timedelta(hours=1)
+
+    with session_scope(hass=hass) as session:
+        session.query(StateSnapshots).delete()
+        _add_state(session, "light.kitchen", "on", hour_ago)
+        kitchen_id = _add_state(session, "light.kitchen", "off", hour_ago)
+        cow_id = _add_state(session, "light.cow", "on", hour_ago)
+        _add_state(session, "light.cow", "off", start)
+
+    with session_scope(hass=hass) as session:
+        write_snapshot(session, start)
+        # A snapshot is only written once
+        write_snapshot(session, start)
+
+    with session_scope(hass=hass) as session:
+        snapshot = {
+            row.entity_id: row.state_id
+            for row in session.query(StateSnapshots).filter(
+                StateSnapshots.start == start
+            )
+        }
+    assert snapshot == {"light.kitchen": kitchen_id, "light.cow": cow_id}
+
+
+def test_last_state_ids_since_snapshot(hass_recorder):
+    """Test the last states are found from the snapshot and the later states."""
+    hass = hass_recorder()
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    hour_ago = start - timedelta(hours=1)
+    point_in_time = start + timedelta(minutes=30)
+
+    with session_scope(hass=hass) as session:
+        session.query(StateSnapshots).delete()
+        kitchen_id = _add_state(session, "light.kitchen", "on", hour_ago)
+        old_cow_id = _add_state(session, "light.cow", "on", hour_ago)
+        cow_id = _add_state(session, "light.cow", "off", start)
+        _add_state(session, "light.cow", "on", point_in_time)
+
+    with session_scope(hass=hass) as session:
+        write_snapshot(session, start)
+
+    with session_scope(hass=hass) as session:
+        # States before the snapshot are not looked at
+        attic_id = _add_state(session, "light.attic", "on", hour_ago)
+
+    with session_scope(hass=hass) as session:
+        result = dict(last_state_ids(session, point_in_time))
+        assert result == {"light.kitchen": kitchen_id, "light.cow": cow_id}
+
+        result = dict(last_state_ids(session, point_in_time, ["light.cow"]))
+        assert result == {"light.cow": cow_id}
+
+        # Without a snapshot all states are searched
+        result = dict(last_state_ids(session, hour_ago + timedelta(minutes=1)))
+        assert result == {
+            "light.kitchen": kitchen_id,
+            "light.cow": old_cow_id,
+            "light.attic": attic_id,
+        }
+
+
+def test_last_state_ids_by_last_updated(hass_recorder):
+    """Test the last state is the one updated last, not the one added last."""
+    hass = hass_recorder()
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    hour_ago = start - timedelta(hours=1)
+    point_in_time = start + timedelta(minutes=30)
+
+    with session_scope(hass=hass) as session:
+        session.query(StateSnapshots).delete()
+        kitchen_id = _add_state(session, "light.kitchen", "on", hour_ago)
+        cow_id = _add_state(session, "light.cow", "on", start)
+        # Recorded late, for example replayed from the journal
+        _add_state(session, "light.kitchen", "off", hour_ago - timedelta(minutes=1))
+        old_cow_id = _add_state(session, "light.cow", "off", hour_ago)
+        # Updated at the same time, the last recorded one wins
+        tie_id = _add_state(session, "light.cow", "unknown", start)
+
+    with session_scope(hass=hass) as session:
+        result = dict(last_state_ids(session, start))
+        assert result == {"light.kitchen": kitchen_id, "light.cow": old_cow_id}
+
+        write_snapshot(session, start + timedelta(minutes=1))
+
+    with session_scope(hass=hass) as session:
+        result = dict(last_state_ids(session, point_in_time))
+        assert result == {"light.kitchen": kitchen_id, "light.cow": tie_id}
+        assert tie_id > cow_id
+
+
+def test_last_state_ids_since(hass_recorder):
+    """Test states and snapshots before since are not looked at."""
+    hass = hass_recorder()
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    hour_ago = start - timedelta(hours=1)
+    since = hour_ago + timedelta(minutes=30)
+    point_in_time = start + timedelta(minutes=30)
+
+    with session_scope(hass=hass) as session:
+        session.query(StateSnapshots).delete()
+        _add_state(session, "light.kitchen", "on", hour_ago)
+        cow_id = _add_state(session, "light.cow", "on", since)
+
+    with session_scope(hass=hass) as session:
+        # An older snapshot is not used
+        write_snapshot(session, hour_ago)
+        result = dict(last_state_ids(session, point_in_time, since=since))
+        assert result == {"light.cow": cow_id}
+
+        write_snapshot(session, start, since)
+
+    with session_scope(hass=hass) as session:
+        snapshot = {
+            row.entity_id: row.state_id
+            for row in session.query(StateSnapshots).filter(
+                StateSnapshots.start == start
+            )
+        }
+        assert snapshot == {"light.cow": cow_id}
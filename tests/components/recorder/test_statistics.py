@@ -0,0 +1,105 @@
+"""The tests for the recorder statistics."""
+from datetime import datetime, timedelta
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import Statistics
+from homeassistant.components.recorder.statistics import (
+    PERIOD_5MINUTE,
+    PERIOD_HOUR,
+    StatisticsCompiler,
+    period_start,
+)
+from homeassistant.components.recorder.util import session_scope
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, State
+import homeassistant.util.dt as dt_util
+
+from .common import wait_recording_done
+
+
+def _state_changed_event(entity_id, state, attributes, time):
+    """Return a state changed event."""
+    new_state = State(entity_id, state, attributes, time, time)
+    return Event(
+        EVENT_STATE_CHANGED,
+        {"entity_id": entity_id, "old_state": None, "new_state": new_state},
+    )
+
+
+def test_period_start():
+    """Test the start of periods."""
+    time = datetime(2020, 11, 5, 12, 34, 56, tzinfo=dt_util.UTC)
+    assert period_start(time, PERIOD_5MINUTE) == datetime(
+        2020, 11, 5, 12, 30, tzinfo=dt_util.UTC
+    )
+    assert period_start(time, PERIOD_HOUR) == datetime(
+        2020, 11, 5, 12, tzinfo=dt_util.UTC
+    )
+
+
+def test_compile_statistics(hass_recorder):
+    """Test statistics are compiled for numeric sensors with a unit."""
+    hass = hass_recorder()
+    unit = {"unit_of_measurement": "W"}
+
+    hass.states.set("sensor.power", "10", unit)
+    hass.states.set("sensor.power", "30", unit)
+    hass.states.set("sensor.power", "unavailable", unit)
+    hass.states.set("sensor.power", "20", unit)
+    hass.states.set("sensor.count", "5")
+    hass.states.set("binary_sensor.door", "1", unit)
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        statistics = session.query(Statistics).order_by(Statistics.period).all()
+        assert [(row.entity_id, row.period) for row in statistics] == [
+            ("sensor.power", 300),
+            ("sensor.power", 3600),
+        ]
+        for row in statistics:
+            assert (row.min, row.max, row.mean, row.last, row.count) == (
+                10,
+                30,
+                20,
+                20,
+                3,
+            )
+
+
+def test_compile_statistics_over_periods(hass_recorder):
+    """Test values are added to the period they fall in."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    start = datetime(2020, 11, 5, 12, tzinfo=dt_util.UTC)
+    unit = {"unit_of_measurement": "W"}
+
+    with session_scope(hass=hass) as session:
+        compiler = StatisticsCompiler()
+        for minutes, value in ((1, "1"), (6, "2"), (7, "3"), (2, "9")):
+            compiler.add_state(
+                session,
+                _state_changed_event(
+                    "sensor.power", value, unit, start + timedelta(minutes=minutes)
+                ),
+            )
+
+    with session_scope(session=instance.get_session()) as session:
+        # A new compiler continues the statistics in the database
+        compiler = StatisticsCompiler()
+        compiler.add_state(
+            session,
+            _state_changed_event(
+                "sensor.power", "4", unit, start + timedelta(minutes=8)
+            ),
+        )
+
+    with session_scope(hass=hass) as session:
+        statistics = session.query(Statistics).order_by(
+            Statistics.period, Statistics.start
+        )
+        # The late value is only added to the hour it is still current in
+        assert [(row.period, row.count, row.mean) for row in statistics] == [
+            (300, 1, 1),
+            (300, 3, 3),
+            (3600, 5, 3.8),
+        ]
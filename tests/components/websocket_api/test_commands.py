@@ -490,6 +490,44 @@ async def test_render_template_manual_entity_ids_no_longer_needed(
     }
 
 
+async def test_template_stats(hass, websocket_client):
+    """Test render counts and times of tracked templates are reported."""
+    hass.states.async_set("light.test", "on")
+
+    await websocket_client.send_json(
+        {"id": 5, "type": "render_template", "template": "{{ states('light.test') }}"}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+    msg = await websocket_client.receive_json()
+    assert msg["event"]["result"] == "on"
+
+    hass.states.async_set("light.test", "off")
+    msg = await websocket_client.receive_json()
+    assert msg["event"]["result"] == "off"
+
+    await websocket_client.send_json({"id": 6, "type": "template/stats"})
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 6
+    assert msg["type"] == const.TYPE_RESULT
+    assert msg["success"]
+    assert len(msg["result"]) == 1
+    stats = msg["result"][0]
+    assert stats["template"] == "{{ states('light.test') }}"
+    assert stats["renders"] == 3
+    assert stats["time"] > 0
+
+
+async def test_template_stats_requires_admin(websocket_client, hass_admin_user):
+    """Test template stats can only be requested by admins."""
+    hass_admin_user.groups = []
+    await websocket_client.send_json({"id": 5, "type": "template/stats"})
+
+    msg = await websocket_client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == const.ERR_UNAUTHORIZED
+
+
 async def test_render_template_with_error(hass, websocket_client, caplog):
     """Test a template with an error."""
     await websocket_client.send_json(
@@ -90,6 +90,38 @@ async def test_polling_updates_entities_with_exception(hass):
     assert len(update_err) == 1
 
 
+async def test_polling_writes_states_in_one_batch(hass):
+    """Test the polled entities are written to the state machine together."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass, timedelta(seconds=20))
+
+    ent1 = MockEntity(should_poll=True, state="off")
+    ent2 = MockEntity(should_poll=True, state="off")
+
+    await component.async_add_entities([ent1, ent2])
+
+    ent1._values["state"] = "on"
+    ent2._values["state"] = "on"
+
+    batches = []
+
+    @callback
+    def _batch_listener(changes):
+        batches.append(changes)
+
+    hass.states.async_listen_batch(_batch_listener)
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=20))
+    await hass.async_block_till_done()
+
+    assert len(batches) == 1
+    assert {change["entity_id"] for change in batches[0]} == {
+        ent1.entity_id,
+        ent2.entity_id,
+    }
+    assert hass.states.get(ent1.entity_id).state == "on"
+    assert hass.states.get(ent2.entity_id).state == "on"
+
+
 async def test_update_state_adds_entities(hass):
     """Test if updating poll entities cause an entity to be added works."""
     component = EntityComponent(_LOGGER, DOMAIN, hass)
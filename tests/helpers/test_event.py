@@ -10,7 +10,7 @@ import pytest
 from homeassistant.components import sun
 from homeassistant.const import MATCH_ALL
 import homeassistant.core as ha
-from homeassistant.core import callback
+from homeassistant.core import TimeResolution, callback
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.entity_registry import EVENT_ENTITY_REGISTRY_UPDATED
 from homeassistant.helpers.event import (
@@ -18,6 +18,7 @@ from homeassistant.helpers.event import (
     TrackTemplate,
     TrackTemplateResult,
     async_call_later,
+    async_get_template_render_stats,
     async_track_point_in_time,
     async_track_point_in_utc_time,
     async_track_same_state,
@@ -32,6 +33,7 @@ from homeassistant.helpers.event import (
     async_track_template_result,
     async_track_time_change,
     async_track_time_interval,
+    async_track_time_resolution,
     async_track_utc_time_change,
     track_point_in_utc_time,
 )
@@ -1886,6 +1888,148 @@ async def test_string(hass):
     assert refresh_runs == ["no_template"]
 
 
+async def test_track_template_result_dependency_order(hass):
+    """Test templates depending on another template entity render once."""
+    hass.states.async_set("sensor.x", "1")
+    template_sum = Template(
+        "{{ states('sensor.x') | int + states('sensor.double') | int }}", hass
+    )
+    template_double = Template("{{ states('sensor.x') | int * 2 }}", hass)
+
+    sum_runs = []
+
+    @ha.callback
+    def sum_listener(event, updates):
+        sum_runs.append(updates.pop().result)
+
+    @ha.callback
+    def double_listener(event, updates):
+        hass.states.async_set("sensor.double", updates.pop().result)
+
+    # The reader listens first, so it would render first without ordering
+    sum_info = async_track_template_result(
+        hass, [TrackTemplate(template_sum, None)], sum_listener
+    )
+    double_info = async_track_template_result(
+        hass, [TrackTemplate(template_double, None)], double_listener
+    )
+    double_info.async_refresh()
+    sum_info.async_refresh()
+    await hass.async_block_till_done()
+
+    assert sum_runs == [3]
+
+    hass.states.async_set("sensor.x", "2")
+    await hass.async_block_till_done()
+
+    assert sum_runs == [3, 6]
+
+    # State changes of one loop iteration are rendered together by readers
+    hass.states.async_set("sensor.x", "3")
+    hass.states.async_set("sensor.x", "4")
+    await hass.async_block_till_done()
+
+    assert sum_runs == [3, 6, 12]
+
+    stats = async_get_template_render_stats(hass)
+    assert stats[template_sum.template].renders == 4
+    assert stats[template_double.template].renders == 5
+    assert stats[template_sum.template].time > 0
+
+    sum_info.async_remove()
+    assert template_sum.template not in stats
+    assert template_double.template in stats
+    double_info.async_remove()
+    assert not stats
+
+
+async def test_track_template_result_stats_shared_template(hass):
+    """Test render stats are kept until the last tracker of a template is removed."""
+    template_state = Template("{{ states('sensor.test') }}", hass)
+    infos = [
+        async_track_template_result(
+            hass, [TrackTemplate(template_state, None)], lambda *args: None
+        )
+        for _ in range(2)
+    ]
+    stats = async_get_template_render_stats(hass)
+    assert stats[template_state.template].renders == 2
+
+    infos[0].async_remove()
+    assert stats[template_state.template].renders == 2
+    infos[0].async_remove()
+    assert template_state.template in stats
+
+    infos[1].async_remove()
+    assert template_state.template not in stats
+
+    with pytest.raises(TemplateError):
+        async_track_template_result(
+            hass,
+            [TrackTemplate(Template("{{ 1 | invalid }}", hass), None)],
+            lambda *args: None,
+            raise_on_template_error=True,
+        )
+    assert not stats
+
+
+async def test_track_template_result_aggregate(hass):
+    """Test templates using aggregates only render when members change."""
+    hass.states.async_set("sensor.oven", "2000", {"device_class": "power"})
+    hass.states.async_set("sensor.meter", "12", {"device_class": "energy"})
+    template_power = Template(
+        "{{ state_sum('sensor', 'device_class', 'power') }}", hass
+    )
+
+    power_runs = []
+
+    @ha.callback
+    def power_listener(event, updates):
+        power_runs.append(updates.pop().result)
+
+    info = async_track_template_result(
+        hass, [TrackTemplate(template_power, None)], power_listener
+    )
+    await hass.async_block_till_done()
+
+    assert info.listeners == {
+        "all": False,
+        "domains": set(),
+        "entities": set(),
+        "time": False,
+    }
+    renders = async_get_template_render_stats(hass)[template_power.template].renders
+
+    hass.states.async_set("sensor.meter", "13", {"device_class": "energy"})
+    hass.states.async_set("sensor.oven", "2000", {"device_class": "power", "x": 1})
+    await hass.async_block_till_done()
+
+    assert power_runs == []
+    stats = async_get_template_render_stats(hass)
+    assert stats[template_power.template].renders == renders
+
+    hass.states.async_set("sensor.oven", "1500", {"device_class": "power"})
+    await hass.async_block_till_done()
+
+    assert power_runs == [1500]
+
+    hass.states.async_set("sensor.fridge", "150", {"device_class": "power"})
+    await hass.async_block_till_done()
+
+    assert power_runs == [1500, 1650]
+
+    hass.states.async_remove("sensor.oven")
+    await hass.async_block_till_done()
+
+    assert power_runs == [1500, 1650, 150]
+
+    info.async_remove()
+    hass.states.async_set("sensor.fridge", "100", {"device_class": "power"})
+    await hass.async_block_till_done()
+
+    assert power_runs == [1500, 1650, 150]
+
+
 async def test_track_template_result_refresh_cancel(hass):
     """Test cancelling and refreshing result."""
     template_refresh = Template("{{states.switch.test.state == 'on' and now() }}", hass)
@@ -2633,6 +2777,50 @@ async def test_async_track_time_change(hass):
     assert len(wildcard_runs) == 3
 
 
+async def test_async_track_time_resolution(hass):
+    """Test tracking time at a minute and hour resolution."""
+    minute_runs = []
+    hour_runs = []
+
+    now = dt_util.utcnow()
+
+    start = datetime(now.year + 1, 5, 24, 11, 59, 55, tzinfo=dt_util.UTC)
+
+    with patch("homeassistant.util.dt.utcnow", return_value=start):
+        unsub_minute = async_track_time_resolution(
+            hass, callback(lambda x: minute_runs.append(x)), TimeResolution.minute
+        )
+        unsub_hour = async_track_time_resolution(
+            hass, callback(lambda x: hour_runs.append(x)), TimeResolution.hour
+        )
+
+    assert hass.bus.async_time_resolution() == TimeResolution.minute
+
+    async_fire_time_changed(hass, start + timedelta(seconds=2))
+    await hass.async_block_till_done()
+    assert minute_runs == []
+    assert hour_runs == []
+
+    async_fire_time_changed(hass, start + timedelta(seconds=5))
+    await hass.async_block_till_done()
+    assert minute_runs == [start + timedelta(seconds=5)]
+    assert hour_runs == [start + timedelta(seconds=5)]
+
+    async_fire_time_changed(hass, start + timedelta(seconds=35))
+    await hass.async_block_till_done()
+    assert len(minute_runs) == 1
+
+    async_fire_time_changed(hass, start + timedelta(seconds=65))
+    await hass.async_block_till_done()
+    assert len(minute_runs) == 2
+    assert len(hour_runs) == 1
+
+    unsub_minute()
+    assert hass.bus.async_time_resolution() == TimeResolution.hour
+    unsub_hour()
+    assert hass.bus.async_time_resolution() is None
+
+
 async def test_periodic_task_minute(hass):
     """Test periodic tasks per minute."""
     specific_runs = []
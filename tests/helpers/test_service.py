@@ -1,4 +1,5 @@
 """Test service helpers."""
+import asyncio
 from collections import OrderedDict
 from copy import deepcopy
 import unittest
@@ -461,6 +462,95 @@ async def test_call_with_sync_attr(hass, mock_entities):
     assert mock_method.mock_calls[0][2] == {}
 
 
+async def test_call_batch_entity_service(hass, mock_entities):
+    """Test platforms with a batch handler get all their entities at once."""
+    batch_handler = AsyncMock()
+    platform = Mock(platform=Mock(spec=[service.BATCH_ENTITY_SERVICE]))
+    setattr(platform.platform, service.BATCH_ENTITY_SERVICE, batch_handler)
+    mock_entities["light.kitchen"].platform = platform
+    mock_entities["light.living_room"].platform = platform
+    mock_method = mock_entities["light.bedroom"].sync_method = Mock(return_value=None)
+
+    await service.entity_service_call(
+        hass,
+        [Mock(entities=mock_entities)],
+        "sync_method",
+        ha.ServiceCall(
+            "test_domain",
+            "test_service",
+            {
+                "entity_id": ["light.kitchen", "light.living_room", "light.bedroom"],
+                "brightness": 10,
+            },
+        ),
+    )
+
+    assert batch_handler.call_count == 1
+    assert batch_handler.mock_calls[0][1] == (
+        hass,
+        [mock_entities["light.kitchen"], mock_entities["light.living_room"]],
+        "sync_method",
+        {"brightness": 10},
+    )
+    assert mock_method.call_count == 1
+
+
+async def test_call_batch_entity_service_parallel_updates(hass, mock_entities):
+    """Test a batch counts as a request against the PARALLEL_UPDATES limit."""
+    batch_handler = AsyncMock()
+    platform = Mock(platform=Mock(spec=[service.BATCH_ENTITY_SERVICE]))
+    setattr(platform.platform, service.BATCH_ENTITY_SERVICE, batch_handler)
+    parallel_updates = asyncio.Semaphore(1)
+    for entity_id in ("light.kitchen", "light.living_room"):
+        mock_entities[entity_id].platform = platform
+        mock_entities[entity_id].parallel_updates = parallel_updates
+
+    await parallel_updates.acquire()
+    call = hass.async_create_task(
+        service.entity_service_call(
+            hass,
+            [Mock(entities=mock_entities)],
+            "sync_method",
+            ha.ServiceCall(
+                "test_domain",
+                "test_service",
+                {"entity_id": ["light.kitchen", "light.living_room"]},
+            ),
+        )
+    )
+    await asyncio.sleep(0)
+    assert batch_handler.call_count == 0
+
+    parallel_updates.release()
+    await call
+    assert batch_handler.call_count == 1
+    assert not parallel_updates.locked()
+
+
+async def test_call_target_results(hass, mock_entities):
+    """Test the result of each entity is reported when asked for."""
+    mock_entities["light.kitchen"].sync_method = Mock(return_value=None)
+    mock_entities["light.living_room"].sync_method = Mock(
+        side_effect=exceptions.HomeAssistantError
+    )
+    call = ha.ServiceCall(
+        "test_domain",
+        "test_service",
+        {"entity_id": ["light.kitchen", "light.living_room"]},
+    )
+    call.target_results = {}
+
+    with pytest.raises(exceptions.HomeAssistantError):
+        await service.entity_service_call(
+            hass, [Mock(entities=mock_entities)], "sync_method", call
+        )
+
+    assert call.target_results["light.kitchen"] is True
+    assert isinstance(
+        call.target_results["light.living_room"], exceptions.HomeAssistantError
+    )
+
+
 async def test_call_context_user_not_exist(hass):
     """Check we don't allow deleted users to do things."""
     with pytest.raises(exceptions.UnknownUser) as err:
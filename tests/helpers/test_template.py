@@ -1,8 +1,10 @@
 """Test Home Assistant template helper methods."""
 from datetime import datetime
+import json
 import math
 import random
 
+from jinja2.exceptions import SecurityError
 import pytest
 import pytz
 import voluptuous as vol
@@ -1386,6 +1388,78 @@ async def test_closest_function_home_vs_group_state(hass):
     assert info.rate_limit is None
 
 
+async def test_state_aggregates(hass):
+    """Test aggregates over the states matching a selector."""
+    hass.states.async_set("sensor.oven", "2000.5", {"device_class": "power"})
+    hass.states.async_set("sensor.fridge", "150", {"device_class": "power"})
+    hass.states.async_set("sensor.tv", "unavailable", {"device_class": "power"})
+    hass.states.async_set("sensor.meter", "12.5", {"device_class": "energy"})
+    hass.states.async_set("light.kitchen", "on")
+
+    def render(template_str):
+        return template.Template(template_str, hass).async_render()
+
+    selector = "'sensor', 'device_class', 'power'"
+    info = render_to_info(hass, f"{{{{ state_sum({selector}) }}}}")
+    assert_result_info(info, 2150.5)
+    assert info.rate_limit is None
+    assert len(info.aggregates) == 1
+
+    assert render(f"{{{{ state_count({selector}) }}}}") == 3
+    assert render(f"{{{{ state_min({selector}) }}}}") == 150
+    assert render(f"{{{{ state_max({selector}) }}}}") == 2000.5
+    assert render(f"{{{{ state_avg({selector}) }}}}") == 1075.25
+    assert render("{{ state_count('sensor', 'device_class') }}") == 4
+    assert render("{{ state_count('sensor') }}") == 4
+    assert render("{{ state_sum('sensor') }}") == 2163
+    assert render("{{ state_max('switch') }}") is None
+    assert render("{{ state_sum('switch') }}") == 0
+
+    hass.states.async_set("sensor.oven", "1000", {"device_class": "power"})
+    hass.states.async_set("sensor.tv", "100", {"device_class": "power"})
+    assert render(f"{{{{ state_sum({selector}) }}}}") == 1250
+    assert render(f"{{{{ state_max({selector}) }}}}") == 1000
+
+    hass.states.async_remove("sensor.oven")
+    hass.states.async_set("sensor.fridge", "150", {"device_class": "energy"})
+    assert render(f"{{{{ state_count({selector}) }}}}") == 1
+    assert render(f"{{{{ state_min({selector}) }}}}") == 100
+    assert render(f"{{{{ state_max({selector}) }}}}") == 100
+
+    hass.states.async_set("sensor.a", "0.1", {"device_class": "power"})
+    hass.states.async_set("sensor.b", "0.2", {"device_class": "power"})
+    hass.states.async_set("sensor.b", "0.3", {"device_class": "power"})
+    assert render(f"{{{{ state_sum({selector}) }}}}") == 100.4
+
+    with pytest.raises(TemplateError):
+        render("{{ state_sum('sensor.invalid') }}")
+    with pytest.raises(TemplateError):
+        render("{{ state_sum('sensor', 'source_list', ['tv']) }}")
+
+
+async def test_state_aggregates_dropped_without_listeners(hass):
+    """Test aggregates are dropped when their last listener is removed."""
+    hass.states.async_set("sensor.oven", "2000", {"device_class": "power"})
+    tmp = template.Template("{{ state_sum('sensor', 'device_class', 'power') }}", hass)
+    assert tmp.async_render() == 2000
+    await hass.async_block_till_done()
+    assert not hass.data[template._AGGREGATES]._domains
+
+    info = tmp.async_render_to_info()
+    (aggregate,) = info.aggregates
+    remove_first = aggregate.async_add_listener(lambda: None)
+    remove_second = aggregate.async_add_listener(lambda: None)
+    await hass.async_block_till_done()
+
+    remove_first()
+    await hass.async_block_till_done()
+    assert tmp.async_render_to_info().aggregates == {aggregate}
+
+    remove_second()
+    await hass.async_block_till_done()
+    assert not hass.data[template._AGGREGATES]._domains
+
+
 async def test_expand(hass):
     """Test expand function."""
     info = render_to_info(hass, "{{ expand('test.object') }}")
@@ -2081,10 +2155,147 @@ async def test_cache_garbage_collection():
     assert template._NO_HASS_ENV.template_cache.get(
         template_string
     )  # pylint: disable=protected-access
-    del tpl2
-    assert not template._NO_HASS_ENV.template_cache.get(
-        template_string
-    )  # pylint: disable=protected-access
+
+
+async def test_compiled_code_cache_eviction():
+    """Test compiled code is kept while recently used or in use."""
+    template_string = "{{ value_json.x }}"
+    cache = template.CompiledCodeCache(2)
+    with patch.object(template._NO_HASS_ENV, "template_cache", cache):
+        tpl = template.Template(template_string)
+        tpl.ensure_valid()
+        tpl2 = template.Template(template_string)
+        tpl2.ensure_valid()
+        assert tpl2._compiled_code is tpl._compiled_code
+
+        # Evict the template while it is in use
+        for other in ("{{ 1 }}", "{{ 2 }}"):
+            template.Template(other).ensure_valid()
+        del tpl
+        assert cache.get(template_string) is tpl2._compiled_code
+
+        # Evict the template after it is no longer used
+        for other in ("{{ 1 }}", "{{ 2 }}"):
+            template.Template(other).ensure_valid()
+        del tpl2
+        assert not cache.get(template_string)
+
+
+async def test_compiled_code_cache_shared(hass):
+    """Test templates with the same source are compiled once."""
+    cache = template.CompiledCodeCache(10)
+    env = template.Template("{{ 1 }}", hass)._env
+    with patch.object(env, "template_cache", cache):
+        templates = [template.Template("{{ value_json.x }}", hass) for _ in range(5)]
+        for tpl in templates:
+            tpl.ensure_valid()
+
+        assert (cache.hits, cache.misses) == (4, 1)
+        assert templates[0].async_render({"value_json": {"x": 1}}) == 1
+        assert templates[-1]._compiled_code is templates[0]._compiled_code
+
+
+async def test_compiled_code_cache_per_environment(hass):
+    """Test code compiled with hass is not used to validate without hass."""
+    template_string = "{{ ['light.kitchen'] | expand | list | count }}"
+    template.Template(template_string, hass).ensure_valid()
+
+    with pytest.raises(TemplateError):
+        template.Template(template_string).ensure_valid()
+
+
+@pytest.mark.parametrize(
+    "template_string",
+    [
+        "{{ value_json.temperature }}",
+        "{{ value_json['humidity'] | float }}",
+        "{{ value_json.missing }}",
+        "{{ value_json.temperature | round(1) * 2 }}",
+        "{{ states('sensor.temperature') | float * 2 }}",
+        "{{ states.sensor.temperature.state }}",
+        "{{ is_state('light.kitchen', 'on') }}",
+        "{{ state_attr('light.kitchen', 'brightness') }}",
+        "{{ 'ON' if value_json.power > 10 else 'OFF' }}",
+        "{{ 0 < value_json.temperature < 30 and not is_state('light.kitchen', 'on') }}",
+        "{{ value_json.power // 3 - value_json.power % 3 }}",
+        "{{ value_json.name | lower }}",
+        "{{ value_json }}",
+        "{{ value_json.missing.temperature }}",
+        "{{ value_json.power / 0 }}",
+    ],
+)
+async def test_fast_path_matches_jinja(hass, template_string):
+    """Test simple templates render the same with and without Jinja."""
+    hass.states.async_set("sensor.temperature", "21.5")
+    hass.states.async_set("light.kitchen", "on", {"brightness": 128})
+    payload = '{"temperature": 21.5, "humidity": "55", "power": 17, "name": "ABC"}'
+    variables = {"value": payload, "value_json": json.loads(payload)}
+
+    fast = template.Template(template_string, hass)
+    fast.ensure_valid()
+    jinja = template.Template(template_string, hass)
+    jinja._ensure_compiled()
+    jinja._fast_path = None
+
+    fast_info = fast.async_render_to_info(variables)
+    jinja_info = jinja.async_render_to_info(variables)
+
+    assert fast._fast_path is not None
+    assert type(fast_info.exception) is type(jinja_info.exception)
+    assert fast_info.entities == jinja_info.entities
+    assert fast_info.domains == jinja_info.domains
+    assert fast_info.all_states == jinja_info.all_states
+    if fast_info.exception is None:
+        assert fast_info.result() == jinja_info.result()
+        assert type(fast_info.result()) is type(jinja_info.result())
+        assert fast.async_render_with_possible_json_value(
+            payload, "error"
+        ) == jinja.async_render_with_possible_json_value(payload, "error")
+
+
+async def test_fast_path_only_for_simple_templates(hass):
+    """Test templates outside the fast path subset are rendered by Jinja."""
+    for template_string in (
+        "{{ value_json.temperature }} °C",
+        "{% if value_json.on %}on{% endif %}",
+        "{{ value_json.temperature is defined }}",
+        "{{ 'group.all' | expand }}",
+        "{{ value_json.items | join(sep=',') }}",
+        "{{ value_json.func() }}",
+        "{{ 'a{0}'.format(value_json) }}",
+    ):
+        tpl = template.Template(template_string, hass)
+        tpl.ensure_valid()
+        tpl._ensure_compiled()
+        assert tpl._fast_path is None, template_string
+
+    # Variables shadowing globals fall back to Jinja
+    tpl = template.Template("{{ now() }}", hass)
+    tpl._ensure_compiled()
+    assert tpl._fast_path is not None
+    assert tpl.async_render({"now": lambda: 3}) == 3
+
+
+@pytest.mark.parametrize(
+    "template_string",
+    [
+        '{{ "{0.__class__.__mro__}".format(states) }}',
+        '{{ "{0.__init__.__globals__}".format(states) }}',
+        '{{ "{x.__class__.__mro__}".format_map({"x": states}) }}',
+    ],
+)
+async def test_fast_path_sandboxed(hass, template_string):
+    """Test the sandbox checks calls with and without the fast path."""
+    fast = template.Template(template_string, hass)
+    fast.ensure_valid()
+    jinja = template.Template(template_string, hass)
+    jinja._ensure_compiled()
+    jinja._fast_path = None
+
+    for tpl in (fast, jinja):
+        with pytest.raises(TemplateError) as exc_info:
+            tpl.async_render()
+        assert isinstance(exc_info.value.__cause__, SecurityError)
 
 
 def test_is_template_string():
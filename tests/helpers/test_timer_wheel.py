@@ -0,0 +1,185 @@
+"""Test the timer wheel helper."""
+from datetime import timedelta
+import math
+import time
+
+from homeassistant.core import HassJob, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.timer_wheel import (
+    MIN_REARM_DELAY,
+    TIMER_WHEEL_TICK,
+    async_get_timer_wheel,
+)
+import homeassistant.util.dt as dt_util
+
+from tests.async_mock import patch
+from tests.common import async_fire_time_changed
+
+
+async def test_timers_in_same_tick_share_a_handle(hass):
+    """Test that timers due in the same tick only arm one loop handle."""
+    wheel = async_get_timer_wheel(hass)
+    now = dt_util.utcnow()
+    point = now + timedelta(seconds=10)
+    calls = []
+
+    job = HassJob(callback(lambda value: calls.append(value)))
+    wheel.async_schedule(point + timedelta(seconds=TIMER_WHEEL_TICK / 4), job, 2)
+    wheel.async_schedule(point, job, 1)
+    handle = wheel._handle
+
+    wheel.async_schedule(point + timedelta(seconds=TIMER_WHEEL_TICK / 2), job, 3)
+    assert wheel._handle is handle
+
+    wheel.async_fire_due(point + timedelta(seconds=TIMER_WHEEL_TICK))
+    await hass.async_block_till_done()
+
+    assert calls == [1, 2, 3]
+    assert wheel._handle is None
+
+
+async def test_handle_armed_for_earliest_timer(hass):
+    """Test the loop wakes up for the earliest timer, not the end of its slot."""
+    wheel = async_get_timer_wheel(hass)
+    slot = math.ceil(time.time() / TIMER_WHEEL_TICK) + 100
+    point = dt_util.utc_from_timestamp(slot * TIMER_WHEEL_TICK - TIMER_WHEEL_TICK / 2)
+
+    wheel.async_schedule(point, HassJob(callback(lambda: None)))
+
+    delay = wheel._handle.when() - hass.loop.time()
+    assert abs(delay - (point.timestamp() - time.time())) < TIMER_WHEEL_TICK / 5
+
+
+async def test_early_wake_up_does_not_spin(hass):
+    """Test waking up before the wall clock reaches a timer rearms with a delay."""
+    wheel = async_get_timer_wheel(hass)
+    point = dt_util.utcnow() + timedelta(seconds=10)
+    calls = []
+
+    wheel.async_schedule(point, HassJob(callback(lambda: calls.append(1))))
+
+    with patch(
+        "homeassistant.helpers.timer_wheel.time.time",
+        return_value=point.timestamp() + 1,
+    ), patch(
+        "homeassistant.helpers.timer_wheel.dt_util.utcnow",
+        return_value=point - timedelta(microseconds=1),
+    ):
+        wheel._async_handle_tick()
+
+    assert calls == []
+    assert wheel._handle.when() - hass.loop.time() > MIN_REARM_DELAY / 2
+
+
+async def test_timers_only_fire_when_due(hass):
+    """Test that a timer is not fired before its point in time."""
+    wheel = async_get_timer_wheel(hass)
+    point = dt_util.utcnow() + timedelta(seconds=10)
+    calls = []
+
+    wheel.async_schedule(point, HassJob(callback(lambda: calls.append(1))))
+
+    wheel.async_fire_due(point - timedelta(microseconds=1))
+    await hass.async_block_till_done()
+    assert calls == []
+    assert wheel._handle is not None
+
+    wheel.async_fire_due(point)
+    await hass.async_block_till_done()
+    assert calls == [1]
+
+
+async def test_cancel_timer(hass):
+    """Test cancelling timers rearms the wheel for the next slot."""
+    wheel = async_get_timer_wheel(hass)
+    now = dt_util.utcnow()
+    calls = []
+    job = HassJob(callback(lambda value: calls.append(value)))
+
+    cancel_first = wheel.async_schedule(now + timedelta(seconds=5), job, 1)
+    wheel.async_schedule(now + timedelta(seconds=10), job, 2)
+    first_slot = wheel._handle_slot
+
+    cancel_first()
+    # Cancelling twice is a no-op
+    cancel_first()
+    assert wheel._handle_slot == first_slot
+
+    async_fire_time_changed(hass, now + timedelta(seconds=6))
+    await hass.async_block_till_done()
+    assert calls == []
+    assert wheel._handle_slot is not None
+    assert wheel._handle_slot > first_slot
+
+    async_fire_time_changed(hass, now + timedelta(seconds=11))
+    await hass.async_block_till_done()
+    assert calls == [2]
+    assert wheel._handle is None
+
+
+async def test_cancel_timer_from_timer_in_same_batch(hass):
+    """Test a timer cancelled by another timer due at the same time is not fired."""
+    wheel = async_get_timer_wheel(hass)
+    point = dt_util.utcnow() + timedelta(seconds=10)
+    calls = []
+
+    @callback
+    def first():
+        calls.append("a")
+        cancel_second()
+
+    wheel.async_schedule(point, HassJob(first))
+    cancel_second = wheel.async_schedule(
+        point + timedelta(microseconds=1), HassJob(callback(lambda: calls.append("b")))
+    )
+
+    wheel.async_fire_due(point + timedelta(seconds=1))
+    await hass.async_block_till_done()
+
+    assert calls == ["a"]
+
+
+async def test_failing_timer_does_not_block_others(hass, caplog):
+    """Test that an exception in one timer does not stop the others."""
+    wheel = async_get_timer_wheel(hass)
+    point = dt_util.utcnow() + timedelta(seconds=10)
+    calls = []
+
+    @callback
+    def failing():
+        raise ValueError("boom")
+
+    wheel.async_schedule(point, HassJob(failing))
+    wheel.async_schedule(point, HassJob(callback(lambda: calls.append(1))))
+
+    wheel.async_fire_due(point)
+    await hass.async_block_till_done()
+
+    assert calls == [1]
+    assert "Error running timer job" in caplog.text
+
+
+async def test_timers_by_owner(hass):
+    """Test listing the pending timers by owner."""
+    wheel = async_get_timer_wheel(hass)
+    now = dt_util.utcnow()
+
+    @callback
+    def action(now):
+        """Run the action."""
+
+    unsub = async_track_point_in_utc_time(hass, action, now + timedelta(seconds=20))
+    async_track_point_in_utc_time(hass, action, now + timedelta(seconds=10))
+
+    timers = wheel.async_timers_by_owner()
+    owner = f"{__name__}.test_timers_by_owner.<locals>.action"
+    assert timers == {
+        owner: [now + timedelta(seconds=10), now + timedelta(seconds=20)]
+    }
+
+    unsub()
+    assert wheel.async_timers_by_owner() == {owner: [now + timedelta(seconds=10)]}
+
+    async_fire_time_changed(hass, now + timedelta(seconds=11))
+    await hass.async_block_till_done()
+    assert wheel.async_timers_by_owner() == {}
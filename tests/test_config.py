@@ -491,6 +491,21 @@ async def test_loading_configuration(hass):
     assert hass.config.legacy_templates is True
 
 
+async def test_loading_configuration_executor_pools(hass, caplog):
+    """Test the sizes of executor pools are set from the core config."""
+    hass.executors.async_submit("integration:running", lambda: None)
+    await hass.async_block_till_done()
+
+    await config_util.async_process_ha_core_config(
+        hass,
+        {"executor_pools": {"integration:slow": 1, "integration:running": 2}},
+    )
+
+    assert hass.executors._sizes["integration:slow"] == 1
+    assert "integration:running" not in hass.executors._sizes
+    assert "Executor pool integration:running is already running" in caplog.text
+
+
 async def test_loading_configuration_temperature_unit(hass):
     """Test backward compatibility when loading core config."""
     await config_util.async_process_ha_core_config(
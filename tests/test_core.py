@@ -3,6 +3,8 @@
 import asyncio
 from datetime import datetime, timedelta
 import functools
+import gc
+import json
 import logging
 import os
 from tempfile import TemporaryDirectory
@@ -34,11 +36,16 @@ from homeassistant.const import (
 )
 import homeassistant.core as ha
 from homeassistant.exceptions import InvalidEntityFormatError, InvalidStateError
+from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
 from homeassistant.util.unit_system import METRIC_SYSTEM
 
 from tests.async_mock import MagicMock, Mock, PropertyMock, patch
-from tests.common import async_mock_service, get_test_home_assistant
+from tests.common import (
+    async_capture_events,
+    async_mock_service,
+    get_test_home_assistant,
+)
 
 PST = pytz.timezone("America/Los_Angeles")
 
@@ -185,12 +192,32 @@ async def test_pending_sheduler(hass):
     for _ in range(3):
         hass.async_add_job(test_coro())
 
+    assert len(hass._pending_tasks) == 3
+
     await asyncio.wait(hass._pending_tasks)
 
-    assert len(hass._pending_tasks) == 3
+    assert len(hass._pending_tasks) == 0
     assert len(call_count) == 3
 
 
+async def test_pending_tasks_kept_alive(hass):
+    """Test tracked fire-and-forget tasks are not garbage collected."""
+    done = asyncio.Event()
+    finished = []
+
+    async def wait_done():
+        await done.wait()
+        finished.append(True)
+
+    hass.async_create_task(wait_done())
+    gc.collect()
+    assert len(hass._pending_tasks) == 1
+
+    done.set()
+    await hass.async_block_till_done()
+    assert finished == [True]
+
+
 async def test_async_add_job_pending_tasks_coro(hass):
     """Add a coro to pending tasks."""
     call_count = []
@@ -230,10 +257,12 @@ async def test_async_add_job_pending_tasks_executor(hass):
     for _ in range(2):
         hass.async_add_job(test_executor)
 
+    assert len(hass._pending_tasks) == 2
+
     await wait_finish_callback()
 
-    assert len(hass._pending_tasks) == 2
     await hass.async_block_till_done()
+    assert len(hass._pending_tasks) == 0
     assert len(call_count) == 2
 
 
@@ -311,6 +340,23 @@ def test_event_as_dict():
     assert event.as_dict() == expected
     # 2nd time to verify cache
     assert event.as_dict() == expected
+    assert event.as_dict() is event.as_dict()
+
+
+def test_event_as_json():
+    """Test an Event serialized to JSON."""
+    now = dt_util.utcnow()
+    event = ha.Event("some_type", {"some": "attr", "when": now}, time_fired=now)
+
+    assert json.loads(event.as_json()) == json.loads(
+        json.dumps(event.as_dict(), cls=JSONEncoder)
+    )
+    assert event.as_json() is event.as_json()
+    assert json.loads(event.data_as_json()) == {
+        "some": "attr",
+        "when": now.isoformat(),
+    }
+    assert event.data_as_json() is event.data_as_json()
 
 
 def test_state_as_dict():
@@ -341,6 +387,27 @@ def test_state_as_dict():
     assert state.as_dict() is state.as_dict()
 
 
+def test_state_attributes_as_json():
+    """Test the attributes of a State serialized to JSON."""
+    state = ha.State("happy.happy", "on", {"pig": "dog", "tags": {"a"}})
+
+    assert json.loads(state.attributes_as_json()) == {"pig": "dog", "tags": ["a"]}
+    assert state.attributes_as_json() is state.attributes_as_json()
+
+
+async def test_event_not_created_without_listeners(hass):
+    """Test that no Event is created when nobody listens."""
+    with patch("homeassistant.core.Event") as mock_event:
+        hass.bus.async_fire("no_listeners")
+
+    assert not mock_event.called
+
+    calls = async_capture_events(hass, "with_listeners")
+    hass.bus.async_fire("with_listeners")
+    await hass.async_block_till_done()
+    assert len(calls) == 1
+
+
 class TestEventBus(unittest.TestCase):
     """Test EventBus methods."""
 
@@ -1043,6 +1110,7 @@ async def test_bad_timezone_raises_value_error(hass):
 def test_create_timer(mock_monotonic, loop):
     """Test create timer."""
     hass = MagicMock()
+    hass.bus.async_time_resolution.return_value = ha.TimeResolution.second
     funcs = []
     orig_callback = ha.callback
 
@@ -1058,8 +1126,8 @@ def test_create_timer(mock_monotonic, loop):
     ):
         ha._async_create_timer(hass)
 
-    assert len(funcs) == 2
-    fire_time_event, stop_timer = funcs
+    assert len(funcs) == 3
+    fire_time_event, _, stop_timer = funcs
 
     assert len(hass.loop.call_later.mock_calls) == 1
     delay, callback, target = hass.loop.call_later.mock_calls[0][1]
@@ -1095,6 +1163,7 @@ def test_create_timer(mock_monotonic, loop):
 def test_timer_out_of_sync(mock_monotonic, loop):
     """Test create timer."""
     hass = MagicMock()
+    hass.bus.async_time_resolution.return_value = ha.TimeResolution.second
     funcs = []
     orig_callback = ha.callback
 
@@ -1133,8 +1202,8 @@ def test_timer_out_of_sync(mock_monotonic, loop):
 
         assert event_context_0 == event_context_1
 
-        assert len(funcs) == 2
-        fire_time_event, _ = funcs
+        assert len(funcs) == 3
+        fire_time_event, _, _ = funcs
 
     assert len(hass.loop.call_later.mock_calls) == 2
 
@@ -1144,6 +1213,73 @@ def test_timer_out_of_sync(mock_monotonic, loop):
     assert abs(target - 14.2) < 0.001
 
 
+async def test_timer_follows_time_listener_resolution(hass):
+    """Test the timer only ticks as often as time changed listeners need."""
+    with patch.object(hass.loop, "call_later") as mock_call_later, patch(
+        "homeassistant.core.dt_util.utcnow",
+        return_value=datetime(2018, 12, 31, 3, 4, 5, 333333, tzinfo=dt_util.UTC),
+    ):
+        ha._async_create_timer(hass)
+        # Nobody listens, the timer sleeps
+        assert mock_call_later.call_count == 0
+
+        unsub_minute = hass.bus.async_listen_time_changed(
+            lambda _: None, ha.TimeResolution.minute
+        )
+        assert mock_call_later.call_count == 1
+        delay = mock_call_later.call_args_list[0][0][0]
+        assert abs(delay - 54.666667) < 0.001
+
+        # A second listener with the same resolution does not reschedule
+        unsub_hour = hass.bus.async_listen_time_changed(
+            lambda _: None, ha.TimeResolution.hour
+        )
+        assert mock_call_later.call_count == 1
+
+        unsub_second = hass.bus.async_listen(EVENT_TIME_CHANGED, lambda _: None)
+        assert mock_call_later.call_count == 2
+        delay = mock_call_later.call_args_list[1][0][0]
+        assert abs(delay - 0.666667) < 0.001
+
+        unsub_second()
+        assert mock_call_later.call_count == 3
+        delay = mock_call_later.call_args_list[2][0][0]
+        assert abs(delay - 54.666667) < 0.001
+
+        unsub_minute()
+        assert mock_call_later.call_count == 4
+        delay = mock_call_later.call_args_list[3][0][0]
+        assert abs(delay - 3354.666667) < 0.001
+
+        unsub_hour()
+        assert mock_call_later.return_value.cancel.called
+        assert mock_call_later.call_count == 4
+
+        # Once stopped, the timer no longer follows the listeners
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+        await hass.async_block_till_done()
+        hass.bus.async_listen(EVENT_TIME_CHANGED, lambda _: None)
+        assert mock_call_later.call_count == 4
+
+
+async def test_listen_time_listeners_changed(hass):
+    """Test actions are called when time changed listeners change."""
+    calls = []
+    remove = hass.bus.async_listen_time_listeners_changed(lambda: calls.append(1))
+
+    hass.bus.async_listen("test_event", lambda _: None)
+    assert calls == []
+
+    unsub = hass.bus.async_listen_time_changed(lambda _: None)
+    assert calls == [1]
+    unsub()
+    assert calls == [1, 1]
+
+    remove()
+    hass.bus.async_listen(EVENT_TIME_CHANGED, lambda _: None)
+    assert calls == [1, 1]
+
+
 async def test_hass_start_starts_the_timer(loop):
     """Test when hass starts, it starts the timer."""
     hass = ha.HomeAssistant()
@@ -1251,6 +1387,95 @@ async def test_service_call_event_contains_original_data(hass):
     assert calls[0].context is context
 
 
+async def test_async_call_many(hass):
+    """Test calls targeting entities of the same service are merged."""
+    events = async_capture_events(hass, EVENT_CALL_SERVICE)
+    calls = async_mock_service(
+        hass,
+        "light",
+        "turn_on",
+        vol.Schema(
+            {vol.Required("entity_id"): list, vol.Optional("brightness"): int}
+        ),
+    )
+
+    release = asyncio.Event()
+
+    async def slow_service(call):
+        await release.wait()
+
+    hass.services.async_register("test", "slow", slow_service)
+
+    context = ha.Context()
+    results = await hass.services.async_call_many(
+        [
+            ("light", "turn_on", {"entity_id": "light.kitchen", "brightness": 10}),
+            ("light", "turn_on", {"entity_id": ["light.bed", "light.kitchen"]}),
+            ("Light", "Turn_On", {"entity_id": "light.bath", "brightness": 10}),
+            ("light", "turn_on", {"entity_id": "light.bath", "brightness": "high"}),
+            ("light", "unknown", {"entity_id": "light.bath"}),
+            ("test", "slow", None),
+        ],
+        context=context,
+        limit=0.01,
+    )
+
+    assert results[:3] == [
+        {"light.kitchen": True},
+        {"light.bed": True, "light.kitchen": True},
+        {"light.bath": True},
+    ]
+    assert isinstance(results[3]["light.bath"], vol.Invalid)
+    assert isinstance(results[4]["light.bath"], ha.ServiceNotFound)
+    assert results[5] == {"all": False}
+
+    # Only calls that passed validation are announced, each with its own data
+    assert [event.data["service_data"] for event in events] == [
+        {"entity_id": "light.kitchen", "brightness": 10},
+        {"entity_id": "light.bath", "brightness": 10},
+        {"entity_id": ["light.bed", "light.kitchen"]},
+        {},
+    ]
+    assert all(event.context is context for event in events)
+
+    assert len(calls) == 2
+    assert calls[0].data == {
+        "entity_id": ["light.kitchen", "light.bath"],
+        "brightness": 10,
+    }
+    assert calls[1].data == {"entity_id": ["light.bed", "light.kitchen"]}
+
+    release.set()
+    await hass.async_block_till_done()
+
+
+async def test_async_call_many_single_entity_schema(hass):
+    """Test calls run one by one when the schema rejects the merged call."""
+    calls = async_mock_service(
+        hass,
+        "climate",
+        "resume_program",
+        vol.Schema({vol.Required("entity_id"): str, vol.Optional("all"): bool}),
+    )
+
+    results = await hass.services.async_call_many(
+        [
+            ("climate", "resume_program", {"entity_id": "climate.up", "all": True}),
+            ("climate", "resume_program", {"entity_id": "climate.down", "all": True}),
+            ("climate", "resume_program", {"entity_id": ["climate.attic"]}),
+            ("climate", "resume_program", {"entity_id": ["climate.cellar"]}),
+        ]
+    )
+
+    assert results[:2] == [{"climate.up": True}, {"climate.down": True}]
+    assert isinstance(results[2]["climate.attic"], vol.Invalid)
+    assert isinstance(results[3]["climate.cellar"], vol.Invalid)
+    assert [call.data for call in calls] == [
+        {"entity_id": "climate.up", "all": True},
+        {"entity_id": "climate.down", "all": True},
+    ]
+
+
 def test_context():
     """Test context init."""
     c = ha.Context()
@@ -1434,6 +1659,31 @@ async def test_start_events(hass):
     assert core_states == [ha.CoreState.starting, ha.CoreState.running]
 
 
+async def test_block_till_done_reports_last_finished_tasks(hass):
+    """Test we report which tracked tasks were last to finish."""
+    first_done = asyncio.Event()
+
+    async def _first_task():
+        first_done.set()
+
+    async def _last_task():
+        await first_done.wait()
+        await asyncio.sleep(0)
+
+    hass.async_create_task(_last_task())
+    hass.async_create_task(_first_task())
+    await hass.async_block_till_done()
+
+    assert not hass._pending_tasks
+    last_finished = hass.async_last_finished_tasks()
+    assert len(last_finished) == 2
+    assert "_first_task" in last_finished[0]
+    assert "_last_task" in last_finished[1]
+
+    await hass.async_block_till_done()
+    assert hass.async_last_finished_tasks() == []
+
+
 async def test_log_blocking_events(hass, caplog):
     """Ensure we log which task is blocking startup when debug logging is on."""
     caplog.set_level(logging.DEBUG)
@@ -1602,3 +1852,188 @@ async def test_state_change_events_match_state_time(hass):
     state = hass.states.get("light.bedroom")
 
     assert state.last_updated == events[0].time_fired
+
+
+async def test_event_filter(hass):
+    """Test the event filter is evaluated before the listener is scheduled."""
+    calls = []
+    filtered = []
+
+    @ha.callback
+    def _event_filter(event):
+        filtered.append(event)
+        return event.data.get("match") is True
+
+    @ha.callback
+    def _event_listener(event):
+        calls.append(event)
+
+    unsub = hass.bus.async_listen(
+        "test_event", _event_listener, event_filter=_event_filter
+    )
+
+    hass.bus.async_fire("test_event", {"match": False})
+    hass.bus.async_fire("test_event", {"match": True})
+    await hass.async_block_till_done()
+
+    assert len(filtered) == 2
+    assert len(calls) == 1
+    assert calls[0].data == {"match": True}
+
+    unsub()
+    hass.bus.async_fire("test_event", {"match": True})
+    await hass.async_block_till_done()
+
+    assert len(filtered) == 2
+    assert len(calls) == 1
+
+
+async def test_event_filter_must_be_callback(hass):
+    """Test an event filter that is not a callback is rejected."""
+
+    def _event_filter(event):
+        return True
+
+    with pytest.raises(ha.HomeAssistantError):
+        hass.bus.async_listen("test_event", lambda event: None, _event_filter)
+
+
+async def test_event_filter_exception(hass, caplog):
+    """Test an exception in an event filter skips the listener."""
+    calls = []
+
+    @ha.callback
+    def _event_filter(event):
+        raise ValueError("mock error")
+
+    @ha.callback
+    def _event_listener(event):
+        calls.append(event)
+
+    hass.bus.async_listen("test_event", _event_listener, event_filter=_event_filter)
+    hass.bus.async_fire("test_event")
+    await hass.async_block_till_done()
+
+    assert calls == []
+    assert "Error in event filter" in caplog.text
+
+
+async def test_async_set_many(hass):
+    """Test setting multiple states in one pass."""
+    events = []
+    batches = []
+
+    @ha.callback
+    def _event_listener(event):
+        events.append(event)
+
+    @ha.callback
+    def _batch_listener(changes):
+        batches.append(changes)
+
+    hass.bus.async_listen(ha.EVENT_STATE_CHANGED, _event_listener)
+    unsub = hass.states.async_listen_batch(_batch_listener)
+
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+    assert len(events) == 1
+    assert len(batches) == 1
+    events.clear()
+    batches.clear()
+
+    context = ha.Context()
+    hass.states.async_set_many(
+        [
+            ("light.kitchen", "off"),
+            ("light.bedroom", "on", {"brightness": 100}),
+            ("light.hallway", "on", None, False, context),
+        ]
+    )
+    await hass.async_block_till_done()
+
+    # light.kitchen did not change
+    assert [event.data["entity_id"] for event in events] == [
+        "light.bedroom",
+        "light.hallway",
+    ]
+    assert events[0].time_fired == events[1].time_fired
+    assert events[1].context is context
+    assert len(batches) == 1
+    assert [change["entity_id"] for change in batches[0]] == [
+        "light.bedroom",
+        "light.hallway",
+    ]
+    assert batches[0][0]["old_state"] is None
+    assert batches[0][0]["new_state"] is hass.states.get("light.bedroom")
+    assert hass.states.get("light.bedroom").attributes == {"brightness": 100}
+
+    hass.states.async_set_many([("light.bedroom", "on", {"brightness": 100})])
+    await hass.async_block_till_done()
+    assert len(batches) == 1
+
+    unsub()
+    hass.states.async_set_many([("light.bedroom", "off")])
+    await hass.async_block_till_done()
+    assert len(batches) == 1
+    assert len(events) == 3
+
+
+async def test_batch_listener_must_be_callback(hass):
+    """Test a batch listener that is not a callback is rejected."""
+    with pytest.raises(ha.HomeAssistantError):
+        hass.states.async_listen_batch(lambda changes: None)
+
+
+async def test_domain_filtered_queries(hass):
+    """Test state queries filtered by domain."""
+    hass.states.async_set("light.bowl", "on")
+    hass.states.async_set("switch.ac", "off")
+    hass.states.async_set("light.ceiling", "off")
+    hass.states.async_set("sensor.temperature", "20")
+
+    assert hass.states.async_entity_ids("light") == ["light.bowl", "light.ceiling"]
+    assert hass.states.async_entity_ids("LIGHT") == ["light.bowl", "light.ceiling"]
+    assert sorted(hass.states.async_entity_ids(["light", "switch"])) == [
+        "light.bowl",
+        "light.ceiling",
+        "switch.ac",
+    ]
+    assert hass.states.async_entity_ids("climate") == []
+    assert hass.states.async_entity_ids_count("light") == 2
+    assert hass.states.async_entity_ids_count({"light", "sensor", "climate"}) == 3
+    assert [state.entity_id for state in hass.states.async_all("switch")] == [
+        "switch.ac"
+    ]
+    assert sorted(
+        state.entity_id for state in hass.states.async_all(("switch", "sensor"))
+    ) == ["sensor.temperature", "switch.ac"]
+
+    hass.states.async_set("light.bowl", "off")
+    assert hass.states.async_all("light")[0] is hass.states.get("light.bowl")
+
+    hass.states.async_remove("light.bowl")
+    hass.states.async_remove("switch.ac")
+    assert hass.states.async_entity_ids("light") == ["light.ceiling"]
+    assert hass.states.async_entity_ids("switch") == []
+    assert hass.states.async_entity_ids_count("switch") == 0
+    assert hass.states.async_all("switch") == []
+
+
+async def test_domain_filtered_queries_order(hass):
+    """Test states are grouped by domain in filter order without duplicates."""
+    hass.states.async_set("light.bowl", "on")
+    hass.states.async_set("switch.ac", "off")
+    hass.states.async_set("light.ceiling", "off")
+
+    domain_filter = ["switch", "light", "switch"]
+    assert hass.states.async_entity_ids(domain_filter) == [
+        "switch.ac",
+        "light.bowl",
+        "light.ceiling",
+    ]
+    assert hass.states.async_entity_ids_count(domain_filter) == 3
+    assert [state.entity_id for state in hass.states.async_all(domain_filter)] == [
+        "switch.ac",
+        "light.bowl",
+        "light.ceiling",
+    ]
@@ -0,0 +1,99 @@
+"""Test the executor pools."""
+import threading
+
+import pytest
+
+from homeassistant.util.executor import ExecutorPools
+
+
+async def test_named_pool(hass):
+    """Test jobs run in their own pool and are counted."""
+    pools = ExecutorPools(hass.loop)
+
+    result = await pools.async_submit("io", lambda: threading.current_thread().name)
+    assert result.startswith("Pool-io")
+
+    await hass.async_block_till_done()
+    stats = pools.async_stats()
+    assert stats["io"]["completed"] == 1
+    assert stats["io"]["queued"] == 0
+    assert stats["io"]["running"] == 0
+
+    with pytest.raises(ValueError):
+        pools.configure("io", 2)
+
+    await pools.async_shutdown()
+
+
+async def test_integration_limit(hass):
+    """Test an integration can only run a limited number of jobs at once."""
+    pools = ExecutorPools(hass.loop)
+    pools.configure("integration:slow", 1)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def blocking_job():
+        started.release()
+        release.wait()
+
+    first = pools.async_submit("integration:slow", blocking_job)
+    second = pools.async_submit("integration:slow", blocking_job)
+
+    await hass.async_add_executor_job(started.acquire)
+    await hass.async_block_till_done()
+    stats = pools.async_stats()["integration:slow"]
+    assert stats["running"] == 1
+    assert stats["queued"] == 1
+
+    release.set()
+    await first
+    await second
+    stats = pools.async_stats()["integration:slow"]
+    assert stats["completed"] == 2
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+
+
+async def test_cancelled_jobs(hass):
+    """Test cancelled jobs leave the queue and running jobs are still counted."""
+    pools = ExecutorPools(hass.loop)
+    pools.configure("io", 1)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def blocking_job():
+        started.release()
+        release.wait()
+
+    first = pools.async_submit("io", blocking_job)
+    second = pools.async_submit("io", blocking_job)
+
+    await hass.async_add_executor_job(started.acquire)
+    await hass.async_block_till_done()
+
+    # The first job keeps running in its thread, the second never starts
+    first.cancel()
+    second.cancel()
+    await hass.async_block_till_done()
+    stats = pools.async_stats()["io"]
+    assert stats["running"] == 1
+    assert stats["queued"] == 0
+
+    release.set()
+    await pools.async_shutdown()
+    await hass.async_block_till_done()
+    stats = pools.async_stats()["io"]
+    assert stats["completed"] == 1
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+
+
+async def test_add_pool_executor_job(hass):
+    """Test hass tracks jobs added to pools."""
+    calls = []
+
+    hass.async_add_pool_executor_job("db", calls.append, 1)
+    await hass.async_block_till_done()
+
+    assert calls == [1]
+    assert hass.executors.async_stats()["db"]["completed"] == 1
@@ -0,0 +1,79 @@
+"""Test the job profiler."""
+import asyncio
+import functools
+import time
+
+from homeassistant.core import HassJob, callback
+from homeassistant.util.job_profiler import JobProfiler, job_name
+
+
+def _sample_job():
+    """Do nothing."""
+
+
+def test_job_name():
+    """Test job names unwrap partials."""
+    assert job_name(_sample_job) == f"{__name__}._sample_job"
+    assert job_name(functools.partial(_sample_job)) == f"{__name__}._sample_job"
+
+
+async def test_profile_jobs(hass):
+    """Test the profiler records all types of jobs."""
+    profiler = JobProfiler()
+    hass.async_set_job_profiler(profiler)
+    calls = []
+
+    @callback
+    def record_callback(value):
+        calls.append(value)
+
+    async def coroutine_function(value):
+        calls.append(value)
+
+    def executor_job(value):
+        calls.append(value)
+
+    hass.async_run_hass_job(HassJob(record_callback), 1)
+    hass.async_add_hass_job(HassJob(record_callback), 2)
+    hass.async_add_hass_job(HassJob(coroutine_function), 3)
+    hass.async_add_hass_job(HassJob(executor_job), 4)
+    await hass.async_block_till_done()
+
+    assert sorted(calls) == [1, 2, 3, 4]
+    stats = {job["name"]: job for job in profiler.top(10)}
+    prefix = f"{__name__}.test_profile_jobs.<locals>"
+    assert stats[f"{prefix}.record_callback"]["calls"] == 2
+    assert stats[f"{prefix}.coroutine_function"]["calls"] == 1
+    assert stats[f"{prefix}.executor_job"]["calls"] == 1
+
+    profiler.reset()
+    assert profiler.top(10) == []
+
+    hass.async_set_job_profiler(None)
+    hass.async_run_hass_job(HassJob(record_callback), 5)
+    assert profiler.top(10) == []
+
+
+async def test_flag_blocking_callbacks(hass, caplog):
+    """Test callbacks blocking the event loop are logged."""
+    profiler = JobProfiler(block_threshold=0.01)
+    hass.async_set_job_profiler(profiler)
+
+    @callback
+    def blocking_callback():
+        time.sleep(0.02)
+
+    async def sleeping_coroutine_function():
+        await asyncio.sleep(0.02)
+
+    hass.async_run_hass_job(HassJob(blocking_callback))
+    hass.async_add_hass_job(HassJob(sleeping_coroutine_function))
+    await hass.async_block_till_done()
+    hass.async_set_job_profiler(None)
+
+    stats = {job["name"].rsplit(".", 1)[-1]: job for job in profiler.top(10)}
+    assert stats["blocking_callback"]["blocked"] == 1
+    assert stats["blocking_callback"]["max_time"] >= 0.02
+    assert stats["sleeping_coroutine_function"]["blocked"] == 0
+    assert "blocking_callback blocking the event loop" in caplog.text
+    assert "sleeping_coroutine_function blocking" not in caplog.text